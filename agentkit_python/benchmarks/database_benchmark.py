@@ -0,0 +1,319 @@
+"""Synthetic-scale benchmark for `Database`.
+
+Builds databases of synthetic users, posts and nominations at each requested size, times
+every public `Database` method against them, prints throughput and p50/p99 latency, and
+writes the results as JSON so runs can be compared between commits.
+
+Usage (from the agentkit_python directory):
+    python -m benchmarks.database_benchmark --sizes 10000 1000000 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+from cdp_agentkit_core.utils.cache import DEFAULT_CACHE_SIZE
+from cdp_agentkit_core.utils.database import MS_PER_DAY, Database, current_day
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+DEFAULT_ITERATIONS = 200  # Timed calls per read method
+LOAD_CHUNK_SIZE = 10_000  # Rows per bulk call while loading
+POSTS_PER_USER = 20
+LIKES_BATCH_SIZE = 1_000  # Like counts per record_likes_bulk call
+SEARCH_WORDS = ["pixel", "art", "nft", "music", "game", "frame", "onchain", "based", "mint", "zora"]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], rows: int = 0) -> dict[str, Any]:
+    """Summarizes per-call latencies in seconds; `rows` counts rows handled by bulk calls."""
+    total = sum(latencies)
+    summary = {
+        "calls": len(latencies),
+        "seconds": total,
+        "calls_per_second": len(latencies) / total if total else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+    if rows:
+        summary["rows_per_second"] = rows / total if total else 0.0
+    return summary
+
+
+def timed(func: Callable, *args, **kwargs) -> float:
+    """Run `func` once and return its wall time in seconds."""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def synthetic_post(rng: random.Random, index: int, users: int, today: int) -> dict[str, Any]:
+    """Build one synthetic post spread over the last 30 days."""
+    fid = index % users + 1
+    words = " ".join(rng.choices(SEARCH_WORDS, k=4))
+    timestamp_ms = (today - rng.randrange(30)) * MS_PER_DAY + rng.randrange(MS_PER_DAY)
+    return {
+        "hash": f"0x{index:040x}",
+        "fid": fid,
+        "username": f"user{fid}",
+        "text": f"Today on Base I created {words}",
+        "likes": rng.randrange(500),
+        "timestamp": timestamp_ms,
+    }
+
+
+def load(db: Database, rows: int, rng: random.Random) -> dict[str, Any]:
+    """Fill the database with `rows` posts and nominations and time the bulk APIs."""
+    users = max(rows // POSTS_PER_USER, 10)
+    today = current_day()
+    results: dict[str, list[float]] = {
+        "upsert_users_bulk": [],
+        "create_posts_bulk": [],
+        "record_nominations_bulk": [],
+    }
+
+    for start in range(0, users, LOAD_CHUNK_SIZE):
+        chunk = [
+            {"fid": fid, "username": f"user{fid}"}
+            for fid in range(start + 1, min(users, start + LOAD_CHUNK_SIZE) + 1)
+        ]
+        results["upsert_users_bulk"].append(timed(db.upsert_users_bulk, chunk))
+
+    for start in range(0, rows, LOAD_CHUNK_SIZE):
+        chunk = [
+            synthetic_post(rng, index, users, today)
+            for index in range(start, min(rows, start + LOAD_CHUNK_SIZE))
+        ]
+        results["create_posts_bulk"].append(timed(db.create_posts_bulk, chunk))
+
+    for start in range(0, rows, LOAD_CHUNK_SIZE):
+        chunk = []
+        for index in range(start, min(rows, start + LOAD_CHUNK_SIZE)):
+            nominee = index % users + 1
+            nominator = (nominee + rng.randrange(1, users)) % users + 1
+            chunk.append(
+                {
+                    "nominator_fid": nominator,
+                    "nominee_fid": nominee,
+                    "post_hash": f"0x{index:040x}",
+                    "timestamp": (today - rng.randrange(30)) * MS_PER_DAY,
+                }
+            )
+        results["record_nominations_bulk"].append(timed(db.record_nominations_bulk, chunk))
+
+    return {
+        "users": users,
+        "methods": {
+            "upsert_users_bulk": summarize(results["upsert_users_bulk"], users),
+            "create_posts_bulk": summarize(results["create_posts_bulk"], rows),
+            "record_nominations_bulk": summarize(results["record_nominations_bulk"], rows),
+        },
+    }
+
+
+def bench_methods(
+    db: Database, rows: int, users: int, iterations: int, rng: random.Random
+) -> dict[str, Any]:
+    """Time every public single-call Database method against a loaded database."""
+    today = current_day()
+    now_ms = today * MS_PER_DAY
+    results: dict[str, Any] = {}
+
+    def repeat(name: str, make_call: Callable[[], Callable[[], Any]], count: int = iterations):
+        latencies = [timed(make_call()) for _ in range(count)]
+        results[name] = summarize(latencies)
+
+    repeat("get_user", lambda: lambda: db.get_user(rng.randrange(1, users + 1)))
+    repeat("get_post", lambda: lambda: db.get_post(f"0x{rng.randrange(rows):040x}"))
+    repeat("get_leaderboard", lambda: db.get_leaderboard)
+    repeat("get_points_leaderboard", lambda: db.get_points_leaderboard)
+    repeat("get_scores", lambda: db.get_scores, count=max(1, iterations // 10))
+    repeat(
+        "get_most_liked_posts",
+        lambda: lambda: db.get_most_liked_posts(now_ms - MS_PER_DAY, limit=3),
+    )
+    repeat(
+        "search_posts", lambda: lambda: db.search_posts(query=rng.choice(SEARCH_WORDS), limit=20)
+    )
+    repeat(
+        "check_nomination_quotas",
+        lambda: (
+            lambda: db.check_nomination_quotas(
+                {"nominator_fid": rng.randrange(1, users + 1), "timestamp": now_ms}
+                for _ in range(100)
+            )
+        ),
+    )
+
+    def make_record_likes_bulk():
+        likes = {
+            f"0x{rng.randrange(rows):040x}": rng.randrange(1000) for _ in range(LIKES_BATCH_SIZE)
+        }
+        return lambda: db.record_likes_bulk(likes, now_ms)
+
+    likes_latencies = [timed(make_record_likes_bulk()) for _ in range(iterations)]
+    results["record_likes_bulk"] = summarize(likes_latencies, iterations * LIKES_BATCH_SIZE)
+    repeat("get_like_velocity", lambda: lambda: db.get_like_velocity(now=now_ms))
+
+    new_fids = iter(range(users + 1, users + iterations + 1))
+
+    def make_create_user():
+        fid = next(new_fids)
+        return lambda: db.create_user(fid, f"user{fid}")
+
+    repeat("create_user", make_create_user)
+
+    new_posts = iter(range(rows, rows + iterations))
+
+    def make_create_post():
+        index = next(new_posts)
+        post = synthetic_post(rng, index, users, today)
+        return lambda: db.create_post(
+            post["fid"],
+            post["username"],
+            post["text"],
+            post["likes"],
+            post["timestamp"],
+            post["hash"],
+        )
+
+    repeat("create_post", make_create_post)
+
+    new_nominations = iter(range(iterations))
+
+    def make_record_nomination():
+        index = next(new_nominations)
+        return lambda: db.record_nomination(
+            users + index + 1, index % users + 1, f"0x{rows + index:040x}", now_ms
+        )
+
+    repeat("record_nomination", make_record_nomination)
+
+    # Only one creator can be marked per day, so this is a single timed call.
+    repeat(
+        "mark_based_creator_of_the_day",
+        lambda: lambda: db.mark_based_creator_of_the_day(1),
+        count=1,
+    )
+    repeat("get_daily_leader", lambda: db.get_daily_leader)
+
+    # Archiving moves most of the synthetic month out of the main file, so it runs once, last.
+    repeat(
+        "archive_closed_days",
+        lambda: lambda: db.archive_closed_days(keep_days=7, today=today),
+        count=1,
+    )
+
+    results["cache"] = db.cache_stats()
+    return results
+
+
+def run(
+    sizes: list[int], iterations: int, cache_size: int, seed: int, workdir: str
+) -> dict[str, Any]:
+    """Run the whole benchmark and return the JSON-serializable report."""
+    report: dict[str, Any] = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "iterations": iterations,
+        "cache_size": cache_size,
+        "sizes": {},
+    }
+    for rows in sizes:
+        rng = random.Random(seed)
+        path = os.path.join(workdir, f"bench_{rows}.db")
+        with Database(path, cache_size=cache_size) as db:
+            db.create_tables()
+            start = time.perf_counter()
+            loaded = load(db, rows, rng)
+            load_seconds = time.perf_counter() - start
+            methods = bench_methods(db, rows, loaded["users"], iterations, rng)
+        methods.update(loaded["methods"])
+        report["sizes"][str(rows)] = {
+            "rows": rows,
+            "users": loaded["users"],
+            "load_seconds": load_seconds,
+            "file_bytes": os.path.getsize(path),
+            "methods": methods,
+        }
+        print_size(rows, report["sizes"][str(rows)])
+        os.remove(path)
+    return report
+
+
+def print_size(rows: int, result: dict[str, Any]):
+    """Print one size's results as a table."""
+    print(
+        f"\n== {rows:,} rows ({result['users']:,} users), loaded in {result['load_seconds']:.1f}s =="
+    )
+    print(f"{'method':<32}{'calls/s':>12}{'rows/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, stats in result["methods"].items():
+        if name == "cache":
+            continue
+        rows_per_second = f"{stats['rows_per_second']:,.0f}" if "rows_per_second" in stats else "-"
+        print(
+            f"{name:<32}{stats['calls_per_second']:>12,.0f}{rows_per_second:>12}"
+            f"{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+        )
+
+
+def git_commit() -> str:
+    """Return the current git commit, or an empty string outside a checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark Database at synthetic scale.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Post and nomination counts to test.",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=DEFAULT_ITERATIONS, help="Timed calls per method."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help="Database cache size (0 disables it).",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic data.")
+    parser.add_argument("--workdir", default=None, help="Directory for the temporary databases.")
+    parser.add_argument(
+        "--output", default="bench_database.json", help="Where to write the JSON results."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        report = run(args.sizes, args.iterations, args.cache_size, args.seed, workdir)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,27 @@
 import os
-from dotenv import load_dotenv
+
 from agentkit_python.cdp_agentkit_core.actions import Action
-from agentkit_python.cdp_agentkit_core.utils.farcaster import post_cast, get_cast
-from agentkit_python.cdp_agentkit_core.utils.database import Database
+from agentkit_python.cdp_agentkit_core.utils.async_database import get_async_database
+from agentkit_python.cdp_agentkit_core.utils.farcaster import get_cast, post_cast
+from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+
 class HighlightCreator(Action):
+    """Highlights today's most liked "Today on Base I created..." post and its author."""
+
     def __init__(self):
         self.neynar_api_key = os.getenv("NEYNAR_API_KEY")
         self.signer_uuid = os.getenv("SIGNER_UUID")
-        self.db = Database()
+        self.db = get_async_database()
 
     async def run(self, *args, **kwargs):
-        """
-        Highlights the "Based Creator of the Day" on Farcaster.
-        """
+        """Highlights the "Based Creator of the Day" on Farcaster."""
         print("Highlighting Based Creator of the Day...")
 
-        leader = self.db.get_daily_leader()
+        leader = await self.db.get_daily_leader()
         if leader:
             cast = await get_cast(self.neynar_api_key, leader["hash"])
 
@@ -28,11 +30,7 @@ class HighlightCreator(Action):
                 f"Congratulations to @{cast['author']['username']} for their awesome creation:\n\n"
                 f"{cast['text']}"
             )
-            cast_hash = await post_cast(
-                self.neynar_api_key,
-                highlight_message,
-                self.signer_uuid
-            )
+            cast_hash = await post_cast(self.neynar_api_key, highlight_message, self.signer_uuid)
             print(f"Highlighted Based Creator of the Day in cast: {cast_hash}")
         else:
-            print("No Based Creator of the Day found for today.")
\ No newline at end of file
+            print("No Based Creator of the Day found for today.")
@@ -1,97 +1,171 @@
 import os
-from dotenv import load_dotenv
+
 from agentkit_python.cdp_agentkit_core.actions import Action
+from agentkit_python.cdp_agentkit_core.utils.async_database import get_async_database
+from agentkit_python.cdp_agentkit_core.utils.database import (
+    CAMPAIGN_KEYWORD,
+    MS_PER_DAY,
+    current_day,
+)
 from agentkit_python.cdp_agentkit_core.utils.farcaster import (
-    fetch_casts,
+    fetch_casts_since,
     fetch_mentions_for_fid,
+    fetch_reaction_counts,
     fetch_user_data,
-    post_cast,
+    fetch_users_bulk,
     get_cast,
+    get_casts_bulk,
+    likes_count,
+    post_cast,
 )
-from agentkit_python.cdp_agentkit_core.utils.database import (
-    Database,
-    get_user,
-    create_user,
-    get_post,
-    create_post,
-    record_nomination,
-    get_daily_leader,
-    mark_based_creator_of_the_day,
-)
+from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+
 class MonitorFarcaster(Action):
+    """Polls Farcaster for campaign posts and nominations and keeps the daily leader current."""
+
     def __init__(self):
         self.neynar_api_key = os.getenv("NEYNAR_API_KEY")
         self.theo_farcaster_fid = os.getenv("THEO_FARCASTER_FID")
         self.theo_farcaster_username = os.getenv("THEO_FARCASTER_USERNAME")
         self.base_channel_id = "base"
-        self.db = Database()
+        self.db = get_async_database()
 
     async def run(self, *args, **kwargs):
-        """
-        Monitors Farcaster for relevant activity.
-        """
+        """Monitor Farcaster for relevant activity."""
         print("Monitoring Farcaster...")
 
-        # Fetch and process new casts
-        casts = await fetch_casts(
+        # Fetch and process the casts posted since the last poll
+        since = await self.db.get_high_water_mark(self.base_channel_id)
+        casts, mark = await fetch_casts_since(
             self.neynar_api_key,
             self.base_channel_id,
-            keyword_filter="Today on Base I created...",
+            since,
+            keyword_filter=CAMPAIGN_KEYWORD,
         )
-        for cast in casts:
-            await self.process_cast(cast)
+        # Only move the mark past casts that were stored, so a failed write is retried
+        if await self.ingest_casts(casts) and mark and mark != since:
+            await self.db.set_high_water_mark(self.base_channel_id, mark["hash"], mark["timestamp"])
+        await self.refresh_likes()
+        await self.check_daily_leader()
 
         # Fetch and process mentions of THEO
-        mentions = await fetch_mentions_for_fid(
-            self.neynar_api_key, self.theo_farcaster_fid
+        mentions = await fetch_mentions_for_fid(self.neynar_api_key, self.theo_farcaster_fid)
+        # Look up every nominated post in bulk, and drop nominations that cannot count:
+        # missing posts and self-nominations
+        nominations = [mention for mention in mentions if mention["parent_hash"]]
+        parents = await get_casts_bulk(
+            self.neynar_api_key, (mention["parent_hash"] for mention in nominations)
+        )
+        candidates = []
+        for mention in nominations:
+            parent = parents.get(mention["parent_hash"])
+            if parent is None or not parent["author"]:
+                print(f"Skipping nomination: nominated cast {mention['parent_hash']} not found.")
+            elif parent["author"]["fid"] == mention["author"]["fid"]:
+                print("User cannot nominate themselves.")
+            else:
+                candidates.append((mention, parent))
+
+        # Drop nominations already recorded or over the daily quota before fetching users
+        allowed = await self.db.check_nomination_quotas(
+            {
+                "nominator_fid": mention["author"]["fid"],
+                "nominee_fid": parent["author"]["fid"],
+                "post_hash": parent["hash"],
+                "timestamp": mention["timestamp"],
+            }
+            for mention, parent in candidates
         )
-        for mention in mentions:
-            await self.process_mention(mention)
+        accepted = []
+        for (mention, parent), within_quota in zip(candidates, allowed, strict=True):
+            if within_quota:
+                accepted.append((mention, parent))
+            else:
+                print(
+                    f"Skipping nomination by {mention['author']['fid']}: already recorded or daily quota reached."
+                )
+        if not accepted:
+            return
+
+        # Look up every nominator and nominee in bulk
+        fids = [mention["author"]["fid"] for mention, _ in accepted]
+        fids += [parent["author"]["fid"] for _, parent in accepted]
+        users = await fetch_users_bulk(self.neynar_api_key, fids)
+        for mention, parent in accepted:
+            await self.process_mention(mention, parent, users)
+
+    async def ingest_casts(self, casts):
+        """Store the authors and posts of a page of casts in two bulk transactions.
+
+        Returns:
+            False if either write failed on a database error, True otherwise.
 
-    async def process_cast(self, cast):
-        """
-        Processes a cast to extract relevant information and take actions.
         """
-        author_fid = cast["author"]["fid"]
-        author_username = cast["author"]["username"]
-
-        # Check if user exists in the database, if not create them
-        existing_user = self.db.get_user(author_fid)
-        if existing_user is None:
-            user_data = await fetch_user_data(self.neynar_api_key, author_fid)
-            if user_data:
-                self.db.create_user(user_data["fid"], user_data["username"])
-
-        # Check if post exists, if not create it
-        existing_post = self.db.get_post(cast["hash"])
-        if existing_post is None:
-            self.db.create_post(
-                author_fid,
-                author_username,
-                cast["text"],
-                cast["reactions"]["likes"]["count"],
-                cast["timestamp"],
-                cast["hash"],
-            )
+        casts = [cast for cast in casts if cast.get("author")]
+        users = await self.db.upsert_users_bulk(cast["author"] for cast in casts)
+        posts = await self.db.create_posts_bulk(
+            {
+                "fid": cast["author"]["fid"],
+                "username": cast["author"]["username"],
+                "text": cast["text"],
+                "likes": likes_count(cast["reactions"]),
+                "timestamp": cast["timestamp"],
+                "hash": cast["hash"],
+            }
+            for cast in casts
+        )
+        print(f"Ingested {len(casts)} casts: users {users}, posts {posts}")
+        return not (users.get("failed") or posts.get("failed"))
 
-        # Check if this post has the most likes for the day
-        if self.is_most_liked_post_of_the_day(cast):
-            # Mark the author as "Based Creator of the Day"
-            self.db.mark_based_creator_of_the_day(author_fid)
-            # Highlight the post
-            await self.highlight_post(cast)
+    async def refresh_likes(self):
+        """Re-fetch and store the like counts of all of today's tracked posts in bulk.
 
-    async def process_mention(self, mention):
+        This way the daily leader is picked from current counts.
         """
-        Processes a mention of THEO to record nominations.
+        hashes = await self.db.get_post_hashes_for_day()
+        if not hashes:
+            return
+        likes = await fetch_reaction_counts(self.neynar_api_key, hashes)
+        result = await self.db.record_likes_bulk(likes)
+        print(f"Refreshed likes for {len(likes)} of {len(hashes)} posts: {result}")
+
+    async def check_daily_leader(self):
+        """Mark and highlight the author of today's most liked post if it beats the leader.
+
+        Reads the like counts stored by `refresh_likes`, so every post tracked today
+        competes on its current count, not just the casts fetched by this poll.
         """
+        start_ms = current_day() * MS_PER_DAY
+        top_posts = await self.db.get_most_liked_posts(
+            start_ms, limit=1, end_time=start_ms + MS_PER_DAY
+        )
+        # Mark the author as "Based Creator of the Day", and only highlight the post if
+        # they actually became it
+        if (
+            top_posts
+            and await self.is_most_liked_post_of_the_day(top_posts[0])
+            and await self.db.mark_based_creator_of_the_day(top_posts[0]["fid"])
+        ):
+            await self.highlight_post(top_posts[0])
+
+    async def process_mention(self, mention, parent_cast=None, users=None):
+        """Process a mention of THEO to record nominations.
+
+        `parent_cast` and `users` (keyed by fid) may be passed in when they were already
+        looked up in bulk; anything missing is fetched individually.
+        """
+        users = users or {}
         # Check if the mention is a reply to another cast and contains a nomination
         if mention["parent_hash"]:
-            parent_cast = await get_cast(self.neynar_api_key, mention["parent_hash"])
+            if parent_cast is None:
+                parent_cast = await get_cast(self.neynar_api_key, mention["parent_hash"])
+            if parent_cast is None or not parent_cast["author"]:
+                print(f"Skipping nomination: nominated cast {mention['parent_hash']} not found.")
+                return
 
             nominator_fid = mention["author"]["fid"]
             nominated_post = parent_cast
@@ -103,39 +177,41 @@ class MonitorFarcaster(Action):
                 return
 
             # Check if user exists in the database, if not create them
-            existing_nominator = self.db.get_user(nominator_fid)
+            existing_nominator = await self.db.get_user(nominator_fid)
             if existing_nominator is None:
-                nominator_data = await fetch_user_data(
+                nominator_data = users.get(nominator_fid) or await fetch_user_data(
                     self.neynar_api_key, nominator_fid
                 )
                 if nominator_data:
-                    self.db.create_user(nominator_data["fid"], nominator_data["username"])
+                    await self.db.create_user(nominator_data["fid"], nominator_data["username"])
 
             # Check if nominee exists in the database, if not create them
-            existing_nominee = self.db.get_user(nominee_fid)
+            existing_nominee = await self.db.get_user(nominee_fid)
             if existing_nominee is None:
-                nominee_data = await fetch_user_data(
+                nominee_data = users.get(nominee_fid) or await fetch_user_data(
                     self.neynar_api_key, nominee_fid
                 )
                 if nominee_data:
-                    self.db.create_user(nominee_data["fid"], nominee_data["username"])
+                    await self.db.create_user(nominee_data["fid"], nominee_data["username"])
 
             # Check if post exists, if not create it
-            existing_post = self.db.get_post(nominated_post["hash"])
+            existing_post = await self.db.get_post(nominated_post["hash"])
             if existing_post is None:
-                self.db.create_post(
+                await self.db.create_post(
                     nominee_fid,
                     nominated_post["author"]["username"],
                     nominated_post["text"],
-                    nominated_post["reactions"]["likes"]["count"],
+                    likes_count(nominated_post["reactions"]),
                     nominated_post["timestamp"],
                     nominated_post["hash"],
                 )
 
-            # Record the nomination
-            self.db.record_nomination(
+            # Record the nomination; the daily quota is enforced in the same transaction
+            recorded = await self.db.record_nomination(
                 nominator_fid, nominee_fid, nominated_post["hash"], mention["timestamp"]
             )
+            if not recorded:
+                return
 
             # THEO responds to the cast (optional)
             response = f"Thanks for the nomination, @{existing_nominator}! I've recorded it."
@@ -147,21 +223,17 @@ class MonitorFarcaster(Action):
                 reply_to=mention["hash"],
             )
 
-        def is_most_liked_post_of_the_day(self, cast):
-            """
-            Checks if a given cast is a "Today on Base I created..." post with the most likes for the day.
-            """
-            current_leader = self.db.get_daily_leader()
-            return (
-                current_leader is None
-                or cast["reactions"]["likes"]["count"] > current_leader["likes"]
-            )
+    async def is_most_liked_post_of_the_day(self, post):
+        """Check if a stored "Today on Base I created..." post beats the leader's likes.
+
+        The leader is the author of the current post of the day.
+        """
+        current_leader = await self.db.get_daily_leader()
+        return current_leader is None or post["likes"] > current_leader["likes"]
 
-        async def highlight_post(self, cast):
-            """
-            Highlights the given cast and its author by reposting it with a message.
-            """
-            highlight_message = f"🎉 Based Creator of the Day! 🎉\n\nCongratulations to @{cast['author']['username']} for their awesome creation:\n\n{cast['text']}"
+    async def highlight_post(self, post):
+        """Highlight the given stored post and its author by reposting it with a message."""
+        highlight_message = f"🎉 Based Creator of the Day! 🎉\n\nCongratulations to @{post['username']} for their awesome creation:\n\n{post['text']}"
 
-            # You would need to use THEO's account to sign this and post it.
-            print(highlight_message)
\ No newline at end of file
+        # You would need to use THEO's account to sign this and post it.
+        print(highlight_message)
@@ -0,0 +1,257 @@
+import asyncio
+import sqlite3
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from .database import DATABASE_NAME
+from .storage import StorageBackend, open_storage
+
+DEFAULT_READERS = 4  # Threads serving read queries concurrently
+DEFAULT_BATCH_SIZE = 200  # Most mutations grouped into one transaction
+DEFAULT_BATCH_WINDOW_SECONDS = 0.05  # How long the writer waits for a batch to fill
+
+# Database methods that only read. They run on the reader pool.
+READ_METHODS = {
+    "get_user",
+    "get_post",
+    "get_daily_leader",
+    "get_leaderboard",
+    "get_most_liked_posts",
+    "schema_version",
+    "explain_query_plan",
+    "check_query_plans",
+    "search_posts",
+    "get_points",
+    "get_points_leaderboard",
+    "get_scores",
+    "remaining_nominations",
+    "check_nomination_quotas",
+    "get_post_hashes_for_day",
+    "get_like_velocity",
+    "archived_before_day",
+    "get_high_water_mark",
+}
+
+# Database methods that write. They run one at a time on the dedicated writer thread.
+WRITE_METHODS = {
+    "create_tables",
+    "migrate",
+    "create_user",
+    "create_post",
+    "record_nomination",
+    "mark_based_creator_of_the_day",
+    "upsert_users_bulk",
+    "create_posts_bulk",
+    "record_nominations_bulk",
+    "rebuild_search_index",
+    "define_season",
+    "record_likes_bulk",
+    "set_high_water_mark",
+}
+
+# Database methods that manage their own transactions, e.g. to attach other database files,
+# which cannot happen inside a batch. They run on the writer thread between batches.
+MAINTENANCE_METHODS = {
+    "archive_closed_days",
+}
+
+
+class BatchWriter:
+    """Single background task that applies queued mutations in grouped transactions.
+
+    Callers await `submit`, which enqueues the mutation and resolves once it has been
+    committed. The writer task takes the first queued mutation, keeps collecting more until
+    either `max_batch_size` is reached or `max_delay` has passed, then runs the whole batch
+    inside one transaction on the writer thread. Each mutation gets its own savepoint, so a
+    failing mutation only fails its own caller.
+    """
+
+    def __init__(
+        self,
+        db: StorageBackend,
+        executor: ThreadPoolExecutor,
+        max_batch_size: int = DEFAULT_BATCH_SIZE,
+        max_delay: float = DEFAULT_BATCH_WINDOW_SECONDS,
+    ):
+        self.db = db
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.batches = 0  # Transactions committed, for monitoring
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, func: Callable, *args, **kwargs) -> Any:
+        """Queues a mutation and waits for the transaction containing it to commit."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((func, args, kwargs, future))
+        return await future
+
+    def _ensure_started(self):
+        """Start the writer task on the running loop if it is not already running."""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            results = await loop.run_in_executor(self.executor, self._apply, batch)
+            for (_, _, _, future), (ok, value) in zip(batch, results, strict=True):
+                if future.cancelled():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+            if stopping:
+                return
+
+    def _apply(self, batch: list[tuple]) -> list[tuple[bool, Any]]:
+        """Run a batch of mutations in one transaction; called on the writer thread."""
+        results = []
+        try:
+            with self.db.transaction():
+                for func, args, kwargs, _ in batch:
+                    try:
+                        with self.db.transaction():
+                            results.append((True, func(*args, **kwargs)))
+                    except Exception as e:
+                        results.append((False, e))
+            self.batches += 1
+        except sqlite3.Error as e:
+            print(f"An error occurred while committing a write batch: {e}")
+            return [(False, e)] * len(batch)
+        return results
+
+    async def close(self):
+        """Flushes queued mutations and stops the writer task."""
+        if self._task is not None and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+
+class AsyncDatabase:
+    """Asyncio facade over a storage backend with the same method surface.
+
+    Every query method returns a coroutine. Reads run on a small thread pool. Writes go
+    through a `BatchWriter`, which groups them into transactions on a single writer thread,
+    so slow disk I/O never blocks the event loop and writers never contend with each other
+    for the SQLite lock. Methods that do not touch the database, such as
+    `format_leaderboard`, are passed through unchanged.
+
+    The backend is `db` if given, otherwise the one named by `backend` or the
+    THEO_STORAGE_BACKEND environment variable; see `open_storage`.
+    """
+
+    def __init__(
+        self,
+        db_name: str = DATABASE_NAME,
+        readers: int = DEFAULT_READERS,
+        db: StorageBackend | None = None,
+        max_batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_delay: float = DEFAULT_BATCH_WINDOW_SECONDS,
+        backend: str | None = None,
+    ):
+        self.db = db or open_storage(backend, db_name)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="theo-db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="theo-db-reader")
+        self.batch_writer = BatchWriter(self.db, self._writer, max_batch_size, max_batch_delay)
+
+    def __getattr__(self, name: str) -> Any:
+        """Wrap the backend method `name` as a coroutine on the matching executor."""
+        if name == "db" or name.startswith("_"):
+            raise AttributeError(name)
+        if name in READ_METHODS:
+            method = getattr(self.db, name)
+
+            async def call(*args, **kwargs):
+                return await self._run(self._readers, method, *args, **kwargs)
+
+        elif name in WRITE_METHODS:
+            method = getattr(self.db, name)
+
+            async def call(*args, **kwargs):
+                return await self.batch_writer.submit(method, *args, **kwargs)
+
+        elif name in MAINTENANCE_METHODS:
+            method = getattr(self.db, name)
+
+            async def call(*args, **kwargs):
+                return await self.run_exclusive(method, *args, **kwargs)
+
+        else:
+            return getattr(self.db, name)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    async def run_exclusive(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the writer thread between write batches.
+
+        For work that manages its own transactions or must run outside one, such as
+        archiving or `Maintenance`.
+        """
+        return await self._run(self._writer, func, *args, **kwargs)
+
+    async def _run(self, executor: ThreadPoolExecutor, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking storage call on the given executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+    async def close(self):
+        """Wait for queued queries to finish, then close every pooled connection."""
+        await self.batch_writer.close()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self.db.close()
+
+    async def __aenter__(self) -> "AsyncDatabase":
+        """Return the database itself."""
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Flush queued writes and close the database."""
+        await self.close()
+
+
+_shared: dict[str, AsyncDatabase] = {}
+
+
+def get_async_database(db_name: str = DATABASE_NAME) -> AsyncDatabase:
+    """Return the process-wide AsyncDatabase for a database file.
+
+    Sharing one instance keeps every code path behind the same writer, which is what
+    prevents `database is locked` errors between actions.
+    """
+    if db_name not in _shared:
+        _shared[db_name] = AsyncDatabase(db_name)
+    return _shared[db_name]
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+DEFAULT_CACHE_SIZE = 10_000  # Entries kept before the least recently used is evicted
+DEFAULT_CACHE_TTL_SECONDS = 300.0  # How long an entry stays valid
+
+
+class TTLCache:
+    """Thread-safe, bounded LRU cache whose entries expire after a time-to-live.
+
+    Lookups count hits and misses so the cache can be sized from real traffic. A stored
+    value of None is a valid entry; pass a sentinel as `default` to tell it apart from a
+    miss.
+
+    A read-through fill can race an invalidation: the row is read, the key is invalidated
+    for a newer row, and then the old row is stored. To rule that out, take `generation()`
+    before reading and pass it to `set` as `since`; the value is then dropped if its key
+    was invalidated in between.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        ttl: float = DEFAULT_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # Generation of each key's latest invalidation, bounded like the entries. Fills
+        # started before the newest generation forgotten here, or before a `clear`, are
+        # dropped, since they can no longer be told apart from a raced one.
+        self._invalidated: OrderedDict[Hashable, int] = OrderedDict()
+        self._invalidated_floor = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def generation(self) -> int:
+        """Return the current invalidation generation, for a later `set(..., since=...)`."""
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, since: int | None = None):
+        """Store `value` under `key`, evicting the least recently used entry if full.
+
+        If `since` is given, the value is only stored if `key` was not invalidated after
+        `generation()` returned it.
+        """
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if since is not None and (
+                since < self._invalidated_floor or self._invalidated.get(key, 0) > since
+            ):
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop `key` from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.maxsize:
+                _, self._invalidated_floor = self._invalidated.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self._invalidated.clear()
+            self._invalidated_floor = self._generation
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones not yet dropped."""
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the hit and miss counters, the hit rate and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._data),
+        }
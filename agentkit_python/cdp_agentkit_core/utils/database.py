@@ -1,111 +1,1295 @@
-import sqlite3
-from typing import List, Optional
-import re
+import glob
+import heapq
+import itertools
 import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .cache import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL_SECONDS, TTLCache
+from .storage import BulkWriteResult, HighWaterMark, PostRow, ScoreRow, StorageBackend
 
 DATABASE_NAME = "theo_data.db"  # Database file name
+BUSY_TIMEOUT_SECONDS = 30.0  # How long a connection waits on a locked database
+MAX_QUERY_PARAMS = 500  # Keys per IN (...) lookup, well under SQLite's variable limit
+MS_PER_DAY = 86_400_000
+FARCASTER_EPOCH_SECONDS = 1_609_459_200  # 2021-01-01T00:00:00Z; Hub timestamps count from here
 
+# Default scoring rules, seeded into the scoring_rules table; see utils/points.py.
+DEFAULT_POST_POINTS = 10  # Per creator per day with a "Today on Base I created..." post
+DEFAULT_NOMINATION_POINTS = 5  # Per nomination received
+DEFAULT_PARTICIPATION_POINTS = 1  # Per nomination made
+DEFAULT_CREATOR_OF_DAY_POINTS = 25  # Bonus for the "Based Creator of the Day"
 
-class Database:
-    def __init__(self, db_name: str = DATABASE_NAME):
-        self.db_name = db_name
-        self.conn = None  # Initialize connection to None
+DAILY_NOMINATION_LIMIT = 3  # Nominations each user may make per campaign day
 
-    def connect(self):
-        """Establishes a connection to the database."""
-        try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign key support
-        except sqlite3.Error as e:
-            print(f"Error connecting to database: {e}")
-            # Consider logging the error
+# Text marking a cast as a campaign post, matched case-insensitively anywhere in it. Only
+# campaign posts earn post points; other casts are stored when they are nominated.
+CAMPAIGN_KEYWORD = "Today on Base I created..."
 
-    def close(self):
-        """Closes the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+HOT_DAYS = 7  # Closed campaign days kept in the main file before they are archived
+MAX_ATTACHED_ARCHIVES = 8  # Monthly archives attached at once; SQLite's default limit is 10
+EXPORT_CHUNK_SIZE = 10_000  # Rows read per chunk by Database.export_chunks
 
-    def create_tables(self):
-        """Creates the necessary tables if they don't exist."""
-        self.connect()
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    fid INTEGER PRIMARY KEY,
-                    username TEXT UNIQUE NOT NULL
-                )
+Timestamp = str | int | float | datetime
+
+
+def to_epoch_ms(value: Timestamp | None) -> int | None:
+    """Convert a timestamp to integer milliseconds since the Unix epoch.
+
+    Accepts ISO-8601 strings (a trailing `Z` is allowed), datetimes, and numbers. Numbers
+    of at least 1e12 are taken as milliseconds, at least 1e9 as Unix seconds, and anything
+    smaller as Farcaster Hub seconds. Naive datetimes and strings are treated as UTC.
+
+    Returns:
+        The epoch milliseconds, or None if the value cannot be parsed.
+
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isdigit():
+            value = int(value)
+        else:
+            try:
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    if value >= 1e12:
+        return int(value)
+    if value >= 1e9:
+        return int(value * 1000)
+    return int((value + FARCASTER_EPOCH_SECONDS) * 1000)
+
+
+def day_bucket(epoch_ms: int | None) -> int | None:
+    """Return the campaign day (days since the Unix epoch, UTC) for an epoch-ms timestamp."""
+    return None if epoch_ms is None else epoch_ms // MS_PER_DAY
+
+
+def current_day() -> int:
+    """Return today's campaign day in UTC."""
+    return day_bucket(int(time.time() * 1000))
+
+
+def nomination_epoch_ms(timestamp: Timestamp | None) -> int:
+    """Return the epoch milliseconds a nomination is counted at.
+
+    That is its own timestamp, or the current time if that cannot be parsed, so every
+    nomination falls on a quota day.
+    """
+    epoch_ms = to_epoch_ms(timestamp)
+    return int(time.time() * 1000) if epoch_ms is None else epoch_ms
+
+
+def week_bucket(day: int) -> int:
+    """Return the campaign day of the Monday starting the ISO week that contains `day`."""
+    # Campaign day 0 (1970-01-01) was a Thursday, so Mondays are the days where (day + 3) % 7 == 0.
+    return day - (day + 3) % 7
+
+
+def day_to_date(day: int) -> str:
+    """Return the `YYYY-MM-DD` UTC date of a campaign day."""
+    return datetime.fromtimestamp(day * 86_400, tz=timezone.utc).date().isoformat()
+
+
+# Matches campaign posts in SQL, with the alias of the posts table as `{posts}`.
+CAMPAIGN_POST_CONDITION = f"instr(lower({{posts}}.text), '{CAMPAIGN_KEYWORD.lower()}') > 0"
+
+# The creator of the day's bonus is timed at the leader's first post of that day, in the
+# triggers and in the replay alike. Params: fid, date, both as SQL expressions.
+CREATOR_OF_DAY_EVENT_MS = """
+    (SELECT MIN(p.timestamp_ms) FROM posts AS p
+     WHERE p.fid = {fid} AND p.day = CAST(julianday({date}) - 2440587.5 AS INTEGER))
+"""
+
+# Schema migrations as (version, description, steps). A step is either a SQL statement or a
+# callable taking the open connection. Versions are recorded in `PRAGMA user_version` and
+# must only ever be appended, never edited, once released.
+MIGRATIONS = [
+    (
+        1,
+        "initial schema",
+        [
             """
+            CREATE TABLE IF NOT EXISTS users (
+                fid INTEGER PRIMARY KEY,
+                username TEXT UNIQUE NOT NULL
             )
-
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS posts (
-                    hash TEXT PRIMARY KEY,
-                    fid INTEGER NOT NULL,
-                    username TEXT NOT NULL,
-                    text TEXT NOT NULL,
-                    likes INTEGER,
-                    timestamp TEXT NOT NULL,
-                    FOREIGN KEY (fid) REFERENCES users(fid)
-                )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                hash TEXT PRIMARY KEY,
+                fid INTEGER NOT NULL,
+                username TEXT NOT NULL,
+                text TEXT NOT NULL,
+                likes INTEGER,
+                timestamp TEXT NOT NULL,
+                FOREIGN KEY (fid) REFERENCES users(fid)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS nominations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nominator_fid INTEGER NOT NULL,
+                nominee_fid INTEGER NOT NULL,
+                post_hash TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                FOREIGN KEY (nominator_fid) REFERENCES users(fid),
+                FOREIGN KEY (nominee_fid) REFERENCES users(fid),
+                FOREIGN KEY (post_hash) REFERENCES posts(hash),
+                UNIQUE (nominator_fid, post_hash)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS based_creator_of_day (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fid INTEGER UNIQUE NOT NULL,
+                date TEXT UNIQUE NOT NULL,
+                FOREIGN KEY (fid) REFERENCES users(fid)
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "secondary indexes for highlight, leaderboard and daily leader queries",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_posts_timestamp_likes ON posts (timestamp, likes)",
+            "CREATE INDEX IF NOT EXISTS idx_posts_fid_likes ON posts (fid, likes)",
+            "CREATE INDEX IF NOT EXISTS idx_nominations_nominee ON nominations (nominee_fid)",
+            "CREATE INDEX IF NOT EXISTS idx_based_creator_of_day_date_fid ON based_creator_of_day (date, fid)",
+        ],
+    ),
+    (
+        3,
+        "materialized nomination scores maintained on insert",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS scores (
+                fid INTEGER PRIMARY KEY,
+                points INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (fid) REFERENCES users(fid)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_scores_points ON scores (points DESC, fid)",
+            # Nominations are append-only, so only inserts need to touch the score.
             """
+            CREATE TRIGGER IF NOT EXISTS trg_nominations_scores
+            AFTER INSERT ON nominations
+            BEGIN
+                INSERT INTO scores (fid, points) VALUES (NEW.nominee_fid, 1)
+                ON CONFLICT (fid) DO UPDATE SET points = points + 1;
+            END
+            """,
+            """
+            INSERT INTO scores (fid, points)
+            SELECT nominee_fid, COUNT(*) FROM nominations WHERE true GROUP BY nominee_fid
+            ON CONFLICT (fid) DO UPDATE SET points = excluded.points
+            """,
+        ],
+    ),
+    (
+        4,
+        "integer epoch-ms timestamps and campaign-day buckets",
+        [
+            "ALTER TABLE posts ADD COLUMN timestamp_ms INTEGER",
+            "ALTER TABLE posts ADD COLUMN day INTEGER",
+            "ALTER TABLE nominations ADD COLUMN timestamp_ms INTEGER",
+            "ALTER TABLE nominations ADD COLUMN day INTEGER",
+            lambda conn: _backfill_epoch_columns(conn, "posts"),
+            lambda conn: _backfill_epoch_columns(conn, "nominations"),
+            "DROP INDEX IF EXISTS idx_posts_timestamp_likes",
+            "DROP INDEX IF EXISTS idx_posts_fid_likes",
+            "CREATE INDEX IF NOT EXISTS idx_posts_timestamp_ms_likes ON posts (timestamp_ms, likes)",
+            "CREATE INDEX IF NOT EXISTS idx_posts_day_likes ON posts (day, likes)",
+            "CREATE INDEX IF NOT EXISTS idx_posts_fid_day_likes ON posts (fid, day, likes)",
+            "CREATE INDEX IF NOT EXISTS idx_nominations_day ON nominations (day, nominee_fid)",
+            "CREATE INDEX IF NOT EXISTS idx_nominations_timestamp_ms ON nominations (timestamp_ms)",
+        ],
+    ),
+    (
+        5,
+        "FTS5 full-text index over post text",
+        [
+            # External-content table: the text lives only in `posts`, keyed by its rowid.
+            # A full VACUUM may renumber those rowids; run `rebuild_search_index` after one.
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+                text,
+                content = 'posts',
+                content_rowid = 'rowid',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_posts_fts_insert AFTER INSERT ON posts
+            BEGIN
+                INSERT INTO posts_fts (rowid, text) VALUES (NEW.rowid, NEW.text);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_posts_fts_delete AFTER DELETE ON posts
+            BEGIN
+                INSERT INTO posts_fts (posts_fts, rowid, text) VALUES ('delete', OLD.rowid, OLD.text);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_posts_fts_update AFTER UPDATE OF text ON posts
+            BEGIN
+                INSERT INTO posts_fts (posts_fts, rowid, text) VALUES ('delete', OLD.rowid, OLD.text);
+                INSERT INTO posts_fts (rowid, text) VALUES (NEW.rowid, NEW.text);
+            END
+            """,
+            "INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')",
+        ],
+    ),
+    (
+        6,
+        "daily, weekly and season nomination rollups",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS seasons (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                start_day INTEGER NOT NULL,
+                end_day INTEGER NOT NULL
             )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_seasons_days ON seasons (start_day, end_day)",
+            # `bucket` is the campaign day for 'day', the Monday of the ISO week for 'week',
+            # and seasons.id for 'season'.
+            """
+            CREATE TABLE IF NOT EXISTS score_rollups (
+                period TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                fid INTEGER NOT NULL,
+                points INTEGER NOT NULL,
+                PRIMARY KEY (period, bucket, fid)
+            ) WITHOUT ROWID
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_score_rollups_points ON score_rollups (period, bucket, points DESC, fid)",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_nominations_rollups
+            AFTER INSERT ON nominations
+            WHEN NEW.day IS NOT NULL
+            BEGIN
+                INSERT INTO score_rollups (period, bucket, fid, points)
+                VALUES ('day', NEW.day, NEW.nominee_fid, 1)
+                ON CONFLICT (period, bucket, fid) DO UPDATE SET points = points + 1;
 
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS nominations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nominator_fid INTEGER NOT NULL,
-                    nominee_fid INTEGER NOT NULL,
-                    post_hash TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    FOREIGN KEY (nominator_fid) REFERENCES users(fid),
-                    FOREIGN KEY (nominee_fid) REFERENCES users(fid),
-                    FOREIGN KEY (post_hash) REFERENCES posts(hash),
-                    UNIQUE (nominator_fid, post_hash)
-                )
+                INSERT INTO score_rollups (period, bucket, fid, points)
+                VALUES ('week', NEW.day - ((NEW.day + 3) % 7), NEW.nominee_fid, 1)
+                ON CONFLICT (period, bucket, fid) DO UPDATE SET points = points + 1;
+
+                INSERT INTO score_rollups (period, bucket, fid, points)
+                SELECT 'season', seasons.id, NEW.nominee_fid, 1
+                FROM seasons
+                WHERE NEW.day BETWEEN seasons.start_day AND seasons.end_day
+                ON CONFLICT (period, bucket, fid) DO UPDATE SET points = points + 1;
+            END
+            """,
+            """
+            INSERT INTO score_rollups (period, bucket, fid, points)
+            SELECT 'day', day, nominee_fid, COUNT(*)
+            FROM nominations WHERE day IS NOT NULL GROUP BY day, nominee_fid
+            ON CONFLICT (period, bucket, fid) DO UPDATE SET points = excluded.points
+            """,
             """
+            INSERT INTO score_rollups (period, bucket, fid, points)
+            SELECT 'week', day - ((day + 3) % 7) AS week, nominee_fid, COUNT(*)
+            FROM nominations WHERE day IS NOT NULL GROUP BY week, nominee_fid
+            ON CONFLICT (period, bucket, fid) DO UPDATE SET points = excluded.points
+            """,
+        ],
+    ),
+    (
+        7,
+        "points ledger, totals and snapshots for the scoring engine",
+        [
+            # Single-row table of point values. `replaying` is set while the engine rebuilds
+            # totals in bulk so the per-row totals trigger stays out of the way.
+            """
+            CREATE TABLE IF NOT EXISTS scoring_rules (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                post_points INTEGER NOT NULL,
+                nomination_points INTEGER NOT NULL,
+                participation_points INTEGER NOT NULL,
+                creator_of_day_points INTEGER NOT NULL,
+                replaying INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            f"""
+            INSERT OR IGNORE INTO scoring_rules
+                (id, post_points, nomination_points, participation_points, creator_of_day_points)
+            VALUES (
+                1,
+                {DEFAULT_POST_POINTS},
+                {DEFAULT_NOMINATION_POINTS},
+                {DEFAULT_PARTICIPATION_POINTS},
+                {DEFAULT_CREATOR_OF_DAY_POINTS}
             )
+            """,
+            # Append-only: one row per scoring event. (event, fid, ref) makes every rule fire
+            # at most once per source row, e.g. post points once per creator per day.
+            """
+            CREATE TABLE IF NOT EXISTS points_ledger (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fid INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                ref TEXT NOT NULL,
+                day INTEGER,
+                points INTEGER NOT NULL,
+                event_ms INTEGER,
+                UNIQUE (event, fid, ref)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS point_totals (
+                fid INTEGER PRIMARY KEY,
+                points INTEGER NOT NULL,
+                last_ledger_id INTEGER NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_point_totals_points ON point_totals (points DESC, fid)",
+            """
+            CREATE TABLE IF NOT EXISTS points_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_ms INTEGER NOT NULL,
+                last_ledger_id INTEGER NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS points_snapshot_totals (
+                snapshot_id INTEGER NOT NULL,
+                fid INTEGER NOT NULL,
+                points INTEGER NOT NULL,
+                PRIMARY KEY (snapshot_id, fid)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_points_ledger_totals
+            AFTER INSERT ON points_ledger
+            WHEN (SELECT replaying FROM scoring_rules WHERE id = 1) = 0
+            BEGIN
+                INSERT INTO point_totals (fid, points, last_ledger_id)
+                VALUES (NEW.fid, NEW.points, NEW.id)
+                ON CONFLICT (fid) DO UPDATE SET
+                    points = points + excluded.points,
+                    last_ledger_id = excluded.last_ledger_id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_posts_points
+            AFTER INSERT ON posts
+            WHEN NEW.day IS NOT NULL
+            BEGIN
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.fid, 'post', CAST(NEW.day AS TEXT), NEW.day, post_points, NEW.timestamp_ms
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_nominations_points
+            AFTER INSERT ON nominations
+            BEGIN
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.nominee_fid, 'nomination_received', CAST(NEW.id AS TEXT), NEW.day,
+                    nomination_points, NEW.timestamp_ms
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
 
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS based_creator_of_day (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fid INTEGER UNIQUE NOT NULL,
-                    date TEXT UNIQUE NOT NULL,
-                    FOREIGN KEY (fid) REFERENCES users(fid)
-                )
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.nominator_fid, 'nomination_made', CAST(NEW.id AS TEXT), NEW.day,
+                    participation_points, NEW.timestamp_ms
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_based_creator_of_day_points
+            AFTER INSERT ON based_creator_of_day
+            BEGIN
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.fid, 'creator_of_day', NEW.date,
+                    CAST(julianday(NEW.date) - 2440587.5 AS INTEGER), creator_of_day_points,
+                    CAST(strftime('%s', 'now') AS INTEGER) * 1000
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+            END
+            """,
+            lambda conn: replay_points_ledger(conn),
+        ],
+    ),
+    (
+        8,
+        "per-day nomination quota counters",
+        [
+            # One counter per nominator and campaign day, bumped by the trigger below so
+            # the quota check never counts rows in nominations.
+            """
+            CREATE TABLE IF NOT EXISTS nomination_quotas (
+                nominator_fid INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (nominator_fid, day)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_nominations_quotas
+            AFTER INSERT ON nominations
+            WHEN NEW.day IS NOT NULL
+            BEGIN
+                INSERT INTO nomination_quotas (nominator_fid, day, count)
+                VALUES (NEW.nominator_fid, NEW.day, 1)
+                ON CONFLICT (nominator_fid, day) DO UPDATE SET count = count + 1;
+            END
+            """,
+            """
+            INSERT INTO nomination_quotas (nominator_fid, day, count)
+            SELECT nominator_fid, day, COUNT(*)
+            FROM nominations
+            WHERE day IS NOT NULL
+            GROUP BY nominator_fid, day
+            """,
+        ],
+    ),
+    (
+        9,
+        "post likes history",
+        [
+            # Like counts over time. Only changes are stored, so a post whose count holds
+            # steady costs one row however often it is sampled.
+            """
+            CREATE TABLE IF NOT EXISTS post_likes_history (
+                post_hash TEXT NOT NULL,
+                sampled_ms INTEGER NOT NULL,
+                likes INTEGER NOT NULL,
+                PRIMARY KEY (post_hash, sampled_ms)
+            ) WITHOUT ROWID
+            """,
+        ],
+    ),
+    (
+        10,
+        "archive cutoff",
+        [
+            # Campaign days before archived_before_day live in the monthly archive files.
             """
+            CREATE TABLE IF NOT EXISTS archive_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                archived_before_day INTEGER NOT NULL
             )
+            """,
+            "INSERT OR IGNORE INTO archive_state (id, archived_before_day) VALUES (1, 0)",
+        ],
+    ),
+    (
+        11,
+        "feed high-water marks",
+        [
+            # The newest cast ingested from each polled feed; polls stop once they reach it.
+            """
+            CREATE TABLE IF NOT EXISTS feed_marks (
+                feed TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                timestamp_ms INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """,
+        ],
+    ),
+    (
+        12,
+        "nomination keys kept across archiving",
+        [
+            # Every (nominator, post) pair ever nominated. Unlike nominations it is never
+            # archived, so a replayed mention of an archived nomination is still a duplicate.
+            """
+            CREATE TABLE IF NOT EXISTS nomination_keys (
+                nominator_fid INTEGER NOT NULL,
+                post_hash TEXT NOT NULL,
+                PRIMARY KEY (nominator_fid, post_hash)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_nominations_keys
+            AFTER INSERT ON nominations
+            BEGIN
+                INSERT INTO nomination_keys (nominator_fid, post_hash)
+                VALUES (NEW.nominator_fid, NEW.post_hash)
+                ON CONFLICT (nominator_fid, post_hash) DO NOTHING;
+            END
+            """,
+            lambda conn: _backfill_nomination_keys(conn),
+        ],
+    ),
+    (
+        13,
+        "creator of the day can change during the day and win again",
+        [
+            # Only the date stays unique: a later post may overtake the day's leader, and a
+            # past winner may win again. `revision` counts the day's leader changes.
+            """
+            CREATE TABLE based_creator_of_day_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fid INTEGER NOT NULL,
+                date TEXT UNIQUE NOT NULL,
+                revision INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (fid) REFERENCES users(fid)
+            )
+            """,
+            "INSERT INTO based_creator_of_day_new (id, fid, date) SELECT id, fid, date FROM based_creator_of_day",
+            "DROP TABLE based_creator_of_day",
+            "ALTER TABLE based_creator_of_day_new RENAME TO based_creator_of_day",
+            "CREATE INDEX IF NOT EXISTS idx_based_creator_of_day_date_fid ON based_creator_of_day (date, fid)",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_based_creator_of_day_points
+            AFTER INSERT ON based_creator_of_day
+            BEGIN
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.fid, 'creator_of_day', NEW.date,
+                    CAST(julianday(NEW.date) - 2440587.5 AS INTEGER), creator_of_day_points,
+                    CAST(strftime('%s', 'now') AS INTEGER) * 1000
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+            END
+            """,
+            # The ledger is append-only, so a new leader takes the bonus over through two new
+            # rows: one taking back what the previous leader was awarded, one awarding it anew.
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_based_creator_of_day_moved
+            AFTER UPDATE OF fid ON based_creator_of_day
+            WHEN NEW.fid IS NOT OLD.fid
+            BEGIN
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT OLD.fid, 'creator_of_day_revoked', NEW.date || '#' || NEW.revision, awarded.day,
+                    -awarded.points, CAST(strftime('%s', 'now') AS INTEGER) * 1000
+                FROM points_ledger AS awarded
+                WHERE awarded.event = 'creator_of_day' AND awarded.fid = OLD.fid
+                    AND awarded.day = CAST(julianday(NEW.date) - 2440587.5 AS INTEGER)
+                ORDER BY awarded.id DESC
+                LIMIT 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.fid, 'creator_of_day', NEW.date || '#' || NEW.revision,
+                    CAST(julianday(NEW.date) - 2440587.5 AS INTEGER), creator_of_day_points,
+                    CAST(strftime('%s', 'now') AS INTEGER) * 1000
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+            END
+            """,
+        ],
+    ),
+    (
+        14,
+        "post points for campaign posts only, and event times the replay reproduces",
+        [
+            # Casts stored only because they were nominated are not campaign posts. A day's
+            # post points are timed at the creator's first post that day, however the posts
+            # arrive, as the replay does.
+            "DROP TRIGGER IF EXISTS trg_posts_points",
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_posts_points
+            AFTER INSERT ON posts
+            WHEN NEW.day IS NOT NULL AND {CAMPAIGN_POST_CONDITION.format(posts="NEW")}
+            BEGIN
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.fid, 'post', CAST(NEW.day AS TEXT), NEW.day, post_points, NEW.timestamp_ms
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO UPDATE SET event_ms = MIN(event_ms, excluded.event_ms);
+            END
+            """,
+            "DROP TRIGGER IF EXISTS trg_based_creator_of_day_points",
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_based_creator_of_day_points
+            AFTER INSERT ON based_creator_of_day
+            BEGIN
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.fid, 'creator_of_day', NEW.date,
+                    CAST(julianday(NEW.date) - 2440587.5 AS INTEGER), creator_of_day_points,
+                    {CREATOR_OF_DAY_EVENT_MS.format(fid="NEW.fid", date="NEW.date")}
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+            END
+            """,
+            "DROP TRIGGER IF EXISTS trg_based_creator_of_day_moved",
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_based_creator_of_day_moved
+            AFTER UPDATE OF fid ON based_creator_of_day
+            WHEN NEW.fid IS NOT OLD.fid
+            BEGIN
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT OLD.fid, 'creator_of_day_revoked', NEW.date || '#' || NEW.revision, awarded.day,
+                    -awarded.points, awarded.event_ms
+                FROM points_ledger AS awarded
+                WHERE awarded.event = 'creator_of_day' AND awarded.fid = OLD.fid
+                    AND awarded.day = CAST(julianday(NEW.date) - 2440587.5 AS INTEGER)
+                ORDER BY awarded.id DESC
+                LIMIT 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+
+                INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+                SELECT NEW.fid, 'creator_of_day', NEW.date || '#' || NEW.revision,
+                    CAST(julianday(NEW.date) - 2440587.5 AS INTEGER), creator_of_day_points,
+                    {CREATOR_OF_DAY_EVENT_MS.format(fid="NEW.fid", date="NEW.date")}
+                FROM scoring_rules WHERE id = 1
+                ON CONFLICT (event, fid, ref) DO NOTHING;
+            END
+            """,
+            # Drops the points of non-campaign posts and retimes the bonuses.
+            lambda conn: replay_points_ledger(
+                conn,
+                conn.execute(
+                    "SELECT archived_before_day FROM archive_state WHERE id = 1"
+                ).fetchone()[0],
+            ),
+        ],
+    ),
+    (
+        15,
+        "index nominations by post for archiving",
+        [
+            # Archiving keeps a post in the main file while any hot nomination refers to it.
+            "CREATE INDEX IF NOT EXISTS idx_nominations_post_hash ON nominations (post_hash)",
+        ],
+    ),
+]
+
+LEADERBOARD_WINDOWS = ("all", "day", "week", "season")
+
+# Hot read queries, shared by the Database methods and `check_query_plans`.
+LEADERBOARD_QUERY = """
+    SELECT users.username, scores.points
+    FROM scores
+    LEFT JOIN users ON users.fid = scores.fid
+    ORDER BY scores.points DESC, scores.fid
+    LIMIT ? OFFSET ?
+"""
+
+# Every creator's all-time score; callers append a WHERE clause on s.fid to narrow it.
+SCORES_QUERY = """
+    SELECT s.fid, users.username, s.points
+    FROM scores AS s
+    LEFT JOIN users ON users.fid = s.fid
+"""
+
+WINDOW_LEADERBOARD_QUERY = """
+    SELECT users.username, score_rollups.points
+    FROM score_rollups
+    LEFT JOIN users ON users.fid = score_rollups.fid
+    WHERE score_rollups.period = ? AND score_rollups.bucket = ?
+    ORDER BY score_rollups.points DESC, score_rollups.fid
+    LIMIT ? OFFSET ?
+"""
+
+POINTS_LEADERBOARD_QUERY = """
+    SELECT users.username, point_totals.points
+    FROM point_totals
+    LEFT JOIN users ON users.fid = point_totals.fid
+    ORDER BY point_totals.points DESC, point_totals.fid
+    LIMIT ? OFFSET ?
+"""
+
+# Queries over posts that may reach into archived days are templates with a `{posts}`
+# source; see Database._posts_source.
+DAILY_LEADER_TEMPLATE = """
+    SELECT p.hash, p.fid, p.username, p.text, p.likes, p.timestamp
+    FROM based_creator_of_day b
+    JOIN {posts} p ON p.fid = b.fid AND p.day = ?
+    WHERE b.date = ?
+    ORDER BY p.likes DESC
+    LIMIT 1
+"""
+
+MOST_LIKED_POSTS_TEMPLATE = """
+    SELECT hash, fid, username, text, likes, timestamp
+    FROM {posts}
+    WHERE timestamp_ms >= ? AND timestamp_ms < ?
+    ORDER BY likes DESC
+    LIMIT ?
+"""
+
+DAILY_LEADER_QUERY = DAILY_LEADER_TEMPLATE.format(posts="posts")
+MOST_LIKED_POSTS_QUERY = MOST_LIKED_POSTS_TEMPLATE.format(posts="posts")
+
+# Likes gained by each of a day's posts since a point in time, from post_likes_history.
+# The baseline is the last sample at or before the start; posts created after the start
+# count from zero, and posts first sampled after it count from their first sample.
+# Params: now_ms, start_ms (x3), day, limit.
+LIKE_VELOCITY_QUERY = """
+    WITH samples AS (
+        SELECT
+            p.hash, p.fid, p.username, p.timestamp_ms,
+            COALESCE(
+                (SELECT h.likes FROM post_likes_history AS h
+                 WHERE h.post_hash = p.hash AND h.sampled_ms <= ?
+                 ORDER BY h.sampled_ms DESC LIMIT 1),
+                p.likes
+            ) AS likes,
+            COALESCE(
+                (SELECT h.likes FROM post_likes_history AS h
+                 WHERE h.post_hash = p.hash AND h.sampled_ms <= ?
+                 ORDER BY h.sampled_ms DESC LIMIT 1),
+                CASE WHEN p.timestamp_ms >= ? THEN 0 END,
+                (SELECT h.likes FROM post_likes_history AS h
+                 WHERE h.post_hash = p.hash AND h.sampled_ms > ?
+                 ORDER BY h.sampled_ms LIMIT 1),
+                p.likes
+            ) AS baseline
+        FROM posts AS p
+        WHERE p.day = ?
+    )
+    SELECT hash, fid, username, likes, likes - baseline AS gained
+    FROM samples
+    ORDER BY gained DESC, likes DESC
+    LIMIT ?
+"""
+
+# Appended to a nominations INSERT ... SELECT: only insert while the nominator's counter
+# for the day is below the limit. Params: nominator_fid, day, limit. The day must not be
+# NULL, or the counter lookup finds nothing; see nomination_epoch_ms.
+WITHIN_NOMINATION_QUOTA = """
+    COALESCE(
+        (SELECT count FROM nomination_quotas WHERE nominator_fid = ? AND day = ?), 0
+    ) < ?
+"""
+
+# Appended to a nominations INSERT ... SELECT: only insert a nomination that was never
+# recorded before, including ones already archived. Params: nominator_fid, post_hash.
+NOT_YET_NOMINATED = """
+    NOT EXISTS (SELECT 1 FROM nomination_keys WHERE nominator_fid = ? AND post_hash = ?)
+"""
+
+# Hashes of the posts `Database.archive_closed_days` may move out of the main file: those
+# created between two days and before the cutoff, and no longer nominated by a hot nomination.
+# Params: first day, last day, cutoff day.
+ARCHIVABLE_POSTS_QUERY = """
+    SELECT hash FROM main.posts
+    WHERE day BETWEEN ? AND ? AND day < ?
+        AND NOT EXISTS (SELECT 1 FROM main.nominations AS n WHERE n.post_hash = posts.hash)
+"""
+
+# Queries whose plans `Database.check_query_plans` inspects, keyed by name, with sample params.
+QUERY_PLAN_CHECKS = {
+    "leaderboard": (LEADERBOARD_QUERY, (10, 0)),
+    "window_leaderboard": (WINDOW_LEADERBOARD_QUERY, ("week", 0, 10, 0)),
+    "points_leaderboard": (POINTS_LEADERBOARD_QUERY, (10, 0)),
+    "daily_leader": (DAILY_LEADER_QUERY, (0, "1970-01-01")),
+    "most_liked_posts": (MOST_LIKED_POSTS_QUERY, (0, MS_PER_DAY, 3)),
+    "archivable_posts": (ARCHIVABLE_POSTS_QUERY, (0, 30, 30)),
+}
+
+
+# Columns of each table `Database.export_chunks` can export, in output order.
+EXPORT_COLUMNS: dict[str, tuple[str, ...]] = {
+    "users": ("fid", "username"),
+    "posts": ("hash", "fid", "username", "text", "likes", "timestamp", "timestamp_ms", "day"),
+    "nominations": (
+        "id",
+        "nominator_fid",
+        "nominee_fid",
+        "post_hash",
+        "timestamp",
+        "timestamp_ms",
+        "day",
+    ),
+    "scores": ("fid", "username", "points"),
+}
+
+
+def _backfill_epoch_columns(conn: sqlite3.Connection, table: str):
+    """Fill `timestamp_ms` and `day` from the TEXT `timestamp` column of existing rows."""
+    rows = conn.execute(f"SELECT rowid, timestamp FROM {table}").fetchall()
+    updates = []
+    for rowid, timestamp in rows:
+        epoch_ms = to_epoch_ms(timestamp)
+        updates.append((epoch_ms, day_bucket(epoch_ms), rowid))
+    conn.executemany(f"UPDATE {table} SET timestamp_ms = ?, day = ? WHERE rowid = ?", updates)
+
+
+def _archive_files(db_name: str) -> list[str]:
+    """Return the monthly archive files next to a database file, oldest month first."""
+    if db_name in ("", ":memory:"):
+        return []
+    return sorted(glob.glob(glob.escape(f"{os.path.splitext(db_name)[0]}.archive-") + "*.db"))
+
+
+def _backfill_nomination_keys(conn: sqlite3.Connection):
+    """Fill nomination_keys from the nominations in the main file and its archive files."""
+    conn.execute(
+        """
+        INSERT INTO nomination_keys (nominator_fid, post_hash)
+        SELECT nominator_fid, post_hash FROM nominations WHERE true
+        ON CONFLICT (nominator_fid, post_hash) DO NOTHING
+        """
+    )
+    main_file = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+    # Nothing can be attached inside the migration's transaction, so each archive is read
+    # through its own read-only connection.
+    for path in _archive_files(main_file):
+        archive = sqlite3.connect(Path(path).absolute().as_uri() + "?mode=ro", uri=True)
+        try:
+            if archive.execute("SELECT 1 FROM sqlite_master WHERE name = 'nominations'").fetchone():
+                conn.executemany(
+                    """
+                    INSERT INTO nomination_keys (nominator_fid, post_hash) VALUES (?, ?)
+                    ON CONFLICT (nominator_fid, post_hash) DO NOTHING
+                    """,
+                    archive.execute("SELECT nominator_fid, post_hash FROM nominations"),
+                )
+        finally:
+            archive.close()
+
+
+def _fts_quote(text: str) -> str:
+    """Quotes user input as a single FTS5 string so its punctuation is not parsed as syntax."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+# Row factories turning query results straight into row objects. Queries using them
+# select the row type's fields by name, in field order, so they do not depend on the
+# column order of the tables.
+def _post_row(cursor: sqlite3.Cursor, row: tuple) -> PostRow:
+    return PostRow(*row)
+
+
+def _score_row(cursor: sqlite3.Cursor, row: tuple) -> ScoreRow:
+    return ScoreRow(*row)
+
 
-            self.conn.commit()
+def _query(
+    conn: sqlite3.Connection,
+    row_factory: Callable[[sqlite3.Cursor, tuple], Any],
+    sql: str,
+    params=(),
+) -> sqlite3.Cursor:
+    """Run a query on a new cursor whose rows are built by `row_factory`."""
+    cursor = conn.cursor()
+    cursor.row_factory = row_factory
+    return cursor.execute(sql, params)
+
+
+def _fetch_chunks(cursor: sqlite3.Cursor, chunk_size: int) -> Iterator[list[tuple]]:
+    """Yield a query's rows in lists of up to `chunk_size`."""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+# Rebuilds the points ledger from the source tables with the current scoring rules, one
+# set-based statement per rule. Shared by migrations 7 and 14 and PointsEngine.recompute.
+# Days before :archived_before have been moved to the archive files, so their ledger rows,
+# creator of the day bonuses included, are kept as they are rather than rebuilt.
+REPLAY_POINTS_LEDGER = [
+    "UPDATE scoring_rules SET replaying = 1 WHERE id = 1",
+    # Snapshots were priced with the old rules and would double count the new ledger.
+    "DELETE FROM points_snapshot_totals",
+    "DELETE FROM points_snapshots",
+    "DELETE FROM points_ledger WHERE day IS NULL OR day >= :archived_before",
+    "DELETE FROM point_totals",
+    f"""
+    INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+    SELECT posts.fid, 'post', CAST(posts.day AS TEXT), posts.day, rules.post_points,
+        MIN(posts.timestamp_ms)
+    FROM posts, scoring_rules AS rules
+    WHERE rules.id = 1 AND posts.day >= :archived_before AND {CAMPAIGN_POST_CONDITION.format(posts="posts")}
+    GROUP BY posts.fid, posts.day
+    """,
+    """
+    INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+    SELECT n.nominee_fid, 'nomination_received', CAST(n.id AS TEXT), n.day,
+        rules.nomination_points, n.timestamp_ms
+    FROM nominations AS n, scoring_rules AS rules
+    WHERE rules.id = 1 AND (n.day IS NULL OR n.day >= :archived_before)
+    """,
+    """
+    INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+    SELECT n.nominator_fid, 'nomination_made', CAST(n.id AS TEXT), n.day,
+        rules.participation_points, n.timestamp_ms
+    FROM nominations AS n, scoring_rules AS rules
+    WHERE rules.id = 1 AND (n.day IS NULL OR n.day >= :archived_before)
+    """,
+    f"""
+    INSERT INTO points_ledger (fid, event, ref, day, points, event_ms)
+    SELECT b.fid, 'creator_of_day', b.date, CAST(julianday(b.date) - 2440587.5 AS INTEGER),
+        rules.creator_of_day_points, {CREATOR_OF_DAY_EVENT_MS.format(fid="b.fid", date="b.date")}
+    FROM based_creator_of_day AS b, scoring_rules AS rules
+    WHERE rules.id = 1 AND CAST(julianday(b.date) - 2440587.5 AS INTEGER) >= :archived_before
+    """,
+    """
+    INSERT INTO point_totals (fid, points, last_ledger_id)
+    SELECT fid, SUM(points), MAX(id) FROM points_ledger GROUP BY fid
+    """,
+    "UPDATE scoring_rules SET replaying = 0 WHERE id = 1",
+]
+
+
+def replay_points_ledger(conn: sqlite3.Connection, archived_before_day: int = 0):
+    """Run REPLAY_POINTS_LEDGER on an open transaction."""
+    for statement in REPLAY_POINTS_LEDGER:
+        conn.execute(statement, {"archived_before": archived_before_day})
+
+
+# Tables moved to the monthly archive files, with the columns that identify a row there.
+ARCHIVED_TABLES = {
+    "nominations": "id",
+    "posts": "hash",
+    "post_likes_history": "post_hash, sampled_ms",
+}
+
+
+def month_of_day(day: int) -> str:
+    """Return the `YYYY-MM` UTC month of a campaign day."""
+    return day_to_date(day)[:7]
+
+
+def month_day_range(month: str) -> tuple[int, int]:
+    """Return the first and last campaign day of a `YYYY-MM` month."""
+    year, number = (int(part) for part in month.split("-"))
+    first = datetime(year, number, 1, tzinfo=timezone.utc)
+    following = datetime(year + number // 12, number % 12 + 1, 1, tzinfo=timezone.utc)
+    return day_bucket(to_epoch_ms(first)), day_bucket(to_epoch_ms(following)) - 1
+
+
+class ConnectionPool:
+    """Keep one long-lived SQLite connection per thread and reuse it across calls.
+
+    Connections are opened lazily the first time a thread asks for one and stay open
+    until `close_all` is called, so `PRAGMA foreign_keys` runs once per connection rather
+    than once per query. Asyncio tasks running on the same event loop thread share that
+    thread's connection; this is safe because no `Database` method awaits while holding
+    a transaction open.
+    """
+
+    def __init__(self, db_name: str = DATABASE_NAME, timeout: float = BUSY_TIMEOUT_SECONDS):
+        self.db_name = db_name
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a new connection in autocommit mode; transactions are managed explicitly."""
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign key support
+        # Lets Maintenance return free pages in small steps. Only takes effect on a new file;
+        # existing files are switched over by Maintenance.incremental_vacuum.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        if self.db_name != ":memory:":
+            # WAL lets readers on other threads proceed while a write transaction is open.
+            conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager yielding the calling thread's pooled connection."""
+        yield self.acquire()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Context manager wrapping its body in a transaction.
+
+        The outermost scope issues `BEGIN IMMEDIATE` and commits on success. Nested scopes
+        become savepoints, so an inner failure only rolls back its own work. Any exception
+        rolls the scope back and is re-raised, discarding callbacks registered in it with
+        `call_after_commit`.
+        """
+        conn = self.acquire()
+        depth = self._local.depth
+        if depth == 0:
+            self._local.after_commit = []
+        pending = len(self._local.after_commit)
+        savepoint = f"sp_{depth}"
+        conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            del self._local.after_commit[pending:]
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            self._local.depth = depth
+            conn.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
+            if depth == 0:
+                callbacks, self._local.after_commit = self._local.after_commit, []
+                for callback in callbacks:
+                    callback()
+
+    def call_after_commit(self, callback: Callable[[], Any]):
+        """Run `callback` once the calling thread's outermost transaction commits.
+
+        Outside a transaction the callback runs immediately. If the scope it was registered
+        in rolls back, the callback is dropped.
+        """
+        if self.in_transaction():
+            self._local.after_commit.append(callback)
+        else:
+            callback()
+
+    def in_transaction(self) -> bool:
+        """Whether the calling thread currently has a transaction scope open."""
+        return getattr(self._local, "depth", 0) > 0
+
+    def close_all(self):
+        """Close every pooled connection; threads reopen lazily on next use."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        # Force each thread to reconnect instead of reusing a closed handle.
+        self._local = threading.local()
+
+
+class Database(StorageBackend):
+    """The SQLite storage backend."""
+
+    def __init__(
+        self,
+        db_name: str = DATABASE_NAME,
+        pool: ConnectionPool | None = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl: float = DEFAULT_CACHE_TTL_SECONDS,
+        nomination_limit: int = DAILY_NOMINATION_LIMIT,
+    ):
+        self.db_name = db_name
+        self.nomination_limit = nomination_limit
+        self.pool = pool or ConnectionPool(db_name)
+        self.conn = None  # Last connection handed out by connect()
+        # Read-through caches for get_user and get_post, kept current by the write paths.
+        self.user_cache = TTLCache(cache_size, cache_ttl)
+        self.post_cache = TTLCache(cache_size, cache_ttl)
+        # Callbacks told about committed score changes, see add_score_listener.
+        self._score_listeners: list[Callable[[list[ScoreRow]], Any]] = []
+
+    def __enter__(self) -> "Database":
+        """Return the database itself."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """Close the database."""
+        self.close()
+
+    def connect(self) -> sqlite3.Connection | None:
+        """Return the calling thread's pooled connection to the database."""
+        try:
+            self.conn = self.pool.acquire()
         except sqlite3.Error as e:
-            print(f"An error occurred while creating tables: {e}")
+            print(f"Error connecting to database: {e}")
             # Consider logging the error
-        finally:
-            self.close()
+        return self.conn
+
+    def close(self):
+        """Close all pooled database connections."""
+        self.pool.close_all()
+        self.conn = None
+
+    def cache_stats(self) -> dict[str, dict[str, Any]]:
+        """Return hit/miss counters for the user and post caches."""
+        return {"users": self.user_cache.stats(), "posts": self.post_cache.stats()}
+
+    def _cache_write(self, cache: TTLCache, key: Any, value: Any):
+        """Write a freshly stored row through to a cache once it is committed.
+
+        Until then the key is invalidated, so a rolled-back row is never served.
+        """
+        cache.invalidate(key)
+        self.pool.call_after_commit(lambda: cache.set(key, value))
+
+    def _cache_invalidate(self, cache: TTLCache, keys: Iterable[Any]):
+        """Drop rows changed by a bulk write from a cache, now and again once they are committed.
+
+        A reader that re-caches the old row before the commit would otherwise keep serving
+        it until its TTL runs out; one that read the old row before the commit and stores it
+        after is turned away by the cache generation it took before reading.
+        """
+        keys = list(keys)
+
+        def invalidate():
+            for key in keys:
+                cache.invalidate(key)
+
+        invalidate()
+        self.pool.call_after_commit(invalidate)
+
+    def add_score_listener(self, callback: Callable[[list[ScoreRow]], Any]):
+        """Register a callback for committed score changes.
+
+        After every transaction that changes scores or renames scored users, the callback
+        receives the new `(fid, username, points)` totals of the affected users.
+        """
+        self._score_listeners.append(callback)
+
+    def _notify_scores(self, conn: sqlite3.Connection, fids: Iterable[int]):
+        """Read the current scores of `fids` and hand them to the listeners after commit."""
+        if not self._score_listeners:
+            return
+        fids = list(dict.fromkeys(fids))
+        rows = []
+        for start in range(0, len(fids), MAX_QUERY_PARAMS):
+            chunk = fids[start : start + MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            rows.extend(
+                _query(conn, _score_row, f"{SCORES_QUERY} WHERE s.fid IN ({placeholders})", chunk)
+            )
+        if not rows:
+            return
+
+        def notify():
+            for listener in self._score_listeners:
+                try:
+                    listener(rows)
+                except Exception as e:
+                    print(f"A score listener failed: {e}")
+                    # Consider logging the error
 
-    def get_user(self, fid: int) -> Optional[dict]:
-        """Retrieves a user by their Farcaster ID."""
-        self.connect()
+        self.pool.call_after_commit(notify)
+
+    def connection(self):
+        """Context manager yielding a pooled connection for reads."""
+        return self.pool.connection()
+
+    def transaction(self):
+        """Context manager yielding a pooled connection inside a transaction scope."""
+        return self.pool.transaction()
+
+    def create_tables(self):
+        """Create the necessary tables if they don't exist by applying pending migrations."""
+        self.migrate()
+
+    def schema_version(self) -> int:
+        """Return the last migration version applied to the database."""
+        with self.connection() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self, target: int | None = None) -> list[int]:
+        """Apply pending schema migrations in version order.
+
+        Each migration runs in its own transaction together with the `PRAGMA user_version`
+        bump, so a failed migration leaves the schema at the previous version.
+
+        Args:
+            target: The version to migrate up to. Defaults to the latest migration.
+
+        Returns:
+            The versions that were applied.
+
+        """
+        applied = []
+        for version, description, steps in MIGRATIONS:
+            if target is not None and version > target:
+                break
+            try:
+                with self.transaction() as conn:
+                    if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                        continue
+                    for step in steps:
+                        if callable(step):
+                            step(conn)
+                        else:
+                            conn.execute(step)
+                    conn.execute(f"PRAGMA user_version = {int(version)}")
+                applied.append(version)
+            except sqlite3.Error as e:
+                print(f"An error occurred while applying migration {version} ({description}): {e}")
+                # Consider logging the error
+                break
+        return applied
+
+    def explain_query_plan(self, query: str, params: tuple = ()) -> list[str]:
+        """Return the `EXPLAIN QUERY PLAN` detail lines for a query."""
+        with self.connection() as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        return [row[3] for row in rows]
+
+    def check_query_plans(self) -> list[str]:
+        """Check the hot read queries for full table scans.
+
+        Returns:
+            One message per query plan step that scans a table without an index, or scans
+            one at all inside a correlated subquery, which repeats the scan for every outer
+            row. An empty list means every checked query is served by an index.
+
+        """
+        problems = []
+        for name, (query, params) in QUERY_PLAN_CHECKS.items():
+            with self.connection() as conn:
+                plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            parents = {row[0]: row[1] for row in plan}
+            correlated = {row[0] for row in plan if row[3].startswith("CORRELATED")}
+            # Scanning a subquery's result is fine; only scans of stored tables are flagged.
+            subqueries = {
+                row[3].split()[-1]
+                for row in plan
+                if row[3].startswith(("CO-ROUTINE", "MATERIALIZE"))
+            }
+            for _, parent, _, detail in plan:
+                match = re.fullmatch(r"SCAN (\w+)( USING .*)?", detail)
+                if not match or match.group(1) in subqueries:
+                    continue
+                while parent and parent not in correlated:
+                    parent = parents.get(parent, 0)
+                if match.group(2) is None or parent in correlated:
+                    problems.append(f"{name}: {detail}")
+        return problems
+
+    def get_user(self, fid: int) -> dict | None:
+        """Retrieve a user by their Farcaster ID."""
+        cached = self.user_cache.get(fid)
+        if cached is not None:
+            return dict(cached)
+        generation = self.user_cache.generation()
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE fid = ?", (fid,))
-            result = cursor.fetchone()
+            with self.connection() as conn:
+                result = conn.execute("SELECT * FROM users WHERE fid = ?", (fid,)).fetchone()
             if result:
-                return {"fid": result[0], "username": result[1]}
+                user = {"fid": result[0], "username": result[1]}
+                self.user_cache.set(fid, user, since=generation)
+                return dict(user)
         except sqlite3.Error as e:
             print(f"An error occurred while retrieving user: {e}")
             # Consider logging the error
-        finally:
-            self.close()
         return None
 
     def create_user(self, fid: int, username: str):
-        """Creates a new user."""
+        """Create a new user."""
         if not isinstance(fid, int):
             print(f"Error: Invalid FID format: {fid}. FID must be an integer.")
             return
@@ -114,145 +1298,487 @@ class Database:
             print(f"Error: Invalid username format: {username}")
             return
 
-        self.connect()
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("INSERT INTO users (fid, username) VALUES (?, ?)", (fid, username))
-            self.conn.commit()
+            with self.transaction() as conn:
+                conn.execute("INSERT INTO users (fid, username) VALUES (?, ?)", (fid, username))
+            self._cache_write(self.user_cache, fid, {"fid": fid, "username": username})
         except sqlite3.IntegrityError as e:
             print(f"Failed to create user: {e}")
             # Consider logging the error
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             # Consider logging the error
-        finally:
-            self.close()
 
-    def get_post(self, hash: str) -> Optional[dict]:
-        """Retrieves a post by its hash."""
-        self.connect()
+    def get_post(self, hash: str) -> PostRow | None:
+        """Retrieve a post by its hash."""
+        cached = self.post_cache.get(hash)
+        if cached is not None:
+            return cached
+        generation = self.post_cache.generation()
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM posts WHERE hash = ?", (hash,))
-            result = cursor.fetchone()
-            if result:
-                return {
-                    "hash": result[0],
-                    "fid": result[1],
-                    "username": result[2],
-                    "text": result[3],
-                    "likes": result[4],
-                    "timestamp": result[5]
-                }
+            with self.connection() as conn:
+                post = _query(
+                    conn,
+                    _post_row,
+                    "SELECT hash, fid, username, text, likes, timestamp FROM posts WHERE hash = ?",
+                    (hash,),
+                ).fetchone()
+            if post:
+                self.post_cache.set(hash, post, since=generation)
+                return post
         except sqlite3.Error as e:
             print(f"An error occurred while retrieving post: {e}")
             # Consider logging the error
-        finally:
-            self.close()
         return None
 
-    def create_post(self, fid: int, username: str, text: str, likes: int, timestamp: str, hash: str):
-        """Creates a new post."""
-        self.connect()
+    def create_post(
+        self, fid: int, username: str, text: str, likes: int, timestamp: str, hash: str
+    ):
+        """Create a new post."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO posts (fid, username, text, likes, timestamp, hash)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (fid, username, text, likes, timestamp, hash))
-            self.conn.commit()
+            with self.transaction() as conn:
+                epoch_ms = to_epoch_ms(timestamp)
+                conn.execute(
+                    """
+                    INSERT INTO posts (fid, username, text, likes, timestamp, hash, timestamp_ms, day)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (fid, username, text, likes, timestamp, hash, epoch_ms, day_bucket(epoch_ms)),
+                )
+            self._cache_write(
+                self.post_cache, hash, PostRow(hash, fid, username, text, likes, timestamp)
+            )
         except sqlite3.Error as e:
             print(f"An error occurred while creating post: {e}")
             # Consider logging the error
-        finally:
-            self.close()
 
-    def record_nomination(self, nominator_fid: int, nominee_fid: int, post_hash: str, timestamp: str):
-        """Records a nomination."""
-        self.connect()
+    def record_nomination(
+        self, nominator_fid: int, nominee_fid: int, post_hash: str, timestamp: str
+    ) -> bool:
+        """Record a nomination if the nominator may still make it.
+
+        The nominator needs quota left for the nomination's day and must not have nominated
+        the post before, even in a nomination since archived.
+
+        The quota check and the counter increment happen in the same statement as the
+        insert, so concurrent mentions cannot exceed the daily limit.
+
+        Returns:
+            True if the nomination was recorded.
+
+        """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO nominations (nominator_fid, nominee_fid, post_hash, timestamp)
-                VALUES (?, ?, ?, ?)
-            """, (nominator_fid, nominee_fid, post_hash, timestamp))
-            self.conn.commit()
+            with self.transaction() as conn:
+                epoch_ms = nomination_epoch_ms(timestamp)
+                day = day_bucket(epoch_ms)
+                cursor = conn.execute(
+                    f"""
+                    INSERT INTO nominations (nominator_fid, nominee_fid, post_hash, timestamp, timestamp_ms, day)
+                    SELECT ?, ?, ?, ?, ?, ?
+                    WHERE {NOT_YET_NOMINATED} AND {WITHIN_NOMINATION_QUOTA}
+                """,
+                    (
+                        nominator_fid,
+                        nominee_fid,
+                        post_hash,
+                        timestamp,
+                        epoch_ms,
+                        day,
+                        nominator_fid,
+                        post_hash,
+                        nominator_fid,
+                        day,
+                        self.nomination_limit,
+                    ),
+                )
+                if cursor.rowcount == 0:
+                    if conn.execute(
+                        "SELECT 1 FROM nomination_keys WHERE nominator_fid = ? AND post_hash = ?",
+                        (nominator_fid, post_hash),
+                    ).fetchone():
+                        print(f"Nomination of {post_hash} by {nominator_fid} was already recorded")
+                    else:
+                        print(f"Nomination quota reached for {nominator_fid} on day {day}")
+                    return False
+                self._notify_scores(conn, [nominee_fid])
+                return True
         except sqlite3.IntegrityError as e:
             print(f"Failed to record nomination: {e}")
             # Consider logging the error or raising the exception
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             # Consider logging the error
-        finally:
-            self.close()
+        return False
+
+    def remaining_nominations(
+        self, nominator_fids: Iterable[int], day: int | None = None
+    ) -> dict[int, int]:
+        """Return how many more nominations each user may make on a campaign day.
+
+        Args:
+            nominator_fids: The users to look up.
+            day: The campaign day. Defaults to today (UTC).
 
-    def get_daily_leader(self):
         """
-        Retrieves the current "Based Creator of the Day" post from the database.
+        if day is None:
+            day = current_day()
+        return {
+            fid: remaining
+            for (fid, _), remaining in self._remaining_quotas(
+                [(fid, day) for fid in nominator_fids]
+            ).items()
+        }
+
+    def check_nomination_quotas(self, nominations: Iterable[dict[str, Any]]) -> list[bool]:
+        """Validate a batch of nominations against the daily quotas with a single lookup.
+
+        Nominations are taken in order, so earlier ones in the batch use up quota before
+        later ones by the same nominator on the same day. Nominations that would not be
+        recorded anyway are rejected without using up quota: self-nominations and
+        nominations of a post the nominator already nominated, before or earlier in the batch.
+
+        Args:
+            nominations: Dictionaries with `nominator_fid` and `timestamp` keys, and
+                optionally `nominee_fid` and `post_hash`.
+
+        Returns:
+            One flag per nomination, True if it fits within the nominator's quota.
+
         """
-        self.connect()
+        nominations = list(nominations)
+        keys = [
+            (nomination["nominator_fid"], day_bucket(nomination_epoch_ms(nomination["timestamp"])))
+            for nomination in nominations
+        ]
+        remaining = self._remaining_quotas(keys)
+        seen = self._recorded_nomination_keys(
+            [
+                (nomination["nominator_fid"], nomination["post_hash"])
+                for nomination in nominations
+                if nomination.get("post_hash") is not None
+            ]
+        )
+        allowed = []
+        for nomination, key in zip(nominations, keys, strict=True):
+            nomination_key = (nomination["nominator_fid"], nomination.get("post_hash"))
+            if (
+                nomination.get("nominee_fid") == nomination["nominator_fid"]
+                or nomination_key in seen
+            ):
+                allowed.append(False)
+                continue
+            allowed.append(remaining.get(key, 0) > 0)
+            if allowed[-1]:
+                remaining[key] -= 1
+                if nomination_key[1] is not None:
+                    seen.add(nomination_key)
+        return allowed
+
+    def _recorded_nomination_keys(self, keys: list[tuple[int, str]]) -> set:
+        """Return which `(nominator_fid, post_hash)` keys were ever nominated, archived or not."""
+        unique_keys = list(dict.fromkeys(keys))
+        recorded = set()
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                SELECT p.* 
-                FROM posts p
-                JOIN based_creator_of_day b ON p.fid = b.fid
-                WHERE b.date = DATE('now')
-                ORDER BY p.likes DESC
-                LIMIT 1
-            """)
-            result = cursor.fetchone()
-            if result:
-                return {
-                    "hash": result[0],
-                    "fid": result[1],
-                    "username": result[2],
-                    "text": result[3],
-                    "likes": result[4],
-                    "timestamp": result[5]
-                }
+            with self.connection() as conn:
+                # Two parameters per key, so chunks stay under the variable limit.
+                step = MAX_QUERY_PARAMS // 2
+                for start in range(0, len(unique_keys), step):
+                    chunk = unique_keys[start : start + step]
+                    values = ", ".join("(?, ?)" for _ in chunk)
+                    rows = conn.execute(
+                        f"""
+                        WITH requested (nominator_fid, post_hash) AS (VALUES {values})
+                        SELECT k.nominator_fid, k.post_hash
+                        FROM requested AS r
+                        JOIN nomination_keys AS k
+                            ON k.nominator_fid = r.nominator_fid AND k.post_hash = r.post_hash
+                        """,
+                        [param for key in chunk for param in key],
+                    ).fetchall()
+                    recorded.update(rows)
         except sqlite3.Error as e:
-            print(f"An error occurred while retrieving daily leader: {e}")
+            print(f"An error occurred while checking recorded nominations: {e}")
             # Consider logging the error
-        finally:
-            self.close()
-        return None
+        return recorded
 
-    def mark_based_creator_of_the_day(self, fid: int):
-        """Marks the given user as the 'Based Creator of the Day'."""
-        self.connect()
+    def _remaining_quotas(self, keys: list[tuple[int, int]]) -> dict[tuple[int, int], int]:
+        """Return the nominations left for each `(nominator_fid, day)` key."""
+        unique_keys = list(dict.fromkeys(key for key in keys if key[1] is not None))
+        remaining = {}
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("INSERT INTO based_creator_of_day (fid, date) VALUES (?, DATE('now'))", (fid,))
-            self.conn.commit()
-        except sqlite3.IntegrityError as e:
-            print(f"Failed to mark based creator of the day: {e}")
-            # Consider logging the error
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
+            with self.connection() as conn:
+                # Two parameters per key, so chunks stay under the variable limit.
+                step = MAX_QUERY_PARAMS // 2
+                for start in range(0, len(unique_keys), step):
+                    chunk = unique_keys[start : start + step]
+                    values = ", ".join("(?, ?)" for _ in chunk)
+                    rows = conn.execute(
+                        f"""
+                        WITH requested (nominator_fid, day) AS (VALUES {values})
+                        SELECT r.nominator_fid, r.day, ? - COALESCE(q.count, 0)
+                        FROM requested AS r
+                        LEFT JOIN nomination_quotas AS q
+                            ON q.nominator_fid = r.nominator_fid AND q.day = r.day
+                        """,
+                        [param for key in chunk for param in key] + [self.nomination_limit],
+                    ).fetchall()
+                    remaining.update(((fid, day), max(left, 0)) for fid, day, left in rows)
+        except sqlite3.Error as e:
+            print(f"An error occurred while checking nomination quotas: {e}")
             # Consider logging the error
-        finally:
-            self.close()
-            
-    def get_leaderboard(self) -> List[dict]:
+        return remaining
+
+    def upsert_users_bulk(self, users: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Insert or rename many users in a single transaction.
+
+        Args:
+            users: Dictionaries with `fid` and `username` keys, e.g. Farcaster `User` objects.
+
+        Returns:
+            Counts of rows inserted, updated (username changed) and skipped (invalid,
+            unchanged or conflicting with another user's username).
+
         """
-        Retrieves the leaderboard data from the database.
+        users = list(users)
+        rows = [
+            (user["fid"], user["username"])
+            for user in users
+            if isinstance(user.get("fid"), int)
+            and self.is_valid_username(user.get("username") or "")
+        ]
+        try:
+            with self.transaction() as conn:
+                existing = self._existing_keys(conn, "users", "fid", [row[0] for row in rows])
+                cursor = conn.executemany(
+                    """
+                    INSERT INTO users (fid, username) VALUES (?, ?)
+                    ON CONFLICT (fid) DO UPDATE SET username = excluded.username
+                        WHERE username IS NOT excluded.username
+                            AND NOT EXISTS (SELECT 1 FROM users AS other WHERE other.username = excluded.username)
+                    ON CONFLICT DO NOTHING
+                    """,
+                    rows,
+                )
+                inserted = len(
+                    self._existing_keys(conn, "users", "fid", [row[0] for row in rows]) - existing
+                )
+                if cursor.rowcount > inserted:
+                    # Renamed creators keep their score; the listeners need their new name.
+                    self._notify_scores(conn, [row[0] for row in rows if row[0] in existing])
+                self._cache_invalidate(self.user_cache, [row[0] for row in rows])
+                return self._bulk_result(len(users), inserted, cursor.rowcount)
+        except sqlite3.Error as e:
+            print(f"An error occurred while upserting users: {e}")
+            # Consider logging the error
+            return BulkWriteResult(inserted=0, updated=0, skipped=len(users), failed=True)
+
+    def create_posts_bulk(self, posts: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Insert many posts in a single transaction, refreshing likes on posts already stored.
+
+        Args:
+            posts: Dictionaries with the `create_post` fields: `fid`, `username`, `text`,
+                `likes`, `timestamp` and `hash`.
+
+        Returns:
+            Counts of rows inserted, updated (likes changed) and skipped (unchanged, or
+            authored by a user that is not in the database).
+
         """
-        self.connect()
+        posts = list(posts)
+        rows = []
+        for post in posts:
+            epoch_ms = to_epoch_ms(post["timestamp"])
+            rows.append(
+                (
+                    post["fid"],
+                    post["username"],
+                    post["text"],
+                    post["likes"],
+                    post["timestamp"],
+                    post["hash"],
+                    epoch_ms,
+                    day_bucket(epoch_ms),
+                    post["fid"],
+                )
+            )
         try:
-            cursor = self.conn.cursor()
+            with self.transaction() as conn:
+                existing = self._existing_keys(conn, "posts", "hash", [row[5] for row in rows])
+                cursor = conn.executemany(
+                    """
+                    INSERT INTO posts (fid, username, text, likes, timestamp, hash, timestamp_ms, day)
+                    SELECT ?, ?, ?, ?, ?, ?, ?, ?
+                    WHERE EXISTS (SELECT 1 FROM users WHERE fid = ?)
+                    ON CONFLICT (hash) DO UPDATE SET likes = excluded.likes
+                        WHERE likes IS NOT excluded.likes
+                    """,
+                    rows,
+                )
+                inserted = len(
+                    self._existing_keys(conn, "posts", "hash", [row[5] for row in rows]) - existing
+                )
+                self._cache_invalidate(self.post_cache, [row[5] for row in rows])
+                return self._bulk_result(len(posts), inserted, cursor.rowcount)
+        except sqlite3.Error as e:
+            print(f"An error occurred while creating posts: {e}")
+            # Consider logging the error
+            return BulkWriteResult(inserted=0, updated=0, skipped=len(posts), failed=True)
 
-            cursor.execute(
-                """
-                SELECT username, COUNT(nominee_fid) as points
-                FROM nominations
-                LEFT JOIN users ON users.fid = nominee_fid
-                GROUP BY username
-                ORDER BY points DESC
-                LIMIT 10
-            """
+    def record_nominations_bulk(self, nominations: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Record many nominations in a single transaction.
+
+        Args:
+            nominations: Dictionaries with the `record_nomination` fields: `nominator_fid`,
+                `nominee_fid`, `post_hash` and `timestamp`.
+
+        Returns:
+            Counts of rows inserted and skipped (duplicates, including of archived
+            nominations, over the nominator's daily quota, or referencing users or posts
+            that are not in the database). Nominations are never updated.
+
+        """
+        nominations = list(nominations)
+        rows = []
+        for nomination in nominations:
+            epoch_ms = nomination_epoch_ms(nomination["timestamp"])
+            rows.append(
+                (
+                    nomination["nominator_fid"],
+                    nomination["nominee_fid"],
+                    nomination["post_hash"],
+                    nomination["timestamp"],
+                    epoch_ms,
+                    day_bucket(epoch_ms),
+                    nomination["nominator_fid"],
+                    nomination["nominee_fid"],
+                    nomination["post_hash"],
+                    nomination["nominator_fid"],
+                    nomination["post_hash"],
+                    nomination["nominator_fid"],
+                    day_bucket(epoch_ms),
+                    self.nomination_limit,
+                )
             )
-            results = cursor.fetchall()
+        try:
+            with self.transaction() as conn:
+                cursor = conn.executemany(
+                    f"""
+                    INSERT INTO nominations (nominator_fid, nominee_fid, post_hash, timestamp, timestamp_ms, day)
+                    SELECT ?, ?, ?, ?, ?, ?
+                    WHERE EXISTS (SELECT 1 FROM users WHERE fid = ?)
+                        AND EXISTS (SELECT 1 FROM users WHERE fid = ?)
+                        AND EXISTS (SELECT 1 FROM posts WHERE hash = ?)
+                        AND {NOT_YET_NOMINATED}
+                        AND {WITHIN_NOMINATION_QUOTA}
+                    ON CONFLICT (nominator_fid, post_hash) DO NOTHING
+                    """,
+                    rows,
+                )
+                if cursor.rowcount:
+                    self._notify_scores(conn, [row[1] for row in rows])
+                return self._bulk_result(len(nominations), cursor.rowcount, cursor.rowcount)
+        except sqlite3.Error as e:
+            print(f"An error occurred while recording nominations: {e}")
+            # Consider logging the error
+            return BulkWriteResult(inserted=0, updated=0, skipped=len(nominations), failed=True)
+
+    def _existing_keys(
+        self, conn: sqlite3.Connection, table: str, column: str, keys: list[Any]
+    ) -> set:
+        """Return which of `keys` are already present in `table.column`."""
+        unique_keys = list(dict.fromkeys(keys))
+        existing = set()
+        for start in range(0, len(unique_keys), MAX_QUERY_PARAMS):
+            chunk = unique_keys[start : start + MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})", chunk
+            ).fetchall()
+            existing.update(row[0] for row in rows)
+        return existing
+
+    def _bulk_result(self, total: int, inserted: int, changed: int) -> BulkWriteResult:
+        """Build a BulkWriteResult from the input size, new rows and total rows changed."""
+        return BulkWriteResult(
+            inserted=inserted, updated=changed - inserted, skipped=total - changed
+        )
+
+    def get_daily_leader(self, day: int | None = None) -> PostRow | None:
+        """Retrieve the "Based Creator of the Day" post from the database.
+
+        Args:
+            day: The campaign day to look up. Defaults to today (UTC).
+
+        """
+        if day is None:
+            day = current_day()
+        try:
+            with self.connection() as conn:
+                source = self._posts_source(conn, self._archive_months(conn, day, day))
+                query = DAILY_LEADER_TEMPLATE.format(posts=source)
+                return _query(conn, _post_row, query, (day, day_to_date(day))).fetchone()
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving daily leader: {e}")
+            # Consider logging the error
+        return None
+
+    def mark_based_creator_of_the_day(self, fid: int) -> bool:
+        """Make the given user today's 'Based Creator of the Day', replacing an earlier leader.
+
+        Returns:
+            True if the user became the leader; False if they already were or on error.
+
+        """
+        try:
+            with self.transaction() as conn:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO based_creator_of_day (fid, date) VALUES (?, DATE('now'))
+                    ON CONFLICT (date) DO UPDATE SET fid = excluded.fid, revision = revision + 1
+                        WHERE fid IS NOT excluded.fid
+                    """,
+                    (fid,),
+                )
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Failed to mark based creator of the day: {e}")
+            # Consider logging the error
+            return False
+
+    def get_leaderboard(
+        self, window: str = "all", limit: int = 10, offset: int = 0, day: int | None = None
+    ) -> list[dict]:
+        """Retrieve the leaderboard data from the database.
+
+        Args:
+            window: "all" for all-time points, or "day", "week" or "season" for the points
+                earned in that window.
+            limit: The maximum number of creators to return.
+            offset: How many top creators to skip, for paging.
+            day: A campaign day inside the window to show. Defaults to today (UTC).
+
+        Returns:
+            A list of dictionaries with `username` and `points`, highest points first.
+
+        Raises:
+            ValueError: If `window` is not one of LEADERBOARD_WINDOWS.
+
+        """
+        if window not in LEADERBOARD_WINDOWS:
+            raise ValueError(f"Invalid leaderboard window: {window}")
+        if day is None:
+            day = current_day()
+        try:
+            with self.connection() as conn:
+                if window == "all":
+                    results = conn.execute(LEADERBOARD_QUERY, (limit, offset)).fetchall()
+                else:
+                    bucket = self._window_bucket(conn, window, day)
+                    if bucket is None:
+                        return []
+                    results = conn.execute(
+                        WINDOW_LEADERBOARD_QUERY, (window, bucket, limit, offset)
+                    ).fetchall()
 
             leaderboard = []
             for result in results:
@@ -263,63 +1789,611 @@ class Database:
             print(f"An error occurred while retrieving leaderboard data: {e}")
             # Consider logging the error
             return []  # Return an empty list in case of error
-        finally:
-            self.close()
-
-    def is_valid_username(self, username: str) -> bool:
-        """Checks if a username is valid according to Farcaster rules."""
-        return bool(re.fullmatch(r"[a-z0-9]([a-z0-9-]{0,14}[a-z0-9])?", username))
-    
-    def format_leaderboard(self, leaderboard_data: List[dict]) -> str:
-        """Formats the leaderboard data into a string for display."""
-        leaderboard_string = "🏆 Top Creators Leaderboard (Based on Nominations):\n\n"
-        for i, creator in enumerate(leaderboard_data):
-            leaderboard_string += f"{i+1}. @{creator['username']} - {creator['points']} points\n"
-        leaderboard_string += f"\nNominate your favorite creators by tagging @{os.getenv('THEO_FARCASTER_USERNAME')} in the comments of their posts!"
-        return leaderboard_string
-    
-    def get_most_liked_posts(self, start_time: str, limit: int = 3) -> List[dict]:
-        """
-        Retrieves the most liked posts created after a specific time, limited to a certain number.
+
+    def get_scores(self) -> list[ScoreRow]:
+        """Retrieve every creator's all-time score, for building an in-memory leaderboard.
+
+        Returns:
+            A list of `ScoreRow`s in no particular order.
+
+        """
+        try:
+            with self.connection() as conn:
+                return _query(conn, _score_row, SCORES_QUERY).fetchall()
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving scores: {e}")
+            # Consider logging the error
+            return []
+
+    def iter_scores(self) -> Iterator[ScoreRow]:
+        """Yield every creator's all-time score, in no particular order.
+
+        Rows are read from SQLite as the iterator is consumed. Like `iter_most_liked_posts`,
+        it must be consumed on the calling thread.
+        """
+        try:
+            with self.connection() as conn:
+                yield from _query(conn, _score_row, SCORES_QUERY)
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving scores: {e}")
+            # Consider logging the error
+
+    def get_points(self, fid: int) -> int:
+        """Return a user's total points from the scoring engine's ledger."""
+        try:
+            with self.connection() as conn:
+                result = conn.execute(
+                    "SELECT points FROM point_totals WHERE fid = ?", (fid,)
+                ).fetchone()
+            return result[0] if result else 0
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving points: {e}")
+            return 0
+
+    def get_points_leaderboard(self, limit: int = 10, offset: int = 0) -> list[dict]:
+        """Retrieve the top users by total points across every scoring rule.
+
+        Returns:
+            A list of dictionaries with `username` and `points`, highest points first.
+
+        """
+        try:
+            with self.connection() as conn:
+                results = conn.execute(POINTS_LEADERBOARD_QUERY, (limit, offset)).fetchall()
+            return [{"username": result[0], "points": result[1]} for result in results]
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving the points leaderboard: {e}")
+            return []
+
+    def _window_bucket(self, conn: sqlite3.Connection, window: str, day: int) -> int | None:
+        """Return the score_rollups bucket of the window containing `day`."""
+        if window == "day":
+            return day
+        if window == "week":
+            return week_bucket(day)
+        season = conn.execute(
+            "SELECT id FROM seasons WHERE ? BETWEEN start_day AND end_day ORDER BY start_day DESC LIMIT 1",
+            (day,),
+        ).fetchone()
+        return season[0] if season else None
+
+    def define_season(self, name: str, start_day: int, end_day: int):
+        """Define a leaderboard season covering campaign days `start_day` to `end_day` inclusive.
+
+        Nominations already recorded in that range are rolled up immediately; later ones are
+        added as they arrive.
+        """
+        try:
+            with self.transaction() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO seasons (name, start_day, end_day) VALUES (?, ?, ?)",
+                    (name, start_day, end_day),
+                )
+                # Built from the daily rollups, which outlive archived nominations.
+                conn.execute(
+                    """
+                    INSERT INTO score_rollups (period, bucket, fid, points)
+                    SELECT 'season', ?, fid, SUM(points)
+                    FROM score_rollups
+                    WHERE period = 'day' AND bucket BETWEEN ? AND ?
+                    GROUP BY fid
+                    """,
+                    (cursor.lastrowid, start_day, end_day),
+                )
+        except sqlite3.IntegrityError as e:
+            print(f"Failed to define season: {e}")
+            # Consider logging the error
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+            # Consider logging the error
+
+    def get_most_liked_posts(
+        self, start_time: Timestamp, limit: int = 3, end_time: Timestamp | None = None
+    ) -> list[PostRow]:
+        """Retrieve the most liked posts created in a time window, limited to a certain number.
+
+        Args:
+            start_time: The timestamp for the earliest posts to retrieve (inclusive).
+            limit: The maximum number of posts to return.
+            end_time: The timestamp the window ends at (exclusive). Defaults to no end.
+
+        Returns:
+            The posts, most liked first. Windows reaching back into archived days include
+            the archived posts.
+
+        """
+        return list(self.iter_most_liked_posts(start_time, limit, end_time))
+
+    def iter_most_liked_posts(
+        self, start_time: Timestamp, limit: int | None = None, end_time: Timestamp | None = None
+    ) -> Iterator[PostRow]:
+        """Yield the posts created in a time window, most liked first.
+
+        Rows are read from SQLite as the iterator is consumed, so long windows can be
+        exported without holding every post in memory, unless the window spans more than
+        MAX_ATTACHED_ARCHIVES archived months; then each group of archives is read in turn
+        and merged. The iterator uses the calling thread's connection and must be consumed
+        on that thread.
+
+        Args:
+            start_time: The timestamp for the earliest posts to yield (inclusive).
+            limit: The maximum number of posts to yield. Defaults to all of them.
+            end_time: The timestamp the window ends at (exclusive). Defaults to no end.
+
+        """
+        start_ms = to_epoch_ms(start_time)
+        end_ms = to_epoch_ms(end_time) if end_time is not None else 2**63 - 1
+        params = (start_ms, end_ms, -1 if limit is None else limit)
+        try:
+            with self.connection() as conn:
+                months = self._archive_months(conn, day_bucket(start_ms), day_bucket(end_ms))
+                if len(months) <= MAX_ATTACHED_ARCHIVES:
+                    query = MOST_LIKED_POSTS_TEMPLATE.format(posts=self._posts_source(conn, months))
+                    yield from _query(conn, _post_row, query, params)
+                    return
+                # Too many archives to attach at once: read each chunk's top posts, then merge.
+                chunks = [
+                    _query(
+                        conn, _post_row, MOST_LIKED_POSTS_TEMPLATE.format(posts=source), params
+                    ).fetchall()
+                    for source in self._posts_source_chunks(
+                        conn, day_bucket(start_ms), day_bucket(end_ms)
+                    )
+                ]
+                merged = heapq.merge(
+                    *chunks, key=lambda post: (post.likes is None, -(post.likes or 0))
+                )
+                yield from itertools.islice(merged, limit)
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving most liked posts: {e}")
+            # Consider logging the error
+
+    def get_post_hashes_for_day(self, day: int | None = None) -> list[str]:
+        """Return the hashes of the posts created on a campaign day, defaulting to today (UTC)."""
+        if day is None:
+            day = current_day()
+        try:
+            with self.connection() as conn:
+                return [
+                    row[0] for row in conn.execute("SELECT hash FROM posts WHERE day = ?", (day,))
+                ]
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving post hashes: {e}")
+            # Consider logging the error
+            return []
+
+    def record_likes_bulk(
+        self, likes: dict[str, int], sampled_at: Timestamp | None = None
+    ) -> BulkWriteResult:
+        """Store freshly fetched like counts for many posts in a single transaction.
+
+        Each post's `likes` column is brought up to date, and a post_likes_history sample
+        is written when the count differs from the post's previous sample.
 
         Args:
-            start_time: The timestamp for the earliest posts to retrieve.
+            likes: Like counts keyed by post hash. Unknown hashes are skipped.
+            sampled_at: When the counts were fetched. Defaults to now.
+
+        Returns:
+            Counts of posts updated (likes changed) and skipped (unchanged or unknown).
+
+        """
+        sampled_ms = to_epoch_ms(sampled_at) if sampled_at is not None else int(time.time() * 1000)
+        try:
+            with self.transaction() as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO post_likes_history (post_hash, sampled_ms, likes)
+                    SELECT hash, ?, ?
+                    FROM posts
+                    WHERE hash = ? AND ? IS NOT (
+                        SELECT h.likes FROM post_likes_history AS h
+                        WHERE h.post_hash = posts.hash
+                        ORDER BY h.sampled_ms DESC LIMIT 1
+                    )
+                    ON CONFLICT (post_hash, sampled_ms) DO UPDATE SET likes = excluded.likes
+                    """,
+                    [(sampled_ms, count, hash, count) for hash, count in likes.items()],
+                )
+                cursor = conn.executemany(
+                    "UPDATE posts SET likes = ? WHERE hash = ? AND likes IS NOT ?",
+                    [(count, hash, count) for hash, count in likes.items()],
+                )
+                self._cache_invalidate(self.post_cache, likes)
+                return self._bulk_result(len(likes), 0, cursor.rowcount)
+        except sqlite3.Error as e:
+            print(f"An error occurred while recording likes: {e}")
+            # Consider logging the error
+            return BulkWriteResult(inserted=0, updated=0, skipped=len(likes), failed=True)
+
+    def get_like_velocity(
+        self,
+        day: int | None = None,
+        window_ms: int = 3_600_000,
+        limit: int = 10,
+        now: Timestamp | None = None,
+    ) -> list[dict]:
+        """Retrieve a day's posts ranked by how many likes they gained recently.
+
+        Args:
+            day: The campaign day whose posts to rank. Defaults to today (UTC).
+            window_ms: How far back to measure, in milliseconds. Defaults to one hour.
             limit: The maximum number of posts to return.
+            now: The end of the window. Defaults to now.
 
         Returns:
-            A list of dictionaries, each representing a post.
+            A list of dictionaries with `hash`, `fid`, `username`, `likes`, `gained` and
+            `likes_per_hour`, fastest-growing first.
+
         """
-        self.connect()
+        if day is None:
+            day = current_day()
+        now_ms = to_epoch_ms(now) if now is not None else int(time.time() * 1000)
+        start_ms = now_ms - window_ms
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT *
-                FROM posts
-                WHERE timestamp >= ?
-                ORDER BY likes DESC
-                LIMIT ?
-                """,
-                (start_time, limit),
-            )
-            results = cursor.fetchall()
+            with self.connection() as conn:
+                results = conn.execute(
+                    LIKE_VELOCITY_QUERY, (now_ms, start_ms, start_ms, start_ms, day, limit)
+                ).fetchall()
+            return [
+                {
+                    "hash": result[0],
+                    "fid": result[1],
+                    "username": result[2],
+                    "likes": result[3],
+                    "gained": result[4],
+                    "likes_per_hour": result[4] * 3_600_000 / window_ms,
+                }
+                for result in results
+            ]
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving like velocity: {e}")
+            # Consider logging the error
+            return []
 
-            posts = []
-            for result in results:
-                posts.append(
-                    {
-                        "hash": result[0],
-                        "fid": result[1],
-                        "username": result[2],
-                        "text": result[3],
-                        "likes": result[4],
-                        "timestamp": result[5],
-                    }
+    def archived_before_day(self) -> int:
+        """Return the first campaign day still kept in the main database file."""
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT archived_before_day FROM archive_state WHERE id = 1"
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_high_water_mark(self, feed: str) -> HighWaterMark | None:
+        """Return the newest cast ingested from a feed, or None if it was never polled."""
+        try:
+            with self.connection() as conn:
+                row = conn.execute(
+                    "SELECT hash, timestamp FROM feed_marks WHERE feed = ?", (feed,)
+                ).fetchone()
+            if row:
+                return HighWaterMark(hash=row[0], timestamp=row[1])
+        except sqlite3.Error as e:
+            print(f"An error occurred while retrieving high-water mark: {e}")
+            # Consider logging the error
+        return None
+
+    def set_high_water_mark(self, feed: str, hash: str, timestamp: Timestamp):
+        """Record the newest cast ingested from a feed. A mark never moves back in time."""
+        try:
+            with self.transaction() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO feed_marks (feed, hash, timestamp, timestamp_ms) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (feed) DO UPDATE SET
+                        hash = excluded.hash,
+                        timestamp = excluded.timestamp,
+                        timestamp_ms = excluded.timestamp_ms
+                    WHERE excluded.timestamp_ms >= feed_marks.timestamp_ms
+                    """,
+                    (feed, hash, str(timestamp), to_epoch_ms(timestamp)),
+                )
+        except sqlite3.Error as e:
+            print(f"An error occurred while recording high-water mark: {e}")
+            # Consider logging the error
+
+    def archive_path(self, month: str) -> str:
+        """Return the file holding the archived rows of a `YYYY-MM` month."""
+        return f"{os.path.splitext(self.db_name)[0]}.archive-{month}.db"
+
+    def archive_paths(self) -> list[str]:
+        """Return the archive files that exist for this database, oldest month first."""
+        return _archive_files(self.db_name)
+
+    def archive_closed_days(
+        self, keep_days: int = HOT_DAYS, today: int | None = None
+    ) -> dict[str, int]:
+        """Move the rows of closed campaign days into per-month archive files.
+
+        Posts, nominations and likes history move to archive files next to the main
+        database, keeping the main file small.
+
+        Posts still nominated by a nomination in the main file stay there until that
+        nomination is archived too. Scores, rollups, the points ledger and the nomination
+        keys stay in the main file, so leaderboards are unaffected and a replayed archived
+        nomination is still rejected; full-text search only covers the main file.
+
+        Args:
+            keep_days: How many closed days to keep in the main file besides today.
+            today: The current campaign day. Defaults to today (UTC).
+
+        Returns:
+            The number of rows moved per table.
+
+        """
+        moved = dict.fromkeys(ARCHIVED_TABLES, 0)
+        if self.db_name == ":memory:":
+            print("In-memory databases cannot be archived.")
+            return moved
+        cutoff = (current_day() if today is None else today) - keep_days
+        try:
+            with self.transaction() as conn:
+                # Raised first so a replay never rebuilds days that are about to be moved.
+                conn.execute(
+                    "UPDATE archive_state SET archived_before_day = MAX(archived_before_day, ?) WHERE id = 1",
+                    (cutoff,),
                 )
-            return posts
+            with self.connection() as conn:
+                days = conn.execute(
+                    """
+                    SELECT day FROM nominations WHERE day < ?
+                    UNION
+                    SELECT day FROM posts WHERE day < ?
+                    """,
+                    (cutoff, cutoff),
+                ).fetchall()
+            months = sorted({month_of_day(row[0]) for row in days})
 
+            # Nominations first: a post can only move once no hot nomination refers to it.
+            for month in months:
+                first, last = month_day_range(month)
+                with self.connection() as conn:
+                    alias = self._attach_archives(conn, [month], create=True)[0]
+                with self.transaction() as conn:
+                    moved["nominations"] += self._move_rows(
+                        conn,
+                        alias,
+                        "nominations",
+                        "day BETWEEN ? AND ? AND day < ?",
+                        (first, last, cutoff),
+                    )
+            for month in months:
+                first, last = month_day_range(month)
+                with self.connection() as conn:
+                    alias = self._attach_archives(conn, [month], create=True)[0]
+                with self.transaction() as conn:
+                    params = (first, last, cutoff)
+                    moved["post_likes_history"] += self._move_rows(
+                        conn,
+                        alias,
+                        "post_likes_history",
+                        f"post_hash IN ({ARCHIVABLE_POSTS_QUERY})",
+                        params,
+                    )
+                    moved["posts"] += self._move_rows(
+                        conn, alias, "posts", f"hash IN ({ARCHIVABLE_POSTS_QUERY})", params
+                    )
+            self.post_cache.clear()
         except sqlite3.Error as e:
-            print(f"An error occurred while retrieving most liked posts: {e}")
+            print(f"An error occurred while archiving closed days: {e}")
+            # Consider logging the error
+        return moved
+
+    def _move_rows(
+        self, conn: sqlite3.Connection, alias: str, table: str, where: str, params: tuple
+    ) -> int:
+        """Copy the matching rows of a main table into an archive, then delete them."""
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {alias}.{table} AS SELECT * FROM main.{table} WHERE 0"
+        )
+        # Unique keys make a retried move replace rows instead of duplicating them.
+        conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {alias}.ux_{table} ON {table} ({ARCHIVED_TABLES[table]})"
+        )
+        if table == "posts":
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {alias}.idx_posts_timestamp_ms_likes ON posts (timestamp_ms, likes)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {alias}.idx_posts_day_likes ON posts (day, likes)"
+            )
+        conn.execute(
+            f"INSERT OR REPLACE INTO {alias}.{table} SELECT * FROM main.{table} WHERE {where}",
+            params,
+        )
+        return conn.execute(f"DELETE FROM main.{table} WHERE {where}", params).rowcount
+
+    def _attach_archives(
+        self, conn: sqlite3.Connection, months: list[str], create: bool = False
+    ) -> list[str]:
+        """Attach the archive files of `months` to a connection and return their schema names.
+
+        Months without an archive file are skipped unless `create` is set. Archives attached
+        for earlier queries are detached to stay under the attachment limit. Inside a
+        transaction nothing can be attached, so only archives already attached are used.
+        """
+        attached = {row[1] for row in conn.execute("PRAGMA database_list")} - {"main", "temp"}
+        wanted = {}
+        for month in months:
+            alias = "archive_" + month.replace("-", "_")
+            if alias in attached or create or os.path.exists(self.archive_path(month)):
+                wanted[alias] = month
+        if self.pool.in_transaction():
+            return [alias for alias in wanted if alias in attached]
+        for alias in sorted(attached - set(wanted)):
+            if len(attached) + len(set(wanted) - attached) <= MAX_ATTACHED_ARCHIVES:
+                break
+            conn.execute(f"DETACH DATABASE {alias}")
+            attached.discard(alias)
+        for alias, month in wanted.items():
+            if alias not in attached:
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (self.archive_path(month),))
+        return list(wanted)
+
+    def _archive_months(self, conn: sqlite3.Connection, start_day: int, end_day: int) -> list[str]:
+        """Return the archived months covering the closed days of campaign days `start_day` to `end_day`."""
+        row = conn.execute("SELECT archived_before_day FROM archive_state WHERE id = 1").fetchone()
+        archived_before = row[0] if row else 0
+        months = []
+        if start_day >= archived_before:
+            return months
+        month = month_of_day(start_day)
+        last_month = month_of_day(min(end_day, archived_before - 1))
+        while month <= last_month:
+            months.append(month)
+            month = month_of_day(month_day_range(month)[1] + 1)
+        return months
+
+    def _posts_source(
+        self, conn: sqlite3.Connection, months: list[str], include_main: bool = True
+    ) -> str:
+        """Return the posts to query: the main table, the archives of `months`, or both.
+
+        At most MAX_ATTACHED_ARCHIVES months can be queried at once; see
+        `_posts_source_chunks`. An archived post that was stored again in the main table,
+        e.g. because it was nominated again, is only read from the main table.
+        """
+        aliases = [
+            alias
+            for alias in self._attach_archives(conn, months)
+            if conn.execute(f"SELECT 1 FROM {alias}.sqlite_master WHERE name = 'posts'").fetchone()
+        ]
+        if not aliases:
+            return "posts" if include_main else "(SELECT * FROM main.posts WHERE 0)"
+        branches = ["SELECT * FROM main.posts"] if include_main else []
+        branches += [
+            f"SELECT * FROM {alias}.posts AS a WHERE NOT EXISTS (SELECT 1 FROM main.posts AS hot WHERE hot.hash = a.hash)"
+            for alias in aliases
+        ]
+        return "(" + " UNION ALL ".join(branches) + ")"
+
+    def _posts_source_chunks(
+        self, conn: sqlite3.Connection, start_day: int, end_day: int
+    ) -> Iterator[str]:
+        """Yield `_posts_source`s covering campaign days `start_day` to `end_day`.
+
+        Each source stays within the attachment limit, and the first includes the main
+        table. Each source must be done with before the next is requested, since that may
+        detach its archives.
+        """
+        months = self._archive_months(conn, start_day, end_day)
+        for start in range(0, max(len(months), 1), MAX_ATTACHED_ARCHIVES):
+            yield self._posts_source(
+                conn, months[start : start + MAX_ATTACHED_ARCHIVES], include_main=start == 0
+            )
+
+    def search_posts(
+        self,
+        query: str | None = None,
+        phrase: str | None = None,
+        fid: int | None = None,
+        day: int | None = None,
+        limit: int = 20,
+    ) -> list[PostRow]:
+        """Search stored posts by text, creator and campaign day.
+
+        Args:
+            query: Words that must all appear in the post, in any order.
+            phrase: Words that must appear together in this order.
+            fid: Only return posts by this creator.
+            day: Only return posts from this campaign day.
+            limit: The maximum number of posts to return.
+
+        Returns:
+            Matching posts, best text match first, or newest first when no text is given.
+
+        """
+        terms = []
+        if query:
+            terms.extend(_fts_quote(word) for word in query.split())
+        if phrase:
+            terms.append(_fts_quote(phrase))
+
+        filters, params = [], []
+        if terms:
+            filters.append("posts_fts MATCH ?")
+            params.append(" ".join(terms))
+        if fid is not None:
+            filters.append("p.fid = ?")
+            params.append(fid)
+        if day is not None:
+            filters.append("p.day = ?")
+            params.append(day)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        if terms:
+            sql = f"""
+                SELECT p.hash, p.fid, p.username, p.text, p.likes, p.timestamp
+                FROM posts_fts
+                JOIN posts p ON p.rowid = posts_fts.rowid
+                {where}
+                ORDER BY posts_fts.rank
+                LIMIT ?
+            """
+        else:
+            sql = f"""
+                SELECT p.hash, p.fid, p.username, p.text, p.likes, p.timestamp
+                FROM posts p
+                {where}
+                ORDER BY p.timestamp_ms DESC
+                LIMIT ?
+            """
+        params.append(limit)
+
+        try:
+            with self.connection() as conn:
+                return _query(conn, _post_row, sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"An error occurred while searching posts: {e}")
             return []
-        finally:
-            self.close()
\ No newline at end of file
+
+    def export_chunks(
+        self, table: str, chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Iterator[list[tuple]]:
+        """Yield every row of a table in chunks, for exports; see utils/export.py.
+
+        Rows are read lazily, so only one chunk is held in memory at a time. The main file's
+        rows come from a single read and form a consistent snapshot. Posts and nominations
+        are followed by their archived rows, read straight from each archive file, so rows
+        archived while an export runs may appear twice.
+
+        Args:
+            table: "users", "posts", "nominations" or "scores" (all-time, highest first).
+            chunk_size: The maximum number of rows per chunk.
+
+        Yields:
+            Lists of row tuples with the columns listed in EXPORT_COLUMNS.
+
+        Raises:
+            ValueError: If `table` is not one of EXPORT_COLUMNS.
+
+        """
+        if table not in EXPORT_COLUMNS:
+            raise ValueError(f"Unknown export table: {table}")
+        if table == "scores":
+            sql = f"{SCORES_QUERY} ORDER BY s.points DESC, s.fid"
+        else:
+            sql = f"SELECT {', '.join(EXPORT_COLUMNS[table])} FROM {table}"
+
+        with self.connection() as conn:
+            yield from _fetch_chunks(conn.execute(sql), chunk_size)
+        if table not in ARCHIVED_TABLES:
+            return
+        for path in self.archive_paths():
+            archive = sqlite3.connect(Path(path).absolute().as_uri() + "?mode=ro", uri=True)
+            try:
+                if archive.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = ?", (table,)
+                ).fetchone():
+                    yield from _fetch_chunks(archive.execute(sql), chunk_size)
+            finally:
+                archive.close()
+
+    def rebuild_search_index(self):
+        """Rebuilds the full-text index from the posts table."""
+        try:
+            with self.transaction() as conn:
+                conn.execute("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')")
+        except sqlite3.Error as e:
+            print(f"An error occurred while rebuilding the search index: {e}")
+            # Consider logging the error
@@ -0,0 +1,232 @@
+"""Streaming export of THEO's campaign data, for handing to partners.
+
+Writes the users, posts, nominations and all-time scores of a `Database` to CSV, JSON Lines
+or Parquet files. Rows are read and written one chunk at a time and each chunk is flushed
+as soon as it is written, so memory use stays flat however large the tables grow. Parquet
+output needs the optional pyarrow package.
+
+Usage (from the agentkit_python directory):
+    python -m cdp_agentkit_core.utils.export --db theo_data.db --format csv --out-dir export
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sqlite3
+from collections.abc import Callable, Iterable
+from typing import IO, ClassVar
+
+from .database import DATABASE_NAME, EXPORT_CHUNK_SIZE, EXPORT_COLUMNS, Database
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_TABLES = tuple(EXPORT_COLUMNS)
+
+# Parquet column types by column name; every other column is written as a string.
+PARQUET_INT_COLUMNS = {
+    "fid",
+    "likes",
+    "timestamp_ms",
+    "day",
+    "id",
+    "nominator_fid",
+    "nominee_fid",
+    "points",
+}
+
+# Called as progress(table, rows_written) after each chunk.
+Progress = Callable[[str, int], None]
+
+
+class _CsvWriter:
+    open_args: ClassVar[dict[str, str]] = {"mode": "w", "newline": "", "encoding": "utf-8"}
+
+    def __init__(self, file: IO, columns: tuple[str, ...]):
+        self.file = file
+        self.writer = csv.writer(file)
+        self.writer.writerow(columns)
+
+    def write(self, rows: list[tuple]):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        pass
+
+
+class _JsonlWriter:
+    open_args: ClassVar[dict[str, str]] = {"mode": "w", "encoding": "utf-8"}
+
+    def __init__(self, file: IO, columns: tuple[str, ...]):
+        self.file = file
+        self.columns = columns
+
+    def write(self, rows: list[tuple]):
+        self.file.writelines(
+            json.dumps(dict(zip(self.columns, row, strict=True)), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+        self.file.flush()
+
+    def close(self):
+        pass
+
+
+class _ParquetWriter:
+    """Writes each chunk as one Parquet row group."""
+
+    open_args: ClassVar[dict[str, str]] = {"mode": "wb"}
+
+    def __init__(self, file: IO, columns: tuple[str, ...]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Parquet export needs pyarrow; install it with `pip install pyarrow`."
+            ) from e
+        self.pa = pa
+        self.schema = pa.schema(
+            [
+                (column, pa.int64() if column in PARQUET_INT_COLUMNS else pa.string())
+                for column in columns
+            ]
+        )
+        self.writer = pq.ParquetWriter(file, self.schema)
+
+    def write(self, rows: list[tuple]):
+        arrays = []
+        for index, field in enumerate(self.schema):
+            values = [row[index] for row in rows]
+            if field.name not in PARQUET_INT_COLUMNS:
+                # Timestamps are stored as text or as numbers, depending on where they came from.
+                values = [value if value is None else str(value) for value in values]
+            arrays.append(self.pa.array(values, type=field.type))
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        """Write the file footer; the file itself is closed by `export_table`."""
+        self.writer.close()
+
+
+WRITERS = {"csv": _CsvWriter, "jsonl": _JsonlWriter, "parquet": _ParquetWriter}
+
+
+def export_table(
+    db: Database,
+    table: str,
+    path: str,
+    fmt: str = "csv",
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    progress: Progress | None = None,
+) -> int:
+    """Streams one table to a file.
+
+    Args:
+        db: The database to read.
+        table: One of EXPORT_TABLES.
+        path: The file to write; an existing file is only replaced once the export succeeds.
+        fmt: One of EXPORT_FORMATS.
+        chunk_size: Rows read and written at a time.
+        progress: Optional callback told the running row count after each chunk.
+
+    Returns:
+        The number of rows written.
+
+    Raises:
+        ValueError: If `table` or `fmt` is unknown.
+        ImportError: If `fmt` is "parquet" and pyarrow is not installed.
+
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if table not in EXPORT_COLUMNS:
+        raise ValueError(f"Unknown export table: {table}")
+    writer_class = WRITERS[fmt]
+    # Written next to the target and renamed over it once complete, so a failed export
+    # never leaves a truncated file behind.
+    partial_path = f"{path}.partial"
+    written = 0
+    try:
+        with open(partial_path, **writer_class.open_args) as file:
+            writer = writer_class(file, EXPORT_COLUMNS[table])
+            for rows in db.export_chunks(table, chunk_size):
+                writer.write(rows)
+                written += len(rows)
+                if progress:
+                    progress(table, written)
+            writer.close()
+        os.replace(partial_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(partial_path)
+        raise
+    return written
+
+
+def export_all(
+    db: Database,
+    out_dir: str,
+    fmt: str = "csv",
+    tables: Iterable[str] = EXPORT_TABLES,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    progress: Progress | None = None,
+) -> dict[str, int]:
+    """Export several tables into `out_dir`, one `<table>.<fmt>` file each.
+
+    Returns:
+        The number of rows written per table.
+
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    return {
+        table: export_table(
+            db, table, os.path.join(out_dir, f"{table}.{fmt}"), fmt, chunk_size, progress
+        )
+        for table in tables
+    }
+
+
+def print_progress(table: str, written: int):
+    """Default progress reporter for the command line."""
+    print(f"Exporting {table}: {written} rows")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the export from the command line; returns the process exit code."""
+    parser = argparse.ArgumentParser(description="Export THEO's campaign data.")
+    parser.add_argument("--db", default=DATABASE_NAME, help="The SQLite database to export.")
+    parser.add_argument("--out-dir", default="export", help="Directory for the exported files.")
+    parser.add_argument(
+        "--format", choices=EXPORT_FORMATS, default="csv", help="Output file format."
+    )
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        choices=EXPORT_TABLES,
+        default=list(EXPORT_TABLES),
+        help="Tables to export.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows per chunk.")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"No database at {args.db}")
+    with Database(args.db) as db:
+        try:
+            counts = export_all(
+                db, args.out_dir, args.format, args.tables, args.chunk_size, print_progress
+            )
+        except (sqlite3.Error, ImportError) as e:
+            print(f"An error occurred during export: {e}")
+            return 1
+    for table, written in counts.items():
+        print(
+            f"{table}: {written} rows written to {os.path.join(args.out_dir, f'{table}.{args.format}')}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
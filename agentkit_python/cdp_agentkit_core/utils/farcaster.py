@@ -1,36 +1,73 @@
+import asyncio
 import os
-from typing import List, Optional, TypedDict, Dict, Any
-from dotenv import load_dotenv
-import requests
-import json
 import re
+from collections.abc import Awaitable, Callable, Iterable
+from itertools import takewhile
+from typing import Any, TypedDict
+
+from dotenv import load_dotenv
+
+from .database import to_epoch_ms
+from .http_client import HttpError, get_http_client
+from .profile_cache import MISS, ProfileCache
+from .storage import HighWaterMark
 
 # Load environment variables
 load_dotenv()
 
 # Use the Hub API URL for fetching user data by FID and potentially for get_cast
 HUB_API_URL = "https://hub-api.neynar.com"
+BULK_CASTS_LIMIT = 100  # Hashes per bulk cast lookup
+BULK_USERS_LIMIT = 100  # Fids per bulk user lookup
+BULK_CONCURRENCY = 4  # Chunks of a bulk lookup requested at once
+CATCH_UP_LIMIT = 1000  # New casts a poll walks through at most to reach its high-water mark
+
+_profile_cache: ProfileCache | None = None
+
+
+def get_profile_cache() -> ProfileCache:
+    """Return the process-wide cache of user profiles.
+
+    It is used by `fetch_user_data` and `fetch_users_bulk`. Set THEO_PROFILE_CACHE_PATH to
+    keep it on disk across restarts.
+    """
+    global _profile_cache
+    if _profile_cache is None:
+        _profile_cache = ProfileCache(path=os.getenv("THEO_PROFILE_CACHE_PATH"))
+    return _profile_cache
+
 
 class User(TypedDict):
+    """A Farcaster user as THEO stores it."""
+
     fid: int
     username: str
 
+
 class Cast(TypedDict):
+    """A cast as THEO stores it."""
+
     hash: str
     text: str
     timestamp: str
     author: User
-    reactions: Dict[str, Any]
-    mentions: List[User]
-    parent_hash: Optional[str]
+    reactions: dict[str, Any]
+    mentions: list[User]
+    parent_hash: str | None
+
 
 def is_valid_username(username: str) -> bool:
-    """Checks if a username is valid according to Farcaster rules."""
+    """Check if a username is valid according to Farcaster rules."""
     return bool(re.fullmatch(r"[a-z0-9]([a-z0-9-]{0,14}[a-z0-9])?", username))
 
-async def fetch_casts(neynar_api_key: str, channel_id: Optional[str] = None, keyword_filter: Optional[str] = None, limit: int = 100) -> List[Cast]:
-    """
-    Fetches casts from Farcaster, optionally filtering by channel ID and keywords.
+
+async def fetch_casts(
+    neynar_api_key: str,
+    channel_id: str | None = None,
+    keyword_filter: str | None = None,
+    limit: int = 100,
+) -> list[Cast]:
+    """Fetch casts from Farcaster, optionally filtering by channel ID and keywords.
 
     Args:
         neynar_api_key: The Neynar API key.
@@ -40,6 +77,47 @@ async def fetch_casts(neynar_api_key: str, channel_id: Optional[str] = None, key
 
     Returns:
         A list of casts.
+
+    """
+    casts, _ = await fetch_casts_since(
+        neynar_api_key, channel_id, keyword_filter=keyword_filter, limit=limit
+    )
+    return casts
+
+
+def _is_seen(cast: dict[str, Any], since: HighWaterMark, since_ms: int) -> bool:
+    """Whether a feed cast is the high-water mark or older than it."""
+    return cast["hash"] == since["hash"] or to_epoch_ms(cast["timestamp"]) < since_ms
+
+
+async def fetch_casts_since(
+    neynar_api_key: str,
+    channel_id: str | None = None,
+    since: HighWaterMark | None = None,
+    keyword_filter: str | None = None,
+    limit: int = 100,
+    catch_up_limit: int = CATCH_UP_LIMIT,
+) -> tuple[list[Cast], HighWaterMark | None]:
+    """Fetch the casts posted to a feed since its high-water mark, newest first.
+
+    The feed is paged from the newest cast and paging stops at the first cast already seen,
+    so a steady-state poll only fetches what is new. Without a mark, up to `limit` casts
+    matching the keyword filter are fetched, as by `fetch_casts`. With one, a poll after
+    downtime walks back through at most `catch_up_limit` casts; older unseen casts are
+    skipped and reported.
+
+    Args:
+        neynar_api_key: The Neynar API key.
+        channel_id: The ID of the channel to fetch casts from.
+        since: The feed's high-water mark from the previous poll, if any.
+        keyword_filter: Optional keyword to filter casts by.
+        limit: The number of casts to fetch when there is no mark.
+        catch_up_limit: The number of new casts to walk through at most when there is one.
+
+    Returns:
+        The new casts, and the feed's new high-water mark: the newest cast seen, whether or
+        not it matched the keyword filter. On errors, no casts and the unchanged mark.
+
     """
     headers = {
         "accept": "application/json",
@@ -47,45 +125,67 @@ async def fetch_casts(neynar_api_key: str, channel_id: Optional[str] = None, key
     }
 
     casts = []
+    newest = since
+    scanned = 0
+    since_ms = to_epoch_ms(since["timestamp"]) if since else None
     cursor = None  # For pagination
 
     try:
         while True:
+            page_size = min(limit if since is None else catch_up_limit, 100)
             if channel_id:
                 params = {
                     "feed_type": "filter",
                     "filter_type": "channel_id",
                     "channel_id": channel_id,
                     "with_recasts": "false",
-                    "limit": min(limit, 100),
-                    "cursor": cursor
+                    "limit": page_size,
+                    "cursor": cursor,
                 }
                 url = "https://api.neynar.com/v2/farcaster/feed"
             else:
-                params = {
-                    "with_recasts": "false",
-                    "limit": min(limit, 100),
-                    "cursor": cursor
-                }
+                params = {"with_recasts": "false", "limit": page_size, "cursor": cursor}
                 url = "https://api.neynar.com/v2/farcaster/casts"
 
             print(f"Fetching casts from: {url} with params: {params}")
 
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-
-            response_json = response.json()
+            response_json = await get_http_client().get_json(url, headers=headers, params=params)
             if response_json and response_json.get("casts"):
                 new_casts = response_json["casts"]
+                if cursor is None:
+                    newest = HighWaterMark(
+                        hash=new_casts[0]["hash"], timestamp=new_casts[0]["timestamp"]
+                    )
+
+                reached_mark = False
+                if since is not None:
+                    unseen = list(
+                        takewhile(lambda cast: not _is_seen(cast, since, since_ms), new_casts)
+                    )
+                    reached_mark = len(unseen) < len(new_casts)
+                    new_casts = unseen[: catch_up_limit - scanned]
+                scanned += len(new_casts)
+
                 if keyword_filter:
                     new_casts = [
-                        cast for cast in new_casts
-                        if keyword_filter.lower() in cast["text"].lower()
+                        cast for cast in new_casts if keyword_filter.lower() in cast["text"].lower()
                     ]
                 casts.extend(new_casts)
 
+                if reached_mark:
+                    break
+                if since is not None and scanned >= catch_up_limit:
+                    print(
+                        f"Stopped catching up after {scanned} casts without reaching the last cast seen "
+                        f"({since['hash']}); older casts were skipped."
+                    )
+                    break
                 # Check if we've reached the limit or if there are no more pages
-                if len(casts) >= limit or not response_json.get("next") or not response_json["next"].get("cursor"):
+                if (
+                    (since is None and len(casts) >= limit)
+                    or not response_json.get("next")
+                    or not response_json["next"].get("cursor")
+                ):
                     break
 
                 cursor = response_json["next"]["cursor"]
@@ -93,48 +193,219 @@ async def fetch_casts(neynar_api_key: str, channel_id: Optional[str] = None, key
                 print("No more casts found.")
                 break
 
-        cast_list = []
-        for cast in casts:
-            author_data = cast.get('author')
-            if author_data:
-                author = User(fid=author_data.get('fid'), username=author_data.get('username'))
-            else:
-                author = None
+        return [_cast_from_v2(cast) for cast in casts], newest
+
+    except HttpError as e:
+        print(f"HTTP error fetching casts: {e.status} - {e.text}")
+        return [], since
+    except Exception as e:
+        print(f"General error fetching casts: {e}")
+        return [], since
 
-            mentions_data = cast.get('mentions', [])
-            mentions = [User(fid=mention.get('fid'), username=mention.get('username')) for mention in mentions_data]
 
-            cast_obj = Cast(
-                hash=cast['hash'],
-                text=cast['text'],
-                timestamp=cast['timestamp'],
-                author=author,
-                reactions=cast.get('reactions'),
-                mentions=mentions,
-                parent_hash=cast.get('parent_hash')
-            )
-            cast_list.append(cast_obj)
+def _cast_from_v2(cast: dict[str, Any]) -> Cast:
+    """Build a Cast from a cast object of Neynar's v2 API."""
+    author_data = cast.get("author")
+    if author_data:
+        author = User(fid=author_data.get("fid"), username=author_data.get("username"))
+    else:
+        author = None
 
-        return cast_list
+    mentions_data = cast.get("mentions", [])
+    mentions = [
+        User(fid=mention.get("fid"), username=mention.get("username")) for mention in mentions_data
+    ]
+
+    return Cast(
+        hash=cast["hash"],
+        text=cast["text"],
+        timestamp=cast["timestamp"],
+        author=author,
+        reactions=cast.get("reactions"),
+        mentions=mentions,
+        parent_hash=cast.get("parent_hash"),
+    )
+
+
+def likes_count(reactions: dict[str, Any] | None) -> int:
+    """Read the like count from a cast's reactions, in either the v2 or the nested shape."""
+    if not reactions:
+        return 0
+    if "likes_count" in reactions:
+        return reactions["likes_count"]
+    return reactions.get("likes", {}).get("count", 0)
 
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error fetching casts: {e.response.status_code} - {e.response.text}")
-        return []
-    except Exception as e:
-        print(f"General error fetching casts: {e}")
-        return []
 
-async def fetch_mentions_for_fid(neynar_api_key: str, fid: int, limit: int = 100) -> List[Cast]:
+async def fetch_reaction_counts(neynar_api_key: str, cast_hashes: list[str]) -> dict[str, int]:
+    """Fetch the current like counts of many casts using the bulk casts endpoint.
+
+    Args:
+        neynar_api_key: The Neynar API key.
+        cast_hashes: The hashes of the casts to look up.
+
+    Returns:
+        Like counts keyed by cast hash. Casts that could not be fetched are left out.
+
+    """
+    casts = await get_casts_bulk(neynar_api_key, cast_hashes)
+    return {cast_hash: likes_count(cast["reactions"]) for cast_hash, cast in casts.items()}
+
+
+async def gather_bounded(
+    func: Callable[[Any], Awaitable[Any]], items: list[Any], limit: int
+) -> list[Any]:
+    """Awaits `func(item)` for every item, with at most `limit` calls in flight at once.
+
+    Returns:
+        The results in the order of `items`. A call that raised is returned as its exception
+        instead, so one failure does not lose the other results.
+
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+
+
+async def _bulk_get(
+    neynar_api_key: str,
+    url: str,
+    param: str,
+    keys: Iterable[Any],
+    chunk_size: int,
+    concurrency: int,
+    what: str,
+) -> list[tuple[list[Any], dict[str, Any]]]:
+    """Look up many keys on a bulk endpoint taking them comma-separated in `param`.
+
+    The keys are deduplicated and split into chunks of `chunk_size`, and up to `concurrency`
+    chunks are requested at once. Chunks that fail are reported and skipped.
+
+    Returns:
+        The keys of each chunk that succeeded, paired with its JSON response.
+
+    """
+    headers = {
+        "accept": "application/json",
+        "api_key": neynar_api_key,
+    }
+    keys = list(dict.fromkeys(keys))
+    chunks = [keys[start : start + chunk_size] for start in range(0, len(keys), chunk_size)]
+    results = await gather_bounded(
+        lambda chunk: get_http_client().get_json(
+            url, headers=headers, params={param: ",".join(str(key) for key in chunk)}
+        ),
+        chunks,
+        concurrency,
+    )
+
+    responses = []
+    for chunk, result in zip(chunks, results, strict=True):
+        if isinstance(result, HttpError):
+            print(f"HTTP error fetching {what}: {result.status} - {result.text}")
+        elif isinstance(result, BaseException):
+            print(f"General error fetching {what}: {result}")
+        elif result:
+            responses.append((chunk, result))
+    return responses
+
+
+async def get_casts_bulk(
+    neynar_api_key: str, cast_hashes: Iterable[str], concurrency: int = BULK_CONCURRENCY
+) -> dict[str, Cast]:
+    """Get many casts by hash, BULK_CASTS_LIMIT per request.
+
+    Args:
+        neynar_api_key: The Neynar API key.
+        cast_hashes: The hashes of the casts to get.
+        concurrency: How many requests to have in flight at once.
+
+    Returns:
+        Casts keyed by hash. Casts that were not found or could not be fetched are left out.
+
+    """
+    responses = await _bulk_get(
+        neynar_api_key,
+        "https://api.neynar.com/v2/farcaster/casts",
+        "casts",
+        cast_hashes,
+        BULK_CASTS_LIMIT,
+        concurrency,
+        "casts in bulk",
+    )
+    casts = {}
+    for _, response_json in responses:
+        for cast in response_json.get("result", {}).get("casts", []):
+            casts[cast["hash"]] = _cast_from_v2(cast)
+    return casts
+
+
+async def fetch_users_bulk(
+    neynar_api_key: str, fids: Iterable[int], concurrency: int = BULK_CONCURRENCY
+) -> dict[int, User]:
+    """Fetch many users by FID, BULK_USERS_LIMIT per request.
+
+    Args:
+        neynar_api_key: The Neynar API key.
+        fids: The FIDs of the users to fetch.
+        concurrency: How many requests to have in flight at once.
+
+    Returns:
+        Users keyed by FID. Users that were not found or could not be fetched are left out.
+        Cached profiles are used without a request. FIDs a successful request did not
+        return are cached as unknown users, so they are not requested again until the
+        negative entry expires.
+
     """
-    Fetches mentions for a given Farcaster FID.
+    cache = get_profile_cache()
+    users = {}
+    missing = []
+    for fid in fids:
+        cached = cache.get(fid)
+        if cached is MISS:
+            missing.append(fid)
+        elif cached is not None:
+            users[cached["fid"]] = cached
+
+    responses = await _bulk_get(
+        neynar_api_key,
+        "https://api.neynar.com/v2/farcaster/user/bulk",
+        "fids",
+        missing,
+        BULK_USERS_LIMIT,
+        concurrency,
+        "users in bulk",
+    )
+    entries = []
+    for chunk, response_json in responses:
+        found = set()
+        for user in response_json.get("users", []):
+            users[user["fid"]] = User(fid=user["fid"], username=user.get("username"))
+            entries.append((user["fid"], users[user["fid"]], True))
+            found.add(int(user["fid"]))
+        entries.extend((fid, None, True) for fid in chunk if int(fid) not in found)
+    await cache.set_many_async(entries)
+    return users
+
+
+async def fetch_mentions_for_fid(
+    neynar_api_key: str, fid: int, limit: int = 100, concurrency: int = BULK_CONCURRENCY
+) -> list[Cast]:
+    """Fetch mentions for a given Farcaster FID.
 
     Args:
         neynar_api_key: The Neynar API key.
         fid: The Farcaster FID to fetch mentions for.
         limit: The number of mentions to fetch (default 100, max 250).
+        concurrency: How many bulk cast requests to have in flight at once.
 
     Returns:
-        A list of casts mentioning the given FID.
+        A list of casts mentioning the given FID, in notification order. Casts that could
+        not be fetched are reported and left out.
+
     """
     try:
         headers = {
@@ -147,28 +418,28 @@ async def fetch_mentions_for_fid(neynar_api_key: str, fid: int, limit: int = 100
 
         while True:
             # Fetch mentions
-            params = {
-                "type": 'mentions',
-                "fid": fid,
-                "limit": min(limit, 250),
-                "cursor": cursor
-            }
+            params = {"type": "mentions", "fid": fid, "limit": min(limit, 250), "cursor": cursor}
             url = "https://api.neynar.com/v2/farcaster/notifications"
 
             print(f"Fetching mentions from: {url} with params: {params}")
 
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-
-            response_json = response.json()
+            response_json = await get_http_client().get_json(url, headers=headers, params=params)
             print(f"Response JSON for fetch_mentions_for_fid: {response_json}")
 
-            if response_json and response_json.get("result") and response_json["result"].get("notifications"):
+            if (
+                response_json
+                and response_json.get("result")
+                and response_json["result"].get("notifications")
+            ):
                 new_mentions = response_json["result"]["notifications"]
                 mentions.extend(new_mentions)
 
                 # Check if we've reached the limit or if there are no more pages
-                if len(mentions) >= limit or not response_json.get("next") or not response_json["next"].get("cursor"):
+                if (
+                    len(mentions) >= limit
+                    or not response_json.get("next")
+                    or not response_json["next"].get("cursor")
+                ):
                     break
 
                 cursor = response_json["next"]["cursor"]
@@ -176,25 +447,34 @@ async def fetch_mentions_for_fid(neynar_api_key: str, fid: int, limit: int = 100
                 print("No more mentions found.")
                 break
 
+        cast_hashes = [
+            mention["cast"]["hash"] for mention in mentions if mention["type"] == "cast-mention"
+        ]
+        found = await get_casts_bulk(neynar_api_key, cast_hashes, concurrency)
+
         casts = []
-        for mention in mentions:
-            if mention["type"] == "cast-mention":
-                cast_hash = mention["cast"]["hash"]
-                cast = await get_cast(neynar_api_key, cast_hash)
-                if cast:
-                    casts.append(cast)
+        failed = []
+        for cast_hash in cast_hashes:
+            if cast_hash in found:
+                casts.append(found[cast_hash])
+            else:
+                failed.append(cast_hash)
+        if failed:
+            print(
+                f"Could not fetch {len(failed)} of {len(cast_hashes)} mentioned casts: {', '.join(failed)}"
+            )
 
         return casts
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error fetching mentions: {e.response.status_code} - {e.response.text}")
+    except HttpError as e:
+        print(f"HTTP error fetching mentions: {e.status} - {e.text}")
         return []
     except Exception as e:
         print(f"General error fetching mentions: {e}")
         return []
 
-async def fetch_user_data(neynar_api_key: str, identifier: str, by_fid: bool = True) -> Optional[User]:
-    """
-    Fetches user data from Farcaster by FID or username.
+
+async def fetch_user_data(neynar_api_key: str, identifier: str, by_fid: bool = True) -> User | None:
+    """Fetch user data from Farcaster by FID or username.
 
     Args:
         neynar_api_key: The Neynar API key.
@@ -202,8 +482,15 @@ async def fetch_user_data(neynar_api_key: str, identifier: str, by_fid: bool = T
         by_fid: Whether to fetch by FID (True) or username (False).
 
     Returns:
-        User data object or None if the user is not found.
+        User data object or None if the user is not found. Profiles and unknown users are
+        cached; see `get_profile_cache`.
+
     """
+    cache = get_profile_cache()
+    cached = cache.get(identifier, by_fid)
+    if cached is not MISS:
+        return cached
+
     try:
         headers = {
             "accept": "application/json",
@@ -217,39 +504,50 @@ async def fetch_user_data(neynar_api_key: str, identifier: str, by_fid: bool = T
 
         print(f"Fetching user data from: {url}")
 
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-
-        response_json = response.json()
+        response_json = await get_http_client().get_json(url, headers=headers)
         print(f"Response JSON for fetch_user_data: {response_json}")
 
         if by_fid:
             if response_json and response_json.get("messages"):
                 # Extract user data from the messages array
-                for message in response_json['messages']:
-                    data = message.get('data')
-                    if data and data.get('userDataBody') and data['userDataBody'].get('type') == 6:
-                        return User(fid=data.get('fid'), username=data['userDataBody'].get('value'))
+                for message in response_json["messages"]:
+                    data = message.get("data")
+                    if data and data.get("userDataBody") and data["userDataBody"].get("type") == 6:
+                        user = User(fid=data.get("fid"), username=data["userDataBody"].get("value"))
+                        await cache.set_many_async([(identifier, user, by_fid)])
+                        return user
             print(f"User data not found for FID: {identifier}")
+            await cache.set_many_async([(identifier, None, by_fid)])
             return None
         else:
-            if response_json and response_json.get('users') and response_json['users']:
-                user_data = response_json['users'][0]
-                return User(fid=user_data.get('fid'), username=user_data.get('username'))
+            if response_json and response_json.get("users") and response_json["users"]:
+                user_data = response_json["users"][0]
+                user = User(fid=user_data.get("fid"), username=user_data.get("username"))
+                await cache.set_many_async([(identifier, user, by_fid)])
+                return user
             else:
                 print(f"User data not found for username: {identifier}")
+                await cache.set_many_async([(identifier, None, by_fid)])
                 return None
 
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error fetching user data: {e.response.status_code} - {e.response.text}")
+    except HttpError as e:
+        print(f"HTTP error fetching user data: {e.status} - {e.text}")
+        if e.status == 404:
+            await cache.set_many_async([(identifier, None, by_fid)])
         return None
     except Exception as e:
         print(f"General error fetching user data: {e}")
         return None
 
-async def post_cast(neynar_api_key: str, text: str, signer_uuid: str, channel_id: Optional[str] = None, reply_to: Optional[str] = None) -> str:
-    """
-    Posts a cast to Farcaster.
+
+async def post_cast(
+    neynar_api_key: str,
+    text: str,
+    signer_uuid: str,
+    channel_id: str | None = None,
+    reply_to: str | None = None,
+) -> str:
+    """Post a cast to Farcaster.
 
     Args:
         neynar_api_key: The Neynar API key.
@@ -260,18 +558,15 @@ async def post_cast(neynar_api_key: str, text: str, signer_uuid: str, channel_id
 
     Returns:
         Hash of the cast if successful.
+
     """
     headers = {
         "accept": "application/json",
         "api_key": neynar_api_key,
-        "content-type": "application/json"
     }
 
     try:
-        payload = {
-            "signer_uuid": signer_uuid,
-            "text": text
-        }
+        payload = {"signer_uuid": signer_uuid, "text": text}
 
         if reply_to:
             # Post a reply
@@ -281,10 +576,7 @@ async def post_cast(neynar_api_key: str, text: str, signer_uuid: str, channel_id
             # Post a regular cast
             url = "https://api.neynar.com/v2/farcaster/cast"
 
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()
-
-        response_json = response.json()
+        response_json = await get_http_client().post_json(url, payload, headers=headers)
 
         if response_json:
             return response_json["hash"]  # Assuming Neynar returns the cast hash
@@ -292,17 +584,16 @@ async def post_cast(neynar_api_key: str, text: str, signer_uuid: str, channel_id
             print(f"Failed to post cast: {response_json}")
             return ""
 
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error posting cast: {e.response.status_code} - {e.response.text}")
+    except HttpError as e:
+        print(f"HTTP error posting cast: {e.status} - {e.text}")
         return ""
     except Exception as e:
         print(f"General error posting cast: {e}")
         return ""
 
-async def get_cast(neynar_api_key: str, cast_hash: str) -> Optional[Cast]:
-    """
-    Gets a cast from Farcaster by its hash.
-    """
+
+async def get_cast(neynar_api_key: str, cast_hash: str) -> Cast | None:
+    """Get a cast from Farcaster by its hash."""
     try:
         headers = {
             "accept": "application/json",
@@ -314,42 +605,42 @@ async def get_cast(neynar_api_key: str, cast_hash: str) -> Optional[Cast]:
 
         print(f"Fetching cast from: {url} with params: {params}")
 
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-
-        response_json = response.json()
+        response_json = await get_http_client().get_json(url, headers=headers, params=params)
         print(f"Response JSON for get_cast: {response_json}")
 
         # Assuming the cast data is directly returned in the response.
         cast_data = response_json
 
-        if cast_data and cast_data.get('messages'):
-            cast_msg = cast_data['messages'][0]
-            author_data = cast_msg.get('data').get('castAddBody').get('author')
+        if cast_data and cast_data.get("messages"):
+            cast_msg = cast_data["messages"][0]
+            author_data = cast_msg.get("data").get("castAddBody").get("author")
             if author_data:
                 author = await fetch_user_data(neynar_api_key, author_data, by_fid=True)
             else:
                 author = None
 
-            mentions_data = cast_data.get('mentions', [])
-            mentions = [User(fid=mention.get('fid'), username=mention.get('username')) for mention in mentions_data]
+            mentions_data = cast_data.get("mentions", [])
+            mentions = [
+                User(fid=mention.get("fid"), username=mention.get("username"))
+                for mention in mentions_data
+            ]
 
             return Cast(
-                hash=cast_data['hash'],
-                text=cast_data['data']['castAddBody']['text'],
-                timestamp=cast_data['data']['timestamp'],
+                hash=cast_data["hash"],
+                text=cast_data["data"]["castAddBody"]["text"],
+                timestamp=cast_data["data"]["timestamp"],
                 author=author,
-                reactions=cast_data.get('reactions'),
+                reactions=cast_data.get("reactions"),
                 mentions=mentions,
-                parent_hash=cast_data.get('parent_hash')
+                parent_hash=cast_data.get("parent_hash"),
             )
         else:
             print(f"Cast not found for hash: {cast_hash}")
             return None
 
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error fetching cast: {e.response.status_code} - {e.response.text}")
+    except HttpError as e:
+        print(f"HTTP error fetching cast: {e.status} - {e.text}")
         return None
     except Exception as e:
         print(f"General error fetching cast: {e}")
-        return None
\ No newline at end of file
+        return None
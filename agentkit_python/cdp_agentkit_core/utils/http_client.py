@@ -0,0 +1,152 @@
+import asyncio
+import os
+from typing import Any
+
+import aiohttp
+
+# Defaults, each overridable by the environment variable named next to it.
+DEFAULT_TIMEOUT_SECONDS = 30.0  # THEO_HTTP_TIMEOUT_SECONDS: whole request, including the body
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 10.0  # THEO_HTTP_CONNECT_TIMEOUT_SECONDS: getting a connection
+DEFAULT_MAX_CONNECTIONS = 100  # THEO_HTTP_MAX_CONNECTIONS: open connections in total
+DEFAULT_MAX_CONNECTIONS_PER_HOST = (
+    10  # THEO_HTTP_MAX_CONNECTIONS_PER_HOST: open connections per host
+)
+KEEPALIVE_SECONDS = 30.0  # How long an idle connection is kept for reuse
+
+
+class HttpError(Exception):
+    """Raised for a response with a 4xx or 5xx status."""
+
+    def __init__(self, url: str, status: int, text: str):
+        super().__init__(f"{status} for {url}")
+        self.url = url
+        self.status = status
+        self.text = text
+
+
+def _setting(value: float | None, env_var: str, default: float) -> float:
+    if value is not None:
+        return value
+    return float(os.getenv(env_var) or default)
+
+
+class HttpClient:
+    """Async HTTP client sharing one pool of keep-alive connections across requests.
+
+    The underlying `aiohttp.ClientSession` is created on first use and bound to the running
+    event loop; a client used from a new loop, as after `asyncio.run` returns, opens a new
+    session there. Requests waiting for a free connection queue up behind the per-host limit
+    instead of opening more.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        connect_timeout: float | None = None,
+        max_connections: int | None = None,
+        max_connections_per_host: int | None = None,
+    ):
+        self.timeout = _setting(timeout, "THEO_HTTP_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)
+        self.connect_timeout = _setting(
+            connect_timeout, "THEO_HTTP_CONNECT_TIMEOUT_SECONDS", DEFAULT_CONNECT_TIMEOUT_SECONDS
+        )
+        self.max_connections = int(
+            _setting(max_connections, "THEO_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)
+        )
+        self.max_connections_per_host = int(
+            _setting(
+                max_connections_per_host,
+                "THEO_HTTP_MAX_CONNECTIONS_PER_HOST",
+                DEFAULT_MAX_CONNECTIONS_PER_HOST,
+            )
+        )
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the session for the running event loop, opening it if needed."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=KEEPALIVE_SECONDS,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+            )
+            self._loop = loop
+        return self._session
+
+    async def get_json(
+        self, url: str, headers: dict[str, str] | None = None, params: dict[str, Any] | None = None
+    ) -> Any:
+        """Send a GET request and return the decoded JSON body.
+
+        Query parameters set to None are left out, as `requests` does.
+
+        Raises:
+            HttpError: If the response status is 4xx or 5xx.
+            aiohttp.ClientError: If the request fails.
+            asyncio.TimeoutError: If the request takes longer than the timeout.
+
+        """
+        if params:
+            params = {key: value for key, value in params.items() if value is not None}
+        async with self.session().get(url, headers=headers, params=params) as response:
+            return await self._json(response)
+
+    async def post_json(self, url: str, payload: Any, headers: dict[str, str] | None = None) -> Any:
+        """Send `payload` as a JSON POST request and return the decoded JSON body.
+
+        Raises:
+            HttpError: If the response status is 4xx or 5xx.
+            aiohttp.ClientError: If the request fails.
+            asyncio.TimeoutError: If the request takes longer than the timeout.
+
+        """
+        async with self.session().post(url, headers=headers, json=payload) as response:
+            return await self._json(response)
+
+    async def _json(self, response: aiohttp.ClientResponse) -> Any:
+        if response.status >= 400:
+            raise HttpError(str(response.url), response.status, await response.text())
+        return await response.json(content_type=None)
+
+    async def close(self):
+        """Close the pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+_shared: HttpClient | None = None
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client, creating it with the default settings."""
+    global _shared
+    if _shared is None:
+        _shared = HttpClient()
+    return _shared
+
+
+async def configure_http_client(
+    timeout: float | None = None,
+    connect_timeout: float | None = None,
+    max_connections: int | None = None,
+    max_connections_per_host: int | None = None,
+) -> HttpClient:
+    """Replace the process-wide HTTP client with one using the given settings."""
+    global _shared
+    await close_http_client()
+    _shared = HttpClient(timeout, connect_timeout, max_connections, max_connections_per_host)
+    return _shared
+
+
+async def close_http_client():
+    """Close the process-wide HTTP client's connections, e.g. at shutdown."""
+    if _shared is not None:
+        await _shared.close()
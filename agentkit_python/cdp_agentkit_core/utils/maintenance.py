@@ -0,0 +1,350 @@
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable, Generator
+from datetime import datetime, timezone
+from typing import Any, TypedDict
+
+from .database import DATABASE_NAME, Database
+
+DEFAULT_STEP_SECONDS = 30.0  # Time budget of each maintenance step
+BACKUP_PAGES_PER_STEP = 256  # Pages copied per backup step before other connections get a turn
+BACKUP_SLEEP_SECONDS = 0.01  # Pause between backup steps so writers are not starved
+VACUUM_PAGES_PER_STEP = 256  # Free pages returned to the OS per incremental vacuum step
+ANALYSIS_LIMIT = 1000  # Rows sampled per index by ANALYZE
+BACKUPS_TO_KEEP = 7  # Older backups are deleted when a new one completes
+PARTIAL_SUFFIX = ".partial"  # Marks a backup directory still being filled
+
+# Called as progress(step, done, total) while a step runs.
+Progress = Callable[[str, int, int], None]
+
+
+class StepReport(TypedDict):
+    """What one maintenance step got done."""
+
+    step: str
+    completed: bool  # False if the step did not finish; see the step for what happens next
+    done: int
+    total: int
+    seconds: float
+
+
+# A step's work as a generator: it yields after each bounded unit and returns its report.
+StepUnits = Generator[None, None, StepReport]
+
+
+class _OutOfTimeError(Exception):
+    """Raised from a backup progress callback to stop a backup that ran over budget."""
+
+
+def print_progress(step: str, done: int, total: int):
+    """Default progress reporter."""
+    print(f"Maintenance {step}: {done}/{total}")
+
+
+def _advance(units: StepUnits) -> StepReport | None:
+    """Run the next unit of a step; returns the step's report once it has finished."""
+    try:
+        next(units)
+    except StopIteration as done:
+        return done.value
+    return None
+
+
+class Maintenance:
+    """Routine upkeep of the SQLite files behind `Database`, safe to run while THEO is live.
+
+    Each step is bounded by a time budget and reports progress as it goes: an online backup
+    copied a few pages at a time with the backup API, an incremental vacuum returning free
+    pages to the filesystem, and ANALYZE refreshing the statistics the query planner uses.
+    A step that runs out of time stops cleanly and picks up again on the next run. Work is
+    done in small units; `run` does them back to back on the calling thread, while
+    `run_async` lets queued writes commit between them.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        backup_dir: str | None = None,
+        step_seconds: float = DEFAULT_STEP_SECONDS,
+        progress: Progress = print_progress,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.db = db
+        self.backup_dir = backup_dir or os.path.join(
+            os.path.dirname(os.path.abspath(db.db_name)), "backups"
+        )
+        self.step_seconds = step_seconds
+        self.progress = progress
+        self.clock = clock
+
+    def _steps(self) -> list[Callable[[], StepUnits]]:
+        return [self._backup_units, self._vacuum_units, self._analyze_units]
+
+    def run(self) -> list[StepReport]:
+        """Run the backup, incremental vacuum and ANALYZE steps in turn.
+
+        They run on the calling thread, which must not be inside a transaction.
+        """
+        reports = []
+        for step in self._steps():
+            try:
+                reports.append(self._finish(step()))
+            except sqlite3.Error as e:
+                print(f"An error occurred during maintenance step {step.__name__}: {e}")
+        return reports
+
+    async def run_async(self, run_exclusive: Callable[..., Awaitable[Any]]) -> list[StepReport]:
+        """Run the steps from asyncio without holding the writer for the whole run.
+
+        Vacuum and ANALYZE work on the database's own connection, so each of their units is
+        handed to `run_exclusive` (`AsyncDatabase.run_exclusive`) separately and queued
+        write batches commit in between. The backup reads through connections of its own
+        and runs on the default executor, away from the writer.
+        """
+        loop = asyncio.get_running_loop()
+        reports = []
+        for step in self._steps():
+            units = step()
+            try:
+                while True:
+                    if step == self._backup_units:
+                        report = await loop.run_in_executor(None, _advance, units)
+                    else:
+                        report = await run_exclusive(_advance, units)
+                    if report is not None:
+                        reports.append(report)
+                        break
+            except sqlite3.Error as e:
+                print(f"An error occurred during maintenance step {step.__name__}: {e}")
+        return reports
+
+    def _finish(self, units: StepUnits) -> StepReport:
+        """Run every remaining unit of a step and return its report."""
+        while True:
+            report = _advance(units)
+            if report is not None:
+                return report
+
+    def _report(
+        self, step: str, completed: bool, done: int, total: int, started: float
+    ) -> StepReport:
+        return StepReport(
+            step=step, completed=completed, done=done, total=total, seconds=self.clock() - started
+        )
+
+    def backup(self) -> StepReport:
+        """Copy the database and its archive files into a timestamped backup directory.
+
+        Each file is copied with SQLite's online backup API through a connection of its own,
+        in small steps, so the bot keeps reading and writing meanwhile. The backup fills a
+        `<timestamp>.partial` directory and is renamed once every file is in it. A run that
+        runs out of time keeps the files already copied, and the next run picks up with the
+        rest. A file that could not be copied within one budget is copied in a single step
+        on the next run instead. In WAL mode that step reads a snapshot and blocks no
+        writer, so the file gets backed up however large it grows.
+
+        The main file is copied first. If closed days are archived before a resumed backup
+        completes, their rows may end up in both the main file and an archive in the backup,
+        but none are lost. Completed backups beyond BACKUPS_TO_KEEP are deleted.
+        """
+        return self._finish(self._backup_units())
+
+    def _partial_backup_dir(self) -> str:
+        """Return the newest unfinished backup directory, or a new one."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        partial = sorted(
+            entry for entry in os.listdir(self.backup_dir) if entry.endswith(PARTIAL_SUFFIX)
+        )
+        if partial:
+            return os.path.join(self.backup_dir, partial[-1])
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        target_dir = os.path.join(self.backup_dir, stamp + PARTIAL_SUFFIX)
+        os.makedirs(target_dir)
+        return target_dir
+
+    def _backup_units(self) -> StepUnits:
+        started = self.clock()
+        deadline = started + self.step_seconds
+        target_dir = self._partial_backup_dir()
+        sources = [self.db.db_name, *self.db.archive_paths()]
+        copied = 0
+        for source in sources:
+            name = os.path.basename(source)
+            target = os.path.join(target_dir, name)
+            if os.path.exists(target):
+                copied += 1
+                continue
+            if self.clock() >= deadline:
+                return self._report("backup", False, copied, len(sources), started)
+
+            # A temporary file left behind means the last run ran out of time on this file.
+            temporary = target + ".tmp"
+            single_step = os.path.exists(temporary)
+
+            def report(status, remaining, total, name=name, single_step=single_step):
+                self.progress(f"backup {name}", total - remaining, total)
+                if remaining and not single_step and self.clock() > deadline:
+                    raise _OutOfTimeError()
+
+            source_conn = sqlite3.connect(source)
+            target_conn = sqlite3.connect(temporary)
+            try:
+                source_conn.backup(
+                    target_conn,
+                    pages=-1 if single_step else BACKUP_PAGES_PER_STEP,
+                    progress=report,
+                    sleep=BACKUP_SLEEP_SECONDS,
+                )
+            except _OutOfTimeError:
+                return self._report("backup", False, copied, len(sources), started)
+            finally:
+                target_conn.close()
+                source_conn.close()
+            os.replace(temporary, target)
+            copied += 1
+            yield
+
+        os.rename(target_dir, target_dir[: -len(PARTIAL_SUFFIX)])
+        self._prune_backups()
+        return self._report("backup", True, copied, len(sources), started)
+
+    def _prune_backups(self):
+        """Delete all but the newest BACKUPS_TO_KEEP completed backup directories."""
+        backups = sorted(
+            entry
+            for entry in os.listdir(self.backup_dir)
+            if os.path.isdir(os.path.join(self.backup_dir, entry))
+            and not entry.endswith(PARTIAL_SUFFIX)
+        )
+        for entry in backups[:-BACKUPS_TO_KEEP]:
+            shutil.rmtree(os.path.join(self.backup_dir, entry), ignore_errors=True)
+
+    def incremental_vacuum(self) -> StepReport:
+        """Return free pages to the filesystem a few at a time.
+
+        Stops once none are left or the budget runs out.
+
+        Incremental vacuuming needs `auto_vacuum = INCREMENTAL`, which new databases get. On
+        a database created before that, the step does nothing and reports itself not
+        completed until `enable_incremental_vacuum` has been run.
+        """
+        return self._finish(self._vacuum_units())
+
+    def _vacuum_units(self) -> StepUnits:
+        started = self.clock()
+        deadline = started + self.step_seconds
+        with self.db.connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                print(
+                    "Incremental vacuum is not enabled; run Maintenance.enable_incremental_vacuum while THEO is stopped."
+                )
+                return self._report("vacuum", False, 0, 0, started)
+            total = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        remaining = total
+        while remaining and self.clock() < deadline:
+            with self.db.connection() as conn:
+                conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})").fetchall()
+                remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            self.progress("vacuum", total - remaining, total)
+            yield
+        return self._report("vacuum", remaining == 0, total - remaining, total, started)
+
+    def enable_incremental_vacuum(self) -> StepReport:
+        """Switch an older database over to `auto_vacuum = INCREMENTAL`.
+
+        Databases created before it was the default need this for `incremental_vacuum` to
+        work on them.
+
+        This takes one full VACUUM, which rewrites the whole file and blocks every writer
+        until it is done, so it is not part of `run` and has no time budget. Run it once
+        while THEO is stopped. The full-text index is rebuilt afterwards because VACUUM may
+        renumber the post rowids the index refers to.
+        """
+        started = self.clock()
+        with self.db.connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return self._report("enable incremental vacuum", True, 1, 1, started)
+            self.progress("enable incremental vacuum", 0, 1)
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        self.db.rebuild_search_index()
+        self.progress("enable incremental vacuum", 1, 1)
+        return self._report("enable incremental vacuum", True, 1, 1, started)
+
+    def analyze(self) -> StepReport:
+        """Refresh planner statistics one table at a time.
+
+        At most ANALYSIS_LIMIT rows are sampled per index, until every table is done or the
+        budget runs out.
+        """
+        return self._finish(self._analyze_units())
+
+    def _analyze_units(self) -> StepUnits:
+        started = self.clock()
+        deadline = started + self.step_seconds
+        with self.db.connection() as conn:
+            tables = [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT name FROM sqlite_master
+                    WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+                        AND sql NOT LIKE 'CREATE VIRTUAL TABLE%'
+                    ORDER BY name
+                    """
+                )
+            ]
+        done = 0
+        for table in tables:
+            if self.clock() >= deadline:
+                break
+            with self.db.connection() as conn:
+                conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+                conn.execute(f'ANALYZE main."{table}"')
+            done += 1
+            self.progress("analyze", done, len(tables))
+            yield
+        return self._report("analyze", done == len(tables), done, len(tables), started)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run maintenance from the command line; returns the process exit code."""
+    parser = argparse.ArgumentParser(description="Back up, vacuum and analyze THEO's database.")
+    parser.add_argument("--db", default=DATABASE_NAME, help="The SQLite database to maintain.")
+    parser.add_argument(
+        "--backup-dir", help="Directory for backups. Defaults to backups/ next to the database."
+    )
+    parser.add_argument(
+        "--step-seconds", type=float, default=DEFAULT_STEP_SECONDS, help="Time budget per step."
+    )
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="Switch an older database to incremental vacuuming with one full VACUUM. Stop THEO first.",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"No database at {args.db}")
+    with Database(args.db) as db:
+        maintenance = Maintenance(db, args.backup_dir, args.step_seconds)
+        try:
+            reports = (
+                [maintenance.enable_incremental_vacuum()]
+                if args.enable_incremental_vacuum
+                else maintenance.run()
+            )
+        except sqlite3.Error as e:
+            print(f"An error occurred during maintenance: {e}")
+            return 1
+    for report in reports:
+        print(f"Maintenance report: {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,513 @@
+import heapq
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from .database import (
+    DAILY_NOMINATION_LIMIT,
+    LEADERBOARD_WINDOWS,
+    Timestamp,
+    current_day,
+    day_bucket,
+    day_to_date,
+    nomination_epoch_ms,
+    to_epoch_ms,
+    week_bucket,
+)
+from .storage import BulkWriteResult, HighWaterMark, PostRow, ScoreRow, StorageBackend
+
+
+class MemoryStorage(StorageBackend):
+    """Storage backend holding everything in Python dicts, for tests and short-lived runs.
+
+    It mirrors the SQLite schema's rules: unique usernames, posts and nominations only for
+    known users and posts, one nomination per nominator and post, the daily nomination
+    quota and one "Based Creator of the Day" per date. Scores and windowed rollups are kept
+    as running counters, and top-N queries use heaps instead of sorting everything.
+
+    Each method applies all of its writes or none, but a failed `transaction` scope does not
+    undo the writes of earlier calls inside it. Nothing is persisted.
+    """
+
+    def __init__(self, nomination_limit: int = DAILY_NOMINATION_LIMIT):
+        self.nomination_limit = nomination_limit
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._after_commit: list[Callable[[], Any]] = []
+        self._score_listeners: list[Callable[[list[ScoreRow]], Any]] = []
+
+        self._users: dict[int, str] = {}
+        self._fids_by_username: dict[str, int] = {}
+        self._posts: dict[str, dict] = {}
+        self._post_hashes_by_day: dict[int, dict[str, None]] = defaultdict(dict)  # Ordered sets
+        self._likes_history: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._nomination_keys: set = set()
+        self._quotas: dict[tuple[int, int], int] = defaultdict(int)
+        self._scores: dict[int, int] = defaultdict(int)
+        self._rollups: dict[tuple[str, int], dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._seasons: list[tuple[int, str, int, int]] = []
+        self._creators_of_day: dict[str, int] = {}
+        self._feed_marks: dict[str, tuple[int, HighWaterMark]] = {}
+
+    def close(self):
+        """Nothing to release; the data lives as long as the object."""
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Hold the storage lock for the scope.
+
+        Score listeners run when the outermost scope exits without an error.
+        """
+        with self._lock:
+            self._depth += 1
+            try:
+                yield None
+            except BaseException:
+                if self._depth == 1:
+                    self._after_commit.clear()
+                raise
+            finally:
+                self._depth -= 1
+            if self._depth == 0:
+                callbacks, self._after_commit = self._after_commit, []
+                for callback in callbacks:
+                    callback()
+
+    def create_tables(self):
+        """Nothing to create; kept for parity with `Database`."""
+
+    def add_score_listener(self, callback: Callable[[list[ScoreRow]], Any]):
+        """Register a callback receiving the new totals of users whose score or username changed."""
+        self._score_listeners.append(callback)
+
+    def _notify_scores(self, fids: Iterable[int]):
+        rows = [
+            ScoreRow(fid, self._users.get(fid), self._scores[fid]) for fid in dict.fromkeys(fids)
+        ]
+        if not rows or not self._score_listeners:
+            return
+
+        def notify():
+            for listener in self._score_listeners:
+                try:
+                    listener(rows)
+                except Exception as e:
+                    print(f"A score listener failed: {e}")
+
+        self._after_commit.append(notify)
+
+    def get_user(self, fid: int) -> dict | None:
+        """Retrieve a user by their Farcaster ID."""
+        with self._lock:
+            username = self._users.get(fid)
+        return {"fid": fid, "username": username} if username is not None else None
+
+    def create_user(self, fid: int, username: str):
+        """Create a new user."""
+        if not isinstance(fid, int):
+            print(f"Error: Invalid FID format: {fid}. FID must be an integer.")
+            return
+
+        if not self.is_valid_username(username):
+            print(f"Error: Invalid username format: {username}")
+            return
+
+        with self.transaction():
+            if fid in self._users or username in self._fids_by_username:
+                print(f"Failed to create user: fid {fid} or username {username} already exists")
+                return
+            self._set_username(fid, username)
+
+    def _set_username(self, fid: int, username: str):
+        old = self._users.get(fid)
+        if old is not None:
+            del self._fids_by_username[old]
+        self._users[fid] = username
+        self._fids_by_username[username] = fid
+
+    def upsert_users_bulk(self, users: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Insert or rename many users.
+
+        Returns:
+            Counts of users inserted, updated (username changed) and skipped (invalid,
+            unchanged or conflicting with another user's username).
+
+        """
+        users = list(users)
+        inserted = updated = 0
+        renamed = []
+        with self.transaction():
+            for user in users:
+                fid, username = user.get("fid"), user.get("username") or ""
+                if not isinstance(fid, int) or not self.is_valid_username(username):
+                    continue
+                owner = self._fids_by_username.get(username)
+                if owner is not None:
+                    continue  # Unchanged, or taken by another user
+                if fid in self._users:
+                    updated += 1
+                    renamed.append(fid)
+                else:
+                    inserted += 1
+                self._set_username(fid, username)
+            self._notify_scores(fid for fid in renamed if fid in self._scores)
+        return BulkWriteResult(
+            inserted=inserted, updated=updated, skipped=len(users) - inserted - updated
+        )
+
+    def get_post(self, hash: str) -> PostRow | None:
+        """Retrieve a post by its hash."""
+        with self._lock:
+            post = self._posts.get(hash)
+            return self._post_row(post) if post else None
+
+    def _post_row(self, post: dict) -> PostRow:
+        return PostRow(
+            post["hash"],
+            post["fid"],
+            post["username"],
+            post["text"],
+            post["likes"],
+            post["timestamp"],
+        )
+
+    def _insert_post(self, post: dict[str, Any]):
+        epoch_ms = to_epoch_ms(post["timestamp"])
+        day = day_bucket(epoch_ms)
+        self._posts[post["hash"]] = {
+            "hash": post["hash"],
+            "fid": post["fid"],
+            "username": post["username"],
+            "text": post["text"],
+            "likes": post["likes"],
+            "timestamp": post["timestamp"],
+            "timestamp_ms": epoch_ms,
+            "day": day,
+        }
+        if day is not None:
+            self._post_hashes_by_day[day][post["hash"]] = None
+
+    def create_post(
+        self, fid: int, username: str, text: str, likes: int, timestamp: str, hash: str
+    ):
+        """Create a new post."""
+        with self.transaction():
+            if fid not in self._users or hash in self._posts:
+                print(
+                    f"An error occurred while creating post: unknown user {fid} or duplicate post {hash}"
+                )
+                return
+            self._insert_post(
+                {
+                    "hash": hash,
+                    "fid": fid,
+                    "username": username,
+                    "text": text,
+                    "likes": likes,
+                    "timestamp": timestamp,
+                }
+            )
+
+    def create_posts_bulk(self, posts: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Insert many posts, refreshing likes on posts already stored.
+
+        Returns:
+            Counts of posts inserted, updated (likes changed) and skipped (unchanged, or
+            authored by an unknown user).
+
+        """
+        posts = list(posts)
+        inserted = updated = 0
+        with self.transaction():
+            for post in posts:
+                if post["fid"] not in self._users:
+                    continue
+                existing = self._posts.get(post["hash"])
+                if existing is None:
+                    self._insert_post(post)
+                    inserted += 1
+                elif existing["likes"] != post["likes"]:
+                    existing["likes"] = post["likes"]
+                    updated += 1
+        return BulkWriteResult(
+            inserted=inserted, updated=updated, skipped=len(posts) - inserted - updated
+        )
+
+    def get_post_hashes_for_day(self, day: int | None = None) -> list[str]:
+        """Return the hashes of the posts created on a campaign day, defaulting to today (UTC)."""
+        with self._lock:
+            return list(self._post_hashes_by_day.get(current_day() if day is None else day, ()))
+
+    def record_likes_bulk(
+        self, likes: dict[str, int], sampled_at: Timestamp | None = None
+    ) -> BulkWriteResult:
+        """Store freshly fetched like counts, keeping a sample per change in the likes history.
+
+        Returns:
+            Counts of posts updated (likes changed) and skipped (unchanged or unknown).
+
+        """
+        sampled_ms = to_epoch_ms(sampled_at) if sampled_at is not None else int(time.time() * 1000)
+        updated = 0
+        with self.transaction():
+            for hash, count in likes.items():
+                post = self._posts.get(hash)
+                if post is None:
+                    continue
+                history = self._likes_history[hash]
+                if not history or history[-1][1] != count:
+                    history.append((sampled_ms, count))
+                if post["likes"] != count:
+                    post["likes"] = count
+                    updated += 1
+        return BulkWriteResult(inserted=0, updated=updated, skipped=len(likes) - updated)
+
+    def get_most_liked_posts(
+        self, start_time: Timestamp, limit: int = 3, end_time: Timestamp | None = None
+    ) -> list[PostRow]:
+        """Retrieve the most liked posts created in a time window, limited to a certain number."""
+        with self._lock:
+            candidates = self._posts_between(start_time, end_time)
+            top = heapq.nlargest(limit, candidates, key=lambda post: post["likes"] or 0)
+            return [self._post_row(post) for post in top]
+
+    def iter_most_liked_posts(
+        self, start_time: Timestamp, limit: int | None = None, end_time: Timestamp | None = None
+    ) -> Iterator[PostRow]:
+        """Yield the posts created in a time window, most liked first, up to `limit` if given."""
+        if limit is not None:
+            return iter(self.get_most_liked_posts(start_time, limit, end_time))
+        with self._lock:
+            posts = self._posts_between(start_time, end_time)
+            posts.sort(key=lambda post: post["likes"] or 0, reverse=True)
+            return iter([self._post_row(post) for post in posts])
+
+    def _posts_between(self, start_time: Timestamp, end_time: Timestamp | None) -> list[dict]:
+        start_ms = to_epoch_ms(start_time)
+        end_ms = to_epoch_ms(end_time) if end_time is not None else 2**63 - 1
+        return [
+            post
+            for post in self._posts.values()
+            if post["timestamp_ms"] is not None and start_ms <= post["timestamp_ms"] < end_ms
+        ]
+
+    def record_nomination(
+        self, nominator_fid: int, nominee_fid: int, post_hash: str, timestamp: str
+    ) -> bool:
+        """Record a nomination if the nominator has quota left for the nomination's day.
+
+        Returns:
+            True if the nomination was recorded.
+
+        """
+        with self.transaction():
+            problem = self._nomination_problem(nominator_fid, nominee_fid, post_hash)
+            if problem:
+                print(f"Failed to record nomination: {problem}")
+                return False
+            day = day_bucket(nomination_epoch_ms(timestamp))
+            if not self._within_quota(nominator_fid, day):
+                print(f"Nomination quota reached for {nominator_fid} on day {day}")
+                return False
+            self._apply_nomination(nominator_fid, nominee_fid, post_hash, day)
+            return True
+
+    def record_nominations_bulk(self, nominations: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Record many nominations.
+
+        Returns:
+            Counts of nominations inserted and skipped (duplicates, over the nominator's daily
+            quota, or referencing unknown users or posts).
+
+        """
+        nominations = list(nominations)
+        inserted = 0
+        with self.transaction():
+            for nomination in nominations:
+                nominator_fid, nominee_fid = nomination["nominator_fid"], nomination["nominee_fid"]
+                day = day_bucket(nomination_epoch_ms(nomination["timestamp"]))
+                if self._nomination_problem(nominator_fid, nominee_fid, nomination["post_hash"]):
+                    continue
+                if not self._within_quota(nominator_fid, day):
+                    continue
+                self._apply_nomination(nominator_fid, nominee_fid, nomination["post_hash"], day)
+                inserted += 1
+        return BulkWriteResult(inserted=inserted, updated=0, skipped=len(nominations) - inserted)
+
+    def _nomination_problem(
+        self, nominator_fid: int, nominee_fid: int, post_hash: str
+    ) -> str | None:
+        if nominator_fid not in self._users or nominee_fid not in self._users:
+            return "unknown user"
+        if post_hash not in self._posts:
+            return "unknown post"
+        if (nominator_fid, post_hash) in self._nomination_keys:
+            return "duplicate nomination"
+        return None
+
+    def _within_quota(self, nominator_fid: int, day: int) -> bool:
+        return self._quotas.get((nominator_fid, day), 0) < self.nomination_limit
+
+    def _apply_nomination(
+        self, nominator_fid: int, nominee_fid: int, post_hash: str, day: int | None
+    ):
+        self._nomination_keys.add((nominator_fid, post_hash))
+        self._scores[nominee_fid] += 1
+        if day is not None:
+            self._quotas[(nominator_fid, day)] += 1
+            self._rollups[("day", day)][nominee_fid] += 1
+            self._rollups[("week", week_bucket(day))][nominee_fid] += 1
+            for season_id, _, start_day, end_day in self._seasons:
+                if start_day <= day <= end_day:
+                    self._rollups[("season", season_id)][nominee_fid] += 1
+        self._notify_scores([nominee_fid])
+
+    def remaining_nominations(
+        self, nominator_fids: Iterable[int], day: int | None = None
+    ) -> dict[int, int]:
+        """Return how many more nominations each user may make on a campaign day."""
+        day = current_day() if day is None else day
+        with self._lock:
+            return {
+                fid: max(self.nomination_limit - self._quotas.get((fid, day), 0), 0)
+                for fid in nominator_fids
+            }
+
+    def check_nomination_quotas(self, nominations: Iterable[dict[str, Any]]) -> list[bool]:
+        """Validate a batch of nominations, in order, against the daily quotas.
+
+        Self-nominations and repeats of a recorded or earlier nomination are rejected
+        without using up quota.
+        """
+        used: dict[tuple[int, int], int] = {}
+        seen = set()
+        allowed = []
+        with self._lock:
+            for nomination in nominations:
+                nominator_fid, post_hash = nomination["nominator_fid"], nomination.get("post_hash")
+                if (
+                    nomination.get("nominee_fid") == nominator_fid
+                    or (nominator_fid, post_hash) in self._nomination_keys
+                    or (nominator_fid, post_hash) in seen
+                ):
+                    allowed.append(False)
+                    continue
+                key = (nominator_fid, day_bucket(nomination_epoch_ms(nomination["timestamp"])))
+                count = used.get(key, self._quotas.get(key, 0))
+                allowed.append(count < self.nomination_limit)
+                if allowed[-1]:
+                    used[key] = count + 1
+                    if post_hash is not None:
+                        seen.add((nominator_fid, post_hash))
+        return allowed
+
+    def get_leaderboard(
+        self, window: str = "all", limit: int = 10, offset: int = 0, day: int | None = None
+    ) -> list[dict]:
+        """Retrieve the leaderboard for a window: "all", "day", "week" or "season".
+
+        Raises:
+            ValueError: If `window` is not one of LEADERBOARD_WINDOWS.
+
+        """
+        if window not in LEADERBOARD_WINDOWS:
+            raise ValueError(f"Invalid leaderboard window: {window}")
+        day = current_day() if day is None else day
+        with self._lock:
+            if window == "all":
+                counts = self._scores
+            else:
+                bucket = self._window_bucket(window, day)
+                if bucket is None:
+                    return []
+                counts = self._rollups.get((window, bucket), {})
+            top = heapq.nsmallest(
+                offset + limit, counts.items(), key=lambda item: (-item[1], item[0])
+            )
+            return [
+                {"username": self._users.get(fid), "points": points} for fid, points in top[offset:]
+            ]
+
+    def _window_bucket(self, window: str, day: int) -> int | None:
+        if window == "day":
+            return day
+        if window == "week":
+            return week_bucket(day)
+        seasons = [season for season in self._seasons if season[2] <= day <= season[3]]
+        return max(seasons, key=lambda season: season[2])[0] if seasons else None
+
+    def get_scores(self) -> list[ScoreRow]:
+        """Retrieve every creator's all-time score."""
+        with self._lock:
+            return [
+                ScoreRow(fid, self._users.get(fid), points) for fid, points in self._scores.items()
+            ]
+
+    def iter_scores(self) -> Iterator[ScoreRow]:
+        """Yield every creator's all-time score, from a snapshot taken when it is called."""
+        return iter(self.get_scores())
+
+    def define_season(self, name: str, start_day: int, end_day: int):
+        """Define a leaderboard season, rolling up the nominations already recorded in it."""
+        with self.transaction():
+            if any(season[1] == name for season in self._seasons):
+                print(f"Failed to define season: {name} already exists")
+                return
+            season_id = len(self._seasons) + 1
+            self._seasons.append((season_id, name, start_day, end_day))
+            rollup = self._rollups[("season", season_id)]
+            for (period, bucket), counts in list(self._rollups.items()):
+                if period == "day" and start_day <= bucket <= end_day:
+                    for fid, points in counts.items():
+                        rollup[fid] += points
+
+    def get_daily_leader(self, day: int | None = None) -> PostRow | None:
+        """Retrieve the "Based Creator of the Day" post: their most liked post that day."""
+        day = current_day() if day is None else day
+        with self._lock:
+            fid = self._creators_of_day.get(day_to_date(day))
+            if fid is None:
+                return None
+            posts = [
+                self._posts[hash]
+                for hash in self._post_hashes_by_day.get(day, ())
+                if self._posts[hash]["fid"] == fid
+            ]
+            if not posts:
+                return None
+            return self._post_row(max(posts, key=lambda post: post["likes"] or 0))
+
+    def mark_based_creator_of_the_day(self, fid: int) -> bool:
+        """Make the given user today's "Based Creator of the Day", replacing an earlier leader.
+
+        Returns whether they became the leader.
+        """
+        date = day_to_date(current_day())
+        with self.transaction():
+            if fid not in self._users:
+                print(f"Failed to mark based creator of the day: {fid} on {date}")
+                return False
+            if self._creators_of_day.get(date) == fid:
+                return False
+            self._creators_of_day[date] = fid
+            return True
+
+    def get_high_water_mark(self, feed: str) -> HighWaterMark | None:
+        """Return the newest cast ingested from a feed, or None if it was never polled."""
+        with self._lock:
+            entry = self._feed_marks.get(feed)
+            return dict(entry[1]) if entry else None
+
+    def set_high_water_mark(self, feed: str, hash: str, timestamp: Timestamp):
+        """Record the newest cast ingested from a feed. A mark never moves back in time."""
+        epoch_ms = to_epoch_ms(timestamp)
+        with self.transaction():
+            entry = self._feed_marks.get(feed)
+            if entry is None or epoch_ms >= entry[0]:
+                self._feed_marks[feed] = (
+                    epoch_ms,
+                    HighWaterMark(hash=hash, timestamp=str(timestamp)),
+                )
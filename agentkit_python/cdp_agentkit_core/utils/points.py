@@ -0,0 +1,173 @@
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+
+from .database import (
+    DEFAULT_CREATOR_OF_DAY_POINTS,
+    DEFAULT_NOMINATION_POINTS,
+    DEFAULT_PARTICIPATION_POINTS,
+    DEFAULT_POST_POINTS,
+    Database,
+    replay_points_ledger,
+)
+
+SNAPSHOTS_TO_KEEP = 7  # Older points snapshots are pruned when a new one is taken
+
+
+@dataclass
+class ScoringRules:
+    """Point values for each rule of the leaderboard campaign."""
+
+    post_points: int = DEFAULT_POST_POINTS
+    nomination_points: int = DEFAULT_NOMINATION_POINTS
+    participation_points: int = DEFAULT_PARTICIPATION_POINTS
+    creator_of_day_points: int = DEFAULT_CREATOR_OF_DAY_POINTS
+
+
+class PointsEngine:
+    """Scoring engine behind the points ledger.
+
+    Day to day, triggers apply the rules as events arrive: a creator's first post of the
+    day, each nomination (to both nominee and nominator) and each "Based Creator of the
+    Day" append one ledger row and bump that user's running total. Post points only go to
+    campaign posts, those containing CAMPAIGN_KEYWORD. When a later post
+    overtakes the day's leader, two more rows move the bonus to the new leader. This class handles the
+    bulk operations around that: changing the rules and re-scoring history with a handful
+    of set-based statements, and taking snapshots of the totals so they can be rebuilt
+    from the latest snapshot plus the ledger rows written after it.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def get_rules(self) -> ScoringRules:
+        """Return the scoring rules currently in effect."""
+        with self.db.connection() as conn:
+            row = conn.execute(
+                """
+                SELECT post_points, nomination_points, participation_points, creator_of_day_points
+                FROM scoring_rules WHERE id = 1
+                """
+            ).fetchone()
+        return ScoringRules(*row)
+
+    def set_rules(self, rules: ScoringRules, recompute: bool = True):
+        """Change the scoring rules.
+
+        Args:
+            rules: The new point values.
+            recompute: Whether to re-score all history with the new rules. Without it, only
+                events recorded from now on use the new values.
+
+        """
+        try:
+            with self.db.transaction() as conn:
+                conn.execute(
+                    """
+                    UPDATE scoring_rules SET
+                        post_points = :post_points,
+                        nomination_points = :nomination_points,
+                        participation_points = :participation_points,
+                        creator_of_day_points = :creator_of_day_points
+                    WHERE id = 1
+                    """,
+                    asdict(rules),
+                )
+                if recompute:
+                    # Replayed in the same transaction, so a failed replay undoes the change.
+                    replay_points_ledger(conn, self.db.archived_before_day())
+        except sqlite3.Error as e:
+            print(f"An error occurred while updating scoring rules: {e}")
+            # Consider logging the error
+
+    def recompute(self):
+        """Rebuilds the ledger and every total from the source tables in bulk.
+
+        Days already moved to the archive files keep the ledger rows they were scored with.
+        """
+        try:
+            with self.db.transaction() as conn:
+                replay_points_ledger(conn, self.db.archived_before_day())
+        except sqlite3.Error as e:
+            print(f"An error occurred while recomputing points: {e}")
+            # Consider logging the error
+
+    def snapshot(self) -> int | None:
+        """Record the current totals and the last ledger row they include.
+
+        Returns:
+            The snapshot ID, or None if the snapshot could not be taken.
+
+        """
+        try:
+            with self.db.transaction() as conn:
+                last_ledger_id = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM points_ledger"
+                ).fetchone()[0]
+                cursor = conn.execute(
+                    "INSERT INTO points_snapshots (created_ms, last_ledger_id) VALUES (?, ?)",
+                    (int(time.time() * 1000), last_ledger_id),
+                )
+                snapshot_id = cursor.lastrowid
+                conn.execute(
+                    """
+                    INSERT INTO points_snapshot_totals (snapshot_id, fid, points)
+                    SELECT ?, fid, points FROM point_totals
+                    """,
+                    (snapshot_id,),
+                )
+                conn.execute(
+                    "DELETE FROM points_snapshot_totals WHERE snapshot_id <= ?",
+                    (snapshot_id - SNAPSHOTS_TO_KEEP,),
+                )
+                conn.execute(
+                    "DELETE FROM points_snapshots WHERE id <= ?",
+                    (snapshot_id - SNAPSHOTS_TO_KEEP,),
+                )
+                return snapshot_id
+        except sqlite3.Error as e:
+            print(f"An error occurred while taking a points snapshot: {e}")
+            # Consider logging the error
+            return None
+
+    def restore_totals(self, snapshot_id: int | None = None):
+        """Rebuilds the totals from a snapshot plus the ledger rows written after it.
+
+        Only the ledger tail is replayed, so this stays cheap however long the ledger grows.
+        Without any snapshot the whole ledger is summed.
+
+        Args:
+            snapshot_id: The snapshot to start from. Defaults to the latest one.
+
+        """
+        try:
+            with self.db.transaction() as conn:
+                if snapshot_id is None:
+                    row = conn.execute(
+                        "SELECT id, last_ledger_id FROM points_snapshots ORDER BY id DESC LIMIT 1"
+                    ).fetchone()
+                else:
+                    row = conn.execute(
+                        "SELECT id, last_ledger_id FROM points_snapshots WHERE id = ?",
+                        (snapshot_id,),
+                    ).fetchone()
+                snapshot_id, last_ledger_id = row if row else (None, 0)
+
+                conn.execute("DELETE FROM point_totals")
+                conn.execute(
+                    """
+                    INSERT INTO point_totals (fid, points, last_ledger_id)
+                    SELECT fid, SUM(points), MAX(last_id)
+                    FROM (
+                        SELECT fid, points, ? AS last_id
+                        FROM points_snapshot_totals WHERE snapshot_id = ?
+                        UNION ALL
+                        SELECT fid, points, id FROM points_ledger WHERE id > ?
+                    )
+                    GROUP BY fid
+                    """,
+                    (last_ledger_id, snapshot_id, last_ledger_id),
+                )
+        except sqlite3.Error as e:
+            print(f"An error occurred while restoring points totals: {e}")
+            # Consider logging the error
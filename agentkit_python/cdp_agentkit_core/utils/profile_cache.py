@@ -0,0 +1,200 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any
+
+from .cache import TTLCache
+
+PROFILE_CACHE_SIZE = 50_000  # Profiles kept per key type before the least recently used is evicted
+PROFILE_TTL_SECONDS = 3600.0  # How long a fetched profile is trusted
+PROFILE_NEGATIVE_TTL_SECONDS = 300.0  # How long a user is remembered as unknown
+
+# Returned by ProfileCache.get when nothing is cached, to tell it apart from a cached
+# "unknown user", which is None.
+MISS = object()
+
+# A profile as cached: the `User` dict returned by utils.farcaster, or None if unknown.
+Profile = dict[str, Any] | None
+
+# A lookup result to cache: the fid or username looked up, the profile found and whether
+# the lookup was by fid.
+Entry = tuple[Any, Profile, bool]
+
+
+class _DiskTier:
+    """SQLite file holding cached profiles across restarts, with wall-clock expiry."""
+
+    def __init__(self, path: str, maxsize: int, clock: Callable[[], float]):
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                key TEXT PRIMARY KEY,
+                found INTEGER NOT NULL,
+                fid INTEGER,
+                username TEXT,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        # Drop what expired while THEO was down, then the soonest to expire beyond maxsize.
+        self._conn.execute("DELETE FROM profiles WHERE expires_at <= ?", (self.clock(),))
+        self._conn.execute(
+            """
+            DELETE FROM profiles WHERE key IN (
+                SELECT key FROM profiles ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (maxsize,),
+        )
+
+    def get(self, key: str) -> tuple[Any, float]:
+        """Return the cached profile and its remaining lifetime, or MISS and 0."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT found, fid, username, expires_at FROM profiles WHERE key = ?", (key,)
+            ).fetchone()
+        remaining = row[3] - self.clock() if row else 0.0
+        if remaining <= 0:
+            self.misses += 1
+            return MISS, 0.0
+        self.hits += 1
+        return ({"fid": row[1], "username": row[2]} if row[0] else None), remaining
+
+    def set_many(self, entries: list[tuple[str, Profile, float]]):
+        """Store (key, profile, ttl) entries in a single transaction."""
+        now = self.clock()
+        rows = [
+            (
+                key,
+                profile is not None,
+                profile["fid"] if profile else None,
+                profile["username"] if profile else None,
+                now + ttl,
+            )
+            for key, profile, ttl in entries
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO profiles (key, found, fid, username, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ProfileCache:
+    """Cache of Farcaster user profiles, looked up by fid or by username.
+
+    Profiles live in two `TTLCache`s, one per key type, and a fetched profile is stored
+    under both keys. Users the API does not know are cached too, for a shorter time, so
+    repeated lookups of a bad fid or username do not reach the network. With `path`, every
+    entry is also written to a small SQLite file so the cache survives restarts; lookups
+    that miss in memory fall back to it.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = PROFILE_CACHE_SIZE,
+        ttl: float = PROFILE_TTL_SECONDS,
+        negative_ttl: float = PROFILE_NEGATIVE_TTL_SECONDS,
+        path: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.by_fid = TTLCache(maxsize, ttl, clock)
+        self.by_username = TTLCache(maxsize, ttl, clock)
+        self.disk = _DiskTier(path, maxsize * 2, wall_clock) if path else None
+
+    def _key(self, identifier: Any, by_fid: bool) -> tuple[TTLCache, Hashable, str]:
+        """Return the memory cache, its key and the disk key for an identifier."""
+        if by_fid:
+            return self.by_fid, int(identifier), f"fid:{int(identifier)}"
+        username = str(identifier).lower()
+        return self.by_username, username, f"username:{username}"
+
+    def get(self, identifier: Any, by_fid: bool = True) -> Any:
+        """Look up a profile by fid or username.
+
+        Returns:
+            The cached profile, None if the user is cached as unknown, or MISS.
+
+        """
+        cache, key, disk_key = self._key(identifier, by_fid)
+        profile = cache.get(key, MISS)
+        if profile is MISS and self.disk is not None:
+            profile, remaining = self.disk.get(disk_key)
+            if profile is not MISS:
+                cache.set(key, profile, remaining)
+        return dict(profile) if isinstance(profile, dict) else profile
+
+    def set(self, identifier: Any, profile: Profile, by_fid: bool = True):
+        """Cache the result of looking a user up by fid or username.
+
+        A profile is stored under both its fid and its username; None marks the identifier
+        as an unknown user for `negative_ttl` seconds.
+        """
+        self.set_many([(identifier, profile, by_fid)])
+
+    def set_many(self, entries: Iterable[Entry]):
+        """Cache many lookup results like `set`, writing them to disk in one transaction."""
+        disk_entries = self._set_in_memory(entries)
+        if self.disk is not None and disk_entries:
+            self.disk.set_many(disk_entries)
+
+    async def set_many_async(self, entries: Iterable[Entry]):
+        """Cache many lookup results like `set_many`, from the event loop.
+
+        The memory caches are updated at once; the disk transaction runs in the default
+        executor so the loop is not blocked on SQLite.
+        """
+        disk_entries = self._set_in_memory(entries)
+        if self.disk is not None and disk_entries:
+            await asyncio.get_running_loop().run_in_executor(None, self.disk.set_many, disk_entries)
+
+    def _set_in_memory(self, entries: Iterable[Entry]) -> list[tuple[str, Profile, float]]:
+        """Store lookup results in the memory caches and return the disk entries to write."""
+        disk_entries = []
+        for identifier, profile, by_fid in entries:
+            if profile is None:
+                keys, ttl = [self._key(identifier, by_fid)], self.negative_ttl
+            else:
+                keys, ttl = [self._key(profile["fid"], True)], self.ttl
+                if profile.get("username"):
+                    keys.append(self._key(profile["username"], False))
+            for cache, key, disk_key in keys:
+                cache.set(key, profile, ttl)
+                disk_entries.append((disk_key, profile, ttl))
+        return disk_entries
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return hit/miss counters for each key type and for the disk tier, if any."""
+        stats = {"by_fid": self.by_fid.stats(), "by_username": self.by_username.stats()}
+        if self.disk is not None:
+            lookups = self.disk.hits + self.disk.misses
+            stats["disk"] = {
+                "hits": self.disk.hits,
+                "misses": self.disk.misses,
+                "hit_rate": self.disk.hits / lookups if lookups else 0.0,
+            }
+        return stats
+
+    def close(self):
+        """Close the disk tier, if any."""
+        if self.disk is not None:
+            self.disk.close()
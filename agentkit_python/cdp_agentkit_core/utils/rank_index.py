@@ -0,0 +1,213 @@
+import random
+import threading
+from collections.abc import Iterable
+
+MAX_LEVEL = 32  # Enough levels for far more creators than the campaign will ever see
+
+# An entry as returned by the index: (fid, username, points).
+RankedEntry = tuple[int, str | None, int]
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: tuple | None, level: int):
+        self.key = key
+        self.next: list[_Node | None] = [None] * level
+        # width[i] is how many level-0 steps next[i] skips, which makes positions countable.
+        self.width: list[int] = [1] * level
+
+
+class _IndexableSkiplist:
+    """Sorted set of keys with O(log n) insert, remove, position lookup and indexing."""
+
+    def __init__(self, rng: random.Random | None = None):
+        self.head = _Node(None, MAX_LEVEL)
+        self.level = 1
+        self.size = 0
+        self.rng = rng or random.Random()
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and self.rng.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key: tuple):
+        update = [self.head] * MAX_LEVEL
+        steps = [0] * MAX_LEVEL  # Position of update[i], counted from the head
+        node, position = self.head, 0
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                position += node.width[i]
+                node = node.next[i]
+            update[i], steps[i] = node, position
+
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                self.head.width[i] = self.size + 1
+            self.level = level
+
+        new = _Node(key, level)
+        for i in range(self.level):
+            prev = update[i]
+            if i < level:
+                skipped = position - steps[i]
+                new.next[i] = prev.next[i]
+                new.width[i] = prev.width[i] - skipped
+                prev.next[i] = new
+                prev.width[i] = skipped + 1
+            else:
+                prev.width[i] += 1
+        self.size += 1
+
+    def remove(self, key: tuple) -> bool:
+        update = [self.head] * MAX_LEVEL
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            update[i] = node
+        target = node.next[0]
+        if target is None or target.key != key:
+            return False
+        for i in range(self.level):
+            prev = update[i]
+            if prev.next[i] is target:
+                prev.next[i] = target.next[i]
+                prev.width[i] += target.width[i] - 1
+            else:
+                prev.width[i] -= 1
+        self.size -= 1
+        return True
+
+    def count_less(self, key: tuple) -> int:
+        """Return how many keys sort before `key`."""
+        node, position = self.head, 0
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                position += node.width[i]
+                node = node.next[i]
+        return position
+
+    def slice(self, start: int, count: int) -> list[tuple]:
+        """Return up to `count` keys starting at zero-based position `start`."""
+        if start >= self.size or count <= 0:
+            return []
+        node, position = self.head, -1
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and position + node.width[i] <= start:
+                position += node.width[i]
+                node = node.next[i]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class LeaderboardIndex:
+    """In-memory, thread-safe ranking of creators by all-time score.
+
+    Built from `Database.get_scores` at startup and kept current through
+    `Database.add_score_listener`, it answers top-K, rank-of-fid and page-around-fid in
+    O(log n) without touching SQLite. Ties are ordered by fid, matching the SQL leaderboard.
+    """
+
+    def __init__(self, rng: random.Random | None = None):
+        self._rng = rng
+        self._list = _IndexableSkiplist(rng)
+        self._points: dict[int, int] = {}
+        self._usernames: dict[int, str | None] = {}
+        self._fids_by_username: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of ranked creators."""
+        return self._list.size
+
+    def load(self, rows: Iterable[RankedEntry]):
+        """Replace the whole index with `(fid, username, points)` rows."""
+        with self._lock:
+            self._list = _IndexableSkiplist(self._rng)
+            self._points.clear()
+            self._usernames.clear()
+            self._fids_by_username.clear()
+            for fid, username, points in rows:
+                self._set(fid, username, points)
+
+    def update(self, fid: int, points: int, username: str | None = None):
+        """Set a creator's score, inserting them if they are new to the index."""
+        with self._lock:
+            self._set(fid, username, points)
+
+    def update_many(self, rows: Iterable[RankedEntry]):
+        """Apply `(fid, username, points)` rows; usable directly as a score listener."""
+        with self._lock:
+            for fid, username, points in rows:
+                self._set(fid, username, points)
+
+    def _set(self, fid: int, username: str | None, points: int):
+        previous = self._points.get(fid)
+        if previous != points:
+            if previous is not None:
+                self._list.remove((-previous, fid))
+            self._list.insert((-points, fid))
+            self._points[fid] = points
+        if username is not None:
+            old = self._usernames.get(fid)
+            if old is not None and old != username:
+                self._fids_by_username.pop(old.lower(), None)
+            self._usernames[fid] = username
+            self._fids_by_username[username.lower()] = fid
+        else:
+            self._usernames.setdefault(fid, None)
+
+    def _entries(self, keys: list[tuple]) -> list[RankedEntry]:
+        return [(fid, self._usernames.get(fid), -negated) for negated, fid in keys]
+
+    def top(self, k: int, offset: int = 0) -> list[RankedEntry]:
+        """Return the `k` highest-scoring creators after skipping `offset` of them."""
+        with self._lock:
+            return self._entries(self._list.slice(offset, k))
+
+    def rank(self, fid: int) -> int | None:
+        """Return a creator's 1-based rank, or None if they have no score.
+
+        Creators with equal points share a rank, so the rank is one more than the number
+        of creators with strictly more points.
+        """
+        with self._lock:
+            points = self._points.get(fid)
+            if points is None:
+                return None
+            return self._list.count_less((-points, float("-inf"))) + 1
+
+    def around(self, fid: int, radius: int = 2) -> list[RankedEntry]:
+        """Return the creator and up to `radius` neighbours on either side, best first."""
+        with self._lock:
+            points = self._points.get(fid)
+            if points is None:
+                return []
+            position = self._list.count_less((-points, fid))
+            start = max(position - radius, 0)
+            return self._entries(self._list.slice(start, position - start + radius + 1))
+
+    def position(self, fid: int) -> int | None:
+        """Return a creator's zero-based position in leaderboard order, or None."""
+        with self._lock:
+            points = self._points.get(fid)
+            if points is None:
+                return None
+            return self._list.count_less((-points, fid))
+
+    def points(self, fid: int) -> int | None:
+        """Return a creator's indexed score, or None if they have none."""
+        with self._lock:
+            return self._points.get(fid)
+
+    def find(self, username: str) -> int | None:
+        """Return the fid of an indexed creator by username, ignoring case."""
+        with self._lock:
+            return self._fids_by_username.get(username.lower())
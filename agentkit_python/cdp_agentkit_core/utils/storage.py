@@ -0,0 +1,241 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from typing import Any, NamedTuple, TypedDict
+
+
+class ScoreRow(NamedTuple):
+    """A creator's all-time score."""
+
+    fid: int
+    username: str | None
+    points: int
+
+
+@dataclass(frozen=True, slots=True)
+class PostRow:
+    """A stored post.
+
+    Fields can also be read by key, as in `post["likes"]`, like the dictionaries posts
+    used to be returned as.
+    """
+
+    hash: str
+    fid: int
+    username: str | None
+    text: str | None
+    likes: int | None
+    timestamp: Any
+
+    def __getitem__(self, key: str) -> Any:
+        """Return the field named `key`."""
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+class HighWaterMark(TypedDict):
+    """The newest cast ingested from a feed."""
+
+    hash: str
+    timestamp: str
+
+
+class _BulkWriteCounts(TypedDict):
+    inserted: int
+    updated: int
+    skipped: int
+
+
+class BulkWriteResult(_BulkWriteCounts, total=False):
+    """How many rows a bulk write inserted, updated and skipped.
+
+    `failed` is only present, and True, when the write hit a database error and was rolled
+    back, so that callers can tell a lost write from rows skipped as invalid or unchanged.
+    """
+
+    failed: bool
+
+
+class StorageBackend(ABC):
+    """The storage operations THEO's actions and bot commands rely on.
+
+    `Database` implements them on SQLite and `MemoryStorage` on plain dicts and heaps, for
+    tests and short-lived runs. Anything else a backend offers, such as full-text search or
+    the points ledger, is specific to it. Every implementation is safe to call from several
+    threads, and `AsyncDatabase` accepts any of them.
+    """
+
+    @abstractmethod
+    def close(self):
+        """Releases the backend's resources."""
+
+    @abstractmethod
+    def transaction(self) -> AbstractContextManager[Any]:
+        """Context manager grouping writes; scopes may nest."""
+
+    @abstractmethod
+    def create_tables(self):
+        """Prepare the backend for use."""
+
+    @abstractmethod
+    def add_score_listener(self, callback: Callable[[list[ScoreRow]], Any]):
+        """Register a callback receiving the new totals of users whose score or username changed."""
+
+    @abstractmethod
+    def get_user(self, fid: int) -> dict | None:
+        """Retrieve a user by their Farcaster ID."""
+
+    @abstractmethod
+    def create_user(self, fid: int, username: str):
+        """Create a new user."""
+
+    @abstractmethod
+    def upsert_users_bulk(self, users: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Insert or rename many users."""
+
+    @abstractmethod
+    def get_post(self, hash: str) -> PostRow | None:
+        """Retrieve a post by its hash."""
+
+    @abstractmethod
+    def create_post(
+        self, fid: int, username: str, text: str, likes: int, timestamp: str, hash: str
+    ):
+        """Create a new post."""
+
+    @abstractmethod
+    def create_posts_bulk(self, posts: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Insert many posts, refreshing likes on posts already stored."""
+
+    @abstractmethod
+    def get_post_hashes_for_day(self, day: int | None = None) -> list[str]:
+        """Return the hashes of the posts created on a campaign day."""
+
+    @abstractmethod
+    def record_likes_bulk(
+        self, likes: dict[str, int], sampled_at: Any | None = None
+    ) -> BulkWriteResult:
+        """Store freshly fetched like counts keyed by post hash."""
+
+    @abstractmethod
+    def get_most_liked_posts(
+        self, start_time: Any, limit: int = 3, end_time: Any | None = None
+    ) -> list[PostRow]:
+        """Retrieve the most liked posts created in a time window."""
+
+    @abstractmethod
+    def iter_most_liked_posts(
+        self, start_time: Any, limit: int | None = None, end_time: Any | None = None
+    ) -> Iterator[PostRow]:
+        """Yield the posts created in a time window, most liked first, up to `limit` if given."""
+
+    @abstractmethod
+    def record_nomination(
+        self, nominator_fid: int, nominee_fid: int, post_hash: str, timestamp: str
+    ) -> bool:
+        """Record a nomination if the nominator has quota left; returns whether it was recorded."""
+
+    @abstractmethod
+    def record_nominations_bulk(self, nominations: Iterable[dict[str, Any]]) -> BulkWriteResult:
+        """Record many nominations, skipping duplicates, unknown references and over-quota ones."""
+
+    @abstractmethod
+    def remaining_nominations(
+        self, nominator_fids: Iterable[int], day: int | None = None
+    ) -> dict[int, int]:
+        """Return how many more nominations each user may make on a campaign day."""
+
+    @abstractmethod
+    def check_nomination_quotas(self, nominations: Iterable[dict[str, Any]]) -> list[bool]:
+        """Validate a batch of nominations, in order, against the daily quotas.
+
+        Nominations that would not be recorded anyway do not use up quota.
+        """
+
+    @abstractmethod
+    def get_leaderboard(
+        self, window: str = "all", limit: int = 10, offset: int = 0, day: int | None = None
+    ) -> list[dict]:
+        """Retrieve the leaderboard for a window: "all", "day", "week" or "season"."""
+
+    @abstractmethod
+    def get_scores(self) -> list[ScoreRow]:
+        """Retrieve every creator's all-time score."""
+
+    @abstractmethod
+    def iter_scores(self) -> Iterator[ScoreRow]:
+        """Yield every creator's all-time score, in no particular order."""
+
+    @abstractmethod
+    def define_season(self, name: str, start_day: int, end_day: int):
+        """Define a leaderboard season covering campaign days `start_day` to `end_day`."""
+
+    @abstractmethod
+    def get_daily_leader(self, day: int | None = None) -> PostRow | None:
+        """Retrieve the "Based Creator of the Day" post."""
+
+    @abstractmethod
+    def mark_based_creator_of_the_day(self, fid: int) -> bool:
+        """Make the given user today's "Based Creator of the Day"; returns whether they became it."""
+
+    @abstractmethod
+    def get_high_water_mark(self, feed: str) -> HighWaterMark | None:
+        """Return the newest cast ingested from a feed, or None if it was never polled."""
+
+    @abstractmethod
+    def set_high_water_mark(self, feed: str, hash: str, timestamp: Any):
+        """Record the newest cast ingested from a feed. A mark never moves back in time."""
+
+    def is_valid_username(self, username: str) -> bool:
+        """Check if a username is valid according to Farcaster rules."""
+        return bool(re.fullmatch(r"[a-z0-9]([a-z0-9-]{0,14}[a-z0-9])?", username))
+
+    def format_leaderboard(
+        self, leaderboard_data: list[dict], window: str = "all", offset: int = 0
+    ) -> str:
+        """Format the leaderboard data into a string for display."""
+        titles = {
+            "all": "Leaderboard",
+            "day": "Today",
+            "week": "This Week",
+            "season": "This Season",
+        }
+        leaderboard_string = (
+            f"🏆 Top Creators {titles.get(window, 'Leaderboard')} (Based on Nominations):\n\n"
+        )
+        for i, creator in enumerate(leaderboard_data, start=offset):
+            leaderboard_string += f"{i + 1}. @{creator['username']} - {creator['points']} points\n"
+        leaderboard_string += f"\nNominate your favorite creators by tagging @{os.getenv('THEO_FARCASTER_USERNAME')} in the comments of their posts!"
+        return leaderboard_string
+
+
+STORAGE_BACKENDS = ("sqlite", "memory")
+
+
+def open_storage(backend: str | None = None, db_name: str | None = None) -> StorageBackend:
+    """Open a storage backend by name.
+
+    Args:
+        backend: "sqlite" or "memory". Defaults to the THEO_STORAGE_BACKEND environment
+            variable, or "sqlite" if it is not set.
+        db_name: The SQLite database file. Ignored by the memory backend.
+
+    Raises:
+        ValueError: If `backend` is not one of STORAGE_BACKENDS.
+
+    """
+    backend = (backend or os.getenv("THEO_STORAGE_BACKEND") or "sqlite").lower()
+    if backend == "sqlite":
+        from .database import DATABASE_NAME, Database
+
+        return Database(db_name or DATABASE_NAME)
+    if backend == "memory":
+        from .memory_storage import MemoryStorage
+
+        return MemoryStorage()
+    raise ValueError(f"Unknown storage backend: {backend}")
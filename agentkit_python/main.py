@@ -1,16 +1,21 @@
-import os
 import asyncio
-from dotenv import load_dotenv
-from agentkit_python.cdp_agentkit_core.agent import TheoAgent
-from agentkit_python.cdp_agentkit_core.utils.database import Database
 import datetime
-from telegram import Update
-from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters
+import os
+
+from agentkit_python.cdp_agentkit_core.actions.highlight_creator import HighlightCreator
 
 # Import your custom actions
 from agentkit_python.cdp_agentkit_core.actions.monitor_farcaster import MonitorFarcaster
 from agentkit_python.cdp_agentkit_core.actions.update_leaderboard import UpdateLeaderboard
-from agentkit_python.cdp_agentkit_core.actions.highlight_creator import HighlightCreator
+from agentkit_python.cdp_agentkit_core.agent import TheoAgent
+from agentkit_python.cdp_agentkit_core.utils.async_database import get_async_database
+from agentkit_python.cdp_agentkit_core.utils.database import LEADERBOARD_WINDOWS, Database
+from agentkit_python.cdp_agentkit_core.utils.maintenance import Maintenance
+from agentkit_python.cdp_agentkit_core.utils.points import PointsEngine
+from agentkit_python.cdp_agentkit_core.utils.rank_index import LeaderboardIndex
+from dotenv import load_dotenv
+from telegram import Update
+from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, MessageHandler, filters
 
 # Load environment variables
 load_dotenv()
@@ -20,33 +25,47 @@ last_leaderboard_update = None
 last_highlight_creator_run = None
 
 # Create a database instance
-db = Database()
+db = get_async_database()
+# Points, archiving and file maintenance only exist on the SQLite backend
+sqlite_db = db.db if isinstance(db.db, Database) else None
+points_engine = PointsEngine(sqlite_db) if sqlite_db else None
+maintenance = Maintenance(sqlite_db) if sqlite_db else None
+
+# In-memory all-time ranking, loaded at startup and kept current by the database
+rank_index = LeaderboardIndex()
 
 # Create an instance of THEO globally
 theo = None
 
+
 async def should_update_leaderboard():
-    """Checks if it's time to update the leaderboard."""
+    """Check if it's time to update the leaderboard."""
     global last_leaderboard_update
     now = datetime.datetime.now()
 
-    if last_leaderboard_update is None or (now - last_leaderboard_update) >= datetime.timedelta(hours=4):
+    if last_leaderboard_update is None or (now - last_leaderboard_update) >= datetime.timedelta(
+        hours=4
+    ):
         last_leaderboard_update = now
         return True
     else:
         return False
 
+
 async def should_highlight_creator():
-    """Checks if it's time to highlight the 'Based Creator of the Day'."""
+    """Check if it's time to highlight the 'Based Creator of the Day'."""
     global last_highlight_creator_run
     now = datetime.datetime.now()
 
-    if last_highlight_creator_run is None or (now - last_highlight_creator_run) >= datetime.timedelta(days=1):
+    if last_highlight_creator_run is None or (
+        now - last_highlight_creator_run
+    ) >= datetime.timedelta(days=1):
         last_highlight_creator_run = now
         return True
     else:
         return False
 
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a welcome message when the /start command is issued."""
     await update.message.reply_text(
@@ -55,33 +74,77 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Tag me in comments to nominate creators!"
     )
 
+
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a message when the /help command is issued."""
-    await update.message.reply_text('Here are some commands to get started with: \n /start - starts the bot \n /help - get help \n /leaderboard - display the current leaderboard \n /todayonbase - display the current "Today on Base I created" highlights')
+    help_text = 'Here are some commands to get started with: \n /start - starts the bot \n /help - get help \n /leaderboard [day|week|season] - display the current leaderboard \n /rank <username> - display a creator\'s rank and neighbours \n /todayonbase - display the current "Today on Base I created" highlights'
+    if sqlite_db:
+        help_text += " \n /points - display the top creators by points \n /search <words> - search stored posts (wrap words in quotes to match an exact phrase)"
+    await update.message.reply_text(help_text)
+
 
 async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Displays the current leaderboard."""
-    leaderboard_data = db.get_leaderboard()
-    leaderboard_string = db.format_leaderboard(leaderboard_data)
+    """Display the current leaderboard, optionally for one window: day, week or season."""
+    window = context.args[0].lower() if context.args else "all"
+    if window not in LEADERBOARD_WINDOWS:
+        await update.message.reply_text("Usage: /leaderboard [day|week|season]")
+        return
+    if window == "all":
+        leaderboard_data = [
+            {"username": username, "points": points} for _, username, points in rank_index.top(10)
+        ]
+    else:
+        leaderboard_data = await db.get_leaderboard(window=window)
+    leaderboard_string = db.format_leaderboard(leaderboard_data, window=window)
     await update.message.reply_text(leaderboard_string)
 
+
+async def rank(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Display a creator's all-time rank and the creators ranked around them."""
+    if not context.args:
+        await update.message.reply_text("Usage: /rank <username>")
+        return
+    username = context.args[0].lstrip("@")
+    fid = rank_index.find(username)
+    if fid is None:
+        await update.message.reply_text(f"@{username} is not on the leaderboard yet.")
+        return
+
+    neighbours = rank_index.around(fid, radius=2)
+    first = max(rank_index.position(fid) - 2, 0)
+    rank_string = (
+        f"@{username} is ranked #{rank_index.rank(fid)} with {rank_index.points(fid)} points.\n\n"
+    )
+    for i, (neighbour_fid, neighbour_name, neighbour_points) in enumerate(neighbours):
+        marker = "👉 " if neighbour_fid == fid else ""
+        rank_string += f"{marker}{first + i + 1}. @{neighbour_name} - {neighbour_points} points\n"
+    await update.message.reply_text(rank_string)
+
+
+async def points(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Display the top creators by total points across every campaign rule."""
+    leaderboard_data = await db.get_points_leaderboard()
+    points_string = "🏆 Top Creators by Points:\n\n"
+    for i, creator in enumerate(leaderboard_data):
+        points_string += f"{i + 1}. @{creator['username']} - {creator['points']} points\n"
+    points_string += "\nPost your 'Today on Base I created...' daily, nominate creators and get nominated to earn points!"
+    await update.message.reply_text(points_string)
+
+
 async def today_on_base(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """
-    Displays the current "Today on Base I created" highlights.
+    """Display the current "Today on Base I created" highlights.
+
     Fetches the top 3 most liked "Today on Base I created" posts from the last 24 hours.
     """
     try:
-        # Get the current time
-        now = datetime.datetime.now()
+        # Get the current time in UTC, the timezone post timestamps are stored in
+        now = datetime.datetime.now(datetime.timezone.utc)
 
         # Calculate the start time (24 hours ago)
         start_time = now - datetime.timedelta(days=1)
 
-        # Format the start time as an ISO 8601 string (YYYY-MM-DDTHH:MM:SS)
-        start_time_str = start_time.isoformat()
-
         # Fetch the top 3 most liked posts from the last 24 hours
-        top_posts = db.get_most_liked_posts(start_time_str, limit=3)
+        top_posts = await db.get_most_liked_posts(start_time, limit=3)
 
         if top_posts:
             highlights = "Today on Base I created highlights:\n"
@@ -89,14 +152,46 @@ async def today_on_base(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 highlights += f"• @{post['username']} - {post['text'][:50]}... ({post['likes']} likes)\n"  # Limit text to 50 characters
             await update.message.reply_text(highlights)
         else:
-            await update.message.reply_text("No 'Today on Base I created' highlights found for today.")
+            await update.message.reply_text(
+                "No 'Today on Base I created' highlights found for today."
+            )
 
     except Exception as e:
         print(f"Error in today_on_base: {e}")
         await update.message.reply_text("An error occurred while fetching highlights.")
 
+
+async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Search stored "Today on Base I created" posts.
+
+    Words in quotes are matched as an exact phrase; other words must all appear.
+    """
+    text = " ".join(context.args or []).strip()
+    if not text:
+        await update.message.reply_text('Usage: /search <words> or /search "exact phrase"')
+        return
+
+    try:
+        if len(text) > 1 and text.startswith('"') and text.endswith('"'):
+            posts = await db.search_posts(phrase=text[1:-1], limit=5)
+        else:
+            posts = await db.search_posts(query=text, limit=5)
+
+        if posts:
+            results = f"Posts matching {text}:\n"
+            for post in posts:
+                results += f"• @{post['username']} - {post['text'][:50]}... ({post['likes']} likes)\n"  # Limit text to 50 characters
+            await update.message.reply_text(results)
+        else:
+            await update.message.reply_text(f"No posts found matching {text}.")
+
+    except Exception as e:
+        print(f"Error in search: {e}")
+        await update.message.reply_text("An error occurred while searching posts.")
+
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handles incoming messages and passes them to the agent."""
+    """Handle incoming messages and pass them to the agent."""
     global theo
     if theo:
         response = await theo.handle_message(update.message.text)
@@ -104,28 +199,37 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         await update.message.reply_text("THEO agent is not initialized.")
 
+
 async def monitor_farcaster_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Triggers the MonitorFarcaster action."""
     global monitor_farcaster_action
     await update.message.reply_text("Running MonitorFarcaster action...")
     await monitor_farcaster_action.run()
 
+
 async def update_leaderboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Triggers the UpdateLeaderboard action."""
     global update_leaderboard_action
     await update.message.reply_text("Running UpdateLeaderboard action...")
     await update_leaderboard_action.run()
 
+
 async def highlight_creator_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Triggers the HighlightCreator action."""
     global highlight_creator_action
     await update.message.reply_text("Running HighlightCreator action...")
     await highlight_creator_action.run()
 
+
 async def main():
+    """Start the Telegram bot and THEO's main loop."""
     global theo
     # Initialize database tables
-    db.create_tables()
+    await db.create_tables()
+
+    # Build the in-memory leaderboard and keep it current on every score change
+    await db.run_exclusive(rank_index.load, db.db.iter_scores())
+    db.db.add_score_listener(rank_index.update_many)
 
     # Initialize THEO's actions
     monitor_farcaster_action = MonitorFarcaster()
@@ -133,12 +237,14 @@ async def main():
     highlight_creator_action = HighlightCreator()
 
     # Create an instance of THEO
-    theo = TheoAgent(tools=[
+    theo = TheoAgent(
+        tools=[
             monitor_farcaster_action,
             update_leaderboard_action,
             highlight_creator_action,
-        ])
-    
+        ]
+    )
+
     # Set up Telegram bot application
     telegram_token = os.getenv("TELEGRAM_BOT_TOKEN")
     if telegram_token is None:
@@ -150,7 +256,12 @@ async def main():
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("leaderboard", leaderboard))
+    application.add_handler(CommandHandler("rank", rank))
     application.add_handler(CommandHandler("todayonbase", today_on_base))
+    if sqlite_db:
+        # Points and full-text search only exist on the SQLite backend
+        application.add_handler(CommandHandler("points", points))
+        application.add_handler(CommandHandler("search", search))
     application.add_handler(CommandHandler("monitor", monitor_farcaster_command))
     application.add_handler(CommandHandler("update", update_leaderboard_command))
     application.add_handler(CommandHandler("highlight", highlight_creator_command))
@@ -158,10 +269,7 @@ async def main():
 
     # Start polling for updates from Telegram
     print("Starting Telegram bot polling...")
-    application.run_polling(
-        allowed_updates=Update.ALL_TYPES,
-        close_loop=False
-    )
+    application.run_polling(allowed_updates=Update.ALL_TYPES, close_loop=False)
 
     # Start THEO's main loop
     while True:
@@ -170,12 +278,21 @@ async def main():
             await monitor_farcaster_action.run()
 
             # Update and post the leaderboard every 4 hours
-            if await should_update_leaderboard(): 
+            if await should_update_leaderboard():
                 await update_leaderboard_action.run()
 
             # Highlight the "Based Creator of the Day" daily
             if await should_highlight_creator():
                 await highlight_creator_action.run()
+                if sqlite_db:
+                    # Snapshot the points totals so they can be rebuilt without a full replay
+                    await db.batch_writer.submit(points_engine.snapshot)
+                    # Move closed days out of the main database file
+                    await db.archive_closed_days()
+                    # Back up, vacuum and analyze the database files in time-bounded steps,
+                    # letting queued writes through between them
+                    for report in await maintenance.run_async(db.run_exclusive):
+                        print(f"Maintenance report: {report}")
 
             # Wait for a certain period (e.g., 1 hour)
             await asyncio.sleep(3600)
@@ -184,5 +301,6 @@ async def main():
             print(f"An error occurred in the main loop: {e}")
             await asyncio.sleep(60)  # Wait for 1 minute before retrying
 
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
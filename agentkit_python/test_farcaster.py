@@ -1,17 +1,21 @@
-import os
 import asyncio
-from dotenv import load_dotenv
+import os
+
 from agentkit_python.cdp_agentkit_core.utils.farcaster import (
     fetch_casts,
     fetch_mentions_for_fid,
     fetch_user_data,
     get_cast,
 )
+from agentkit_python.cdp_agentkit_core.utils.http_client import close_http_client
+from dotenv import load_dotenv
 
 # Load environment variables (make sure you have NEYNAR_API_KEY set)
 load_dotenv()
 
+
 async def test_fetch_casts():
+    """Fetch recent casts from the live API."""
     api_key = os.getenv("NEYNAR_API_KEY")
     if api_key is None:
         print("Error: NEYNAR_API_KEY environment variable not set.")
@@ -21,7 +25,9 @@ async def test_fetch_casts():
     casts = await fetch_casts(api_key, "thecreators", keyword_filter="FRIEND")
     print("Fetched casts:", casts)
 
+
 async def test_fetch_mentions():
+    """Fetch THEO's recent mentions from the live API."""
     api_key = os.getenv("NEYNAR_API_KEY")
     fid = os.getenv("THEO_FARCASTER_FID")
     if api_key is None or fid is None:
@@ -38,7 +44,9 @@ async def test_fetch_mentions():
     mentions = await fetch_mentions_for_fid(api_key, fid)
     print("Fetched mentions:", mentions)
 
+
 async def test_fetch_user_data():
+    """Look up a user on the live API."""
     api_key = os.getenv("NEYNAR_API_KEY")
     if api_key is None:
         print("Error: NEYNAR_API_KEY environment variable not set.")
@@ -47,7 +55,9 @@ async def test_fetch_user_data():
     print("\nTesting fetch_user_data...")
 
     # Test fetching by username
-    user_data = await fetch_user_data(api_key, "tonchu", by_fid=False)  # Replace with a valid username for testing
+    user_data = await fetch_user_data(
+        api_key, "tonchu", by_fid=False
+    )  # Replace with a valid username for testing
     print("User data (by username):", user_data)
 
     # Test fetching by FID
@@ -55,7 +65,9 @@ async def test_fetch_user_data():
     user_data_by_fid = await fetch_user_data(api_key, fid)
     print("User data (by FID):", user_data_by_fid)
 
+
 async def test_get_cast():
+    """Fetch a single cast from the live API."""
     api_key = os.getenv("NEYNAR_API_KEY")
     if api_key is None:
         print("Error: NEYNAR_API_KEY environment variable not set.")
@@ -68,11 +80,15 @@ async def test_get_cast():
     cast = await get_cast(api_key, cast_hash)
     print("Fetched cast:", cast)
 
+
 async def main():
+    """Run every live API check in turn."""
     await test_fetch_casts()
     await test_fetch_mentions()
     await test_fetch_user_data()
     await test_get_cast()
+    await close_http_client()
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
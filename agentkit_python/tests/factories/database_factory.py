@@ -0,0 +1,21 @@
+import pytest
+
+from cdp_agentkit_core.utils.database import Database
+
+
+@pytest.fixture
+def database_factory(tmp_path):
+    """Create and return a factory for Database fixtures backed by a temporary file."""
+    databases = []
+
+    def _create_database(db_name="theo_test.db", create_tables=True):
+        db = Database(str(tmp_path / db_name))
+        if create_tables:
+            db.create_tables()
+        databases.append(db)
+        return db
+
+    yield _create_database
+
+    for db in databases:
+        db.close()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+
+from cdp_agentkit_core.utils.async_database import (
+    MAINTENANCE_METHODS,
+    READ_METHODS,
+    WRITE_METHODS,
+    AsyncDatabase,
+    get_async_database,
+)
+from cdp_agentkit_core.utils.database import Database
+
+
+def test_async_database_round_trip(database_factory):
+    """Test that writes and reads work through the async facade."""
+    db = database_factory()
+
+    async def scenario():
+        async with AsyncDatabase(db=db) as adb:
+            await adb.create_user(1, "alice")
+            return await adb.get_user(1)
+
+    assert asyncio.run(scenario()) == {"fid": 1, "username": "alice"}
+
+
+def test_async_database_runs_off_event_loop_thread(database_factory):
+    """Test that queries run on the reader and writer threads, not the event loop thread."""
+    db = database_factory()
+    threads = {}
+    original_get_user = db.get_user
+    original_create_user = db.create_user
+
+    def get_user(fid):
+        threads["read"] = threading.current_thread().name
+        return original_get_user(fid)
+
+    def create_user(fid, username):
+        threads["write"] = threading.current_thread().name
+        return original_create_user(fid, username)
+
+    db.get_user = get_user
+    db.create_user = create_user
+
+    async def scenario():
+        async with AsyncDatabase(db=db) as adb:
+            await adb.create_user(1, "alice")
+            await adb.get_user(1)
+
+    asyncio.run(scenario())
+
+    assert threads["read"].startswith("theo-db-reader")
+    assert threads["write"].startswith("theo-db-writer")
+
+
+def test_async_database_passes_through_helpers(database_factory):
+    """Test that non-query helpers stay synchronous."""
+    adb = AsyncDatabase(db=database_factory())
+
+    assert adb.is_valid_username("alice") is True
+    asyncio.run(adb.close())
+
+
+def test_async_database_covers_query_methods():
+    """Test that read, write and maintenance method lists only name real Database methods."""
+    for name in READ_METHODS | WRITE_METHODS | MAINTENANCE_METHODS:
+        assert callable(getattr(Database, name))
+    assert not READ_METHODS & WRITE_METHODS
+    assert not (READ_METHODS | WRITE_METHODS) & MAINTENANCE_METHODS
+
+
+def test_batch_writer_groups_concurrent_writes(database_factory):
+    """Test that concurrent mutations share a few transactions and each caller gets a result."""
+    db = database_factory()
+
+    async def scenario():
+        async with AsyncDatabase(db=db, max_batch_size=50) as adb:
+            results = await asyncio.gather(
+                *(
+                    adb.upsert_users_bulk([{"fid": fid, "username": f"user{fid}"}])
+                    for fid in range(1, 101)
+                )
+            )
+            return results, adb.batch_writer.batches
+
+    results, batches = asyncio.run(scenario())
+
+    assert all(result["inserted"] == 1 for result in results)
+    assert batches == 2
+    assert db.get_user(100) == {"fid": 100, "username": "user100"}
+
+
+def test_batch_writer_isolates_failures(database_factory):
+    """Test that a failing mutation only fails its own caller."""
+    db = database_factory()
+
+    def explode():
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO users (fid, username) VALUES (2, 'bob')")
+            raise RuntimeError("boom")
+
+    async def scenario():
+        adb = AsyncDatabase(db=db)
+        ok = adb.create_user(1, "alice")
+        bad = adb.batch_writer.submit(explode)
+        results = await asyncio.gather(ok, bad, return_exceptions=True)
+        await adb.close()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results[0] is None
+    assert isinstance(results[1], RuntimeError)
+    assert db.get_user(1) == {"fid": 1, "username": "alice"}
+    assert db.get_user(2) is None
+
+
+def test_get_async_database_is_shared(tmp_path):
+    """Test that every caller gets the same instance, and so the same writer."""
+    db_name = str(tmp_path / "theo_test.db")
+
+    assert get_async_database(db_name) is get_async_database(db_name)
+
+
+def test_maintenance_methods_run_outside_batches(database_factory):
+    """Test that archiving, which attaches files, runs on the writer thread outside a batch."""
+    adb = AsyncDatabase(db=database_factory())
+
+    async def scenario():
+        await adb.upsert_users_bulk([{"fid": 1, "username": "alice"}])
+        return await adb.archive_closed_days()
+
+    assert asyncio.run(scenario()) == {"nominations": 0, "posts": 0, "post_likes_history": 0}
+    asyncio.run(adb.close())
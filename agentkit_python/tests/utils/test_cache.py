@@ -0,0 +1,89 @@
+from cdp_agentkit_core.utils.cache import TTLCache
+
+
+class FakeClock:
+    """Manually advanced clock for expiry tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current fake time."""
+        return self.now
+
+
+def test_cache_hit_and_miss_counters():
+    """Test that lookups are counted as hits or misses."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1}
+
+
+def test_cache_entries_expire():
+    """Test that entries are dropped once their TTL has passed."""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 59
+    assert cache.get("a") == 1
+    clock.now = 60
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the oldest untouched entry is evicted when the cache is full."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_distinguishes_stored_none():
+    """Test that a cached None can be told apart from a miss with a sentinel."""
+    missing = object()
+    cache = TTLCache()
+    cache.set("a", None)
+
+    assert cache.get("a", missing) is None
+    assert cache.get("b", missing) is missing
+
+
+def test_cache_refuses_fills_raced_by_an_invalidation():
+    """Test that a value read before its key was invalidated is not stored."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.set("a", "stale", since=generation)
+    cache.set("b", 2, since=generation)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    generation = cache.generation()
+    cache.set("a", "fresh", since=generation)
+    assert cache.get("a") == "fresh"
+
+
+def test_cache_refuses_fills_it_can_no_longer_check():
+    """Test that fills older than a clear or a forgotten invalidation are dropped."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation()
+    cache.clear()
+    cache.set("a", 1, since=generation)
+    assert cache.get("a") is None
+
+    generation = cache.generation()
+    for key in ("a", "b", "c"):
+        cache.invalidate(key)
+    cache.set("a", 1, since=generation)
+    assert cache.get("a") is None
@@ -0,0 +1,863 @@
+import os
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from cdp_agentkit_core.utils.database import (
+    FARCASTER_EPOCH_SECONDS,
+    LEADERBOARD_QUERY,
+    MIGRATIONS,
+    MS_PER_DAY,
+    ConnectionPool,
+    Database,
+    current_day,
+    day_bucket,
+    day_to_date,
+    to_epoch_ms,
+)
+
+
+def test_connection_is_reused_within_thread(database_factory):
+    """Test that repeated calls on one thread share a single pooled connection."""
+    db = database_factory()
+
+    first = db.connect()
+    db.get_user(1)
+    db.create_user(1, "alice")
+
+    assert db.connect() is first
+    assert db.get_user(1) == {"fid": 1, "username": "alice"}
+
+
+def test_connections_are_per_thread(database_factory):
+    """Test that each thread gets its own pooled connection."""
+    db = database_factory()
+    main_conn = db.connect()
+    seen = []
+
+    thread = threading.Thread(target=lambda: seen.append(db.connect()))
+    thread.start()
+    thread.join()
+
+    assert seen[0] is not main_conn
+
+
+def test_foreign_keys_enabled_on_pooled_connection(database_factory):
+    """Test that pooled connections enforce foreign keys."""
+    db = database_factory()
+
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_transaction_rolls_back_on_error(database_factory):
+    """Test that a failing transaction scope leaves no partial writes."""
+    db = database_factory()
+
+    with pytest.raises(RuntimeError), db.transaction() as conn:
+        conn.execute("INSERT INTO users (fid, username) VALUES (1, 'alice')")
+        raise RuntimeError("boom")
+
+    assert db.get_user(1) is None
+
+
+def test_nested_transaction_uses_savepoint(database_factory):
+    """Test that an inner scope failure only discards the inner work."""
+    db = database_factory()
+
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO users (fid, username) VALUES (1, 'alice')")
+        with pytest.raises(RuntimeError), db.transaction() as inner:
+            inner.execute("INSERT INTO users (fid, username) VALUES (2, 'bob')")
+            raise RuntimeError("boom")
+
+    assert db.get_user(1) == {"fid": 1, "username": "alice"}
+    assert db.get_user(2) is None
+
+
+def test_close_reopens_lazily(tmp_path):
+    """Test that closing the pool does not break later calls."""
+    with Database(str(tmp_path / "theo_test.db")) as db:
+        db.create_tables()
+        first = db.connect()
+        db.close()
+
+        db.create_user(1, "alice")
+
+        assert db.connect() is not first
+        assert db.get_user(1) == {"fid": 1, "username": "alice"}
+
+
+def test_pool_tracks_transaction_depth(tmp_path):
+    """Test that in_transaction reflects the open scopes on this thread."""
+    pool = ConnectionPool(str(tmp_path / "theo_test.db"))
+
+    assert not pool.in_transaction()
+    with pool.transaction():
+        assert pool.in_transaction()
+    assert not pool.in_transaction()
+    pool.close_all()
+
+
+def test_migrations_record_schema_version(database_factory):
+    """Test that create_tables applies every migration exactly once."""
+    db = database_factory()
+
+    assert db.schema_version() == MIGRATIONS[-1][0]
+    assert db.migrate() == []
+
+
+def test_migrate_to_target_version(database_factory):
+    """Test that migrations can stop at an intermediate version and resume later."""
+    db = database_factory(create_tables=False)
+
+    assert db.migrate(target=1) == [1]
+    assert db.schema_version() == 1
+    assert 2 in db.migrate()
+
+
+def test_hot_queries_use_indexes(database_factory):
+    """Test that the leaderboard and highlight queries avoid full table scans."""
+    db = database_factory()
+
+    assert db.check_query_plans() == []
+
+
+def test_check_query_plans_flags_table_scans(database_factory):
+    """Test that a dropped index shows up as a query plan regression."""
+    db = database_factory()
+    with db.transaction() as conn:
+        conn.execute("DROP INDEX idx_posts_timestamp_ms_likes")
+
+    assert db.check_query_plans() == ["most_liked_posts: SCAN posts"]
+
+
+def test_archiving_looks_up_nominations_by_post(database_factory):
+    """Test that checking whether a post is still nominated does not scan every nomination."""
+    db = database_factory()
+    with db.transaction() as conn:
+        conn.execute("DROP INDEX idx_nominations_post_hash")
+
+    assert db.check_query_plans() == [
+        "archivable_posts: SCAN n USING COVERING INDEX sqlite_autoindex_nominations_1"
+    ]
+
+
+def _post(hash, fid=1, username="alice", likes=0, timestamp="2025-01-01T00:00:00Z"):
+    return {
+        "hash": hash,
+        "fid": fid,
+        "username": username,
+        "text": "Today on Base I created...",
+        "likes": likes,
+        "timestamp": timestamp,
+    }
+
+
+# Rows written by a database still on schema version 2.
+_VERSION_2_ROWS = [
+    "INSERT INTO users (fid, username) VALUES (1, 'alice'), (2, 'bob')",
+    """
+    INSERT INTO posts (hash, fid, username, text, likes, timestamp)
+    VALUES ('0x1', 1, 'alice', 'Today on Base I created...', 3, '2025-01-01T00:00:00.000Z')
+    """,
+    """
+    INSERT INTO nominations (nominator_fid, nominee_fid, post_hash, timestamp)
+    VALUES (2, 1, '0x1', '2025-01-02T01:00:00Z')
+    """,
+]
+
+
+def test_upsert_users_bulk_counts(database_factory):
+    """Test that bulk user upserts report inserted, updated and skipped rows."""
+    db = database_factory()
+    db.create_user(1, "alice")
+
+    result = db.upsert_users_bulk(
+        [
+            {"fid": 1, "username": "alice"},
+            {"fid": 2, "username": "bob"},
+            {"fid": 3, "username": "Not Valid"},
+            {"fid": 1, "username": "alice2"},
+        ]
+    )
+
+    assert result == {"inserted": 1, "updated": 1, "skipped": 2}
+    assert db.get_user(1) == {"fid": 1, "username": "alice2"}
+    assert db.get_user(2) == {"fid": 2, "username": "bob"}
+
+
+def test_upsert_users_bulk_skips_taken_username(database_factory):
+    """Test that a new user whose username is taken is skipped without failing the batch."""
+    db = database_factory()
+    db.create_user(1, "alice")
+
+    result = db.upsert_users_bulk(
+        [{"fid": 2, "username": "alice"}, {"fid": 3, "username": "carol"}]
+    )
+
+    assert result == {"inserted": 1, "updated": 0, "skipped": 1}
+    assert db.get_user(2) is None
+
+
+def test_upsert_users_bulk_skips_rename_to_taken_username(database_factory):
+    """Test that renaming a user to another user's username is skipped without failing the batch."""
+    db = database_factory()
+    db.upsert_users_bulk([{"fid": 1, "username": "alice"}, {"fid": 2, "username": "bob"}])
+
+    result = db.upsert_users_bulk(
+        [{"fid": 2, "username": "alice"}, {"fid": 1, "username": "alice2"}]
+    )
+
+    assert result == {"inserted": 0, "updated": 1, "skipped": 1}
+    assert db.get_user(2) == {"fid": 2, "username": "bob"}
+
+
+def test_create_posts_bulk_counts(database_factory):
+    """Test that bulk post upserts refresh likes and skip unknown authors."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    db.create_posts_bulk([_post("0x1", likes=1)])
+
+    result = db.create_posts_bulk(
+        [_post("0x1", likes=5), _post("0x2"), _post("0x3", fid=99, username="ghost"), _post("0x2")]
+    )
+
+    assert result == {"inserted": 1, "updated": 1, "skipped": 2}
+    assert db.get_post("0x1")["likes"] == 5
+    assert db.get_post("0x3") is None
+
+
+def test_failed_bulk_write_is_marked_failed(database_factory):
+    """Test that a bulk write rolled back on a database error says so, unlike ordinary skips."""
+    db = database_factory()
+    db.create_user(1, "alice")
+
+    result = db.create_posts_bulk([_post("0x1"), {**_post("0x2"), "text": {"not": "bindable"}}])
+
+    assert result == {"inserted": 0, "updated": 0, "skipped": 2, "failed": True}
+    assert db.get_post("0x1") is None
+    assert "failed" not in db.create_posts_bulk([_post("0x3", fid=99, username="ghost")])
+
+
+def test_record_nominations_bulk_counts(database_factory):
+    """Test that bulk nominations skip duplicates and unknown references."""
+    db = database_factory()
+    db.upsert_users_bulk([{"fid": 1, "username": "alice"}, {"fid": 2, "username": "bob"}])
+    db.create_posts_bulk([_post("0x1")])
+    nomination = {
+        "nominator_fid": 2,
+        "nominee_fid": 1,
+        "post_hash": "0x1",
+        "timestamp": "2025-01-01T01:00:00Z",
+    }
+
+    result = db.record_nominations_bulk(
+        [nomination, nomination, {**nomination, "post_hash": "0xmissing"}]
+    )
+
+    assert result == {"inserted": 1, "updated": 0, "skipped": 2}
+    assert db.get_leaderboard() == [{"username": "alice", "points": 1}]
+
+
+def test_bulk_writes_use_one_transaction(database_factory):
+    """Test that a bulk write commits once rather than once per row."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    commits = []
+    db.connect().set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+
+    db.create_posts_bulk(_post(f"0x{i}") for i in range(100))
+
+    assert commits == ["COMMIT"]
+
+
+def test_scores_follow_nominations(database_factory):
+    """Test that the materialized scores table is updated as nominations arrive."""
+    db = database_factory()
+    db.upsert_users_bulk(
+        [
+            {"fid": 1, "username": "alice"},
+            {"fid": 2, "username": "bob"},
+            {"fid": 3, "username": "carol"},
+        ]
+    )
+    db.create_posts_bulk([_post("0x1"), _post("0x2", fid=2, username="bob")])
+
+    db.record_nomination(2, 1, "0x1", "2025-01-01T01:00:00Z")
+    db.record_nomination(3, 1, "0x1", "2025-01-01T01:00:00Z")
+    db.record_nomination(1, 2, "0x2", "2025-01-01T01:00:00Z")
+    db.record_nomination(1, 2, "0x2", "2025-01-01T01:00:00Z")  # duplicate, rejected
+
+    assert db.get_leaderboard() == [
+        {"username": "alice", "points": 2},
+        {"username": "bob", "points": 1},
+    ]
+
+
+def test_scores_backfilled_by_migration(database_factory):
+    """Test that upgrading an existing database seeds scores from past nominations."""
+    db = database_factory(create_tables=False)
+    db.migrate(target=2)
+    with db.transaction() as conn:
+        for statement in _VERSION_2_ROWS:
+            conn.execute(statement)
+
+    db.migrate()
+
+    assert db.get_leaderboard() == [{"username": "alice", "points": 1}]
+
+
+def test_leaderboard_reads_scores_index(database_factory):
+    """Test that the leaderboard no longer aggregates the nominations table."""
+    db = database_factory()
+
+    plan = db.explain_query_plan(LEADERBOARD_QUERY, (10, 0))
+
+    assert "SCAN scores USING COVERING INDEX idx_scores_points" in plan
+    assert not any("nominations" in detail for detail in plan)
+
+
+def test_get_user_served_from_cache(database_factory):
+    """Test that a user written through create_user is read back without touching SQLite."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    statements = []
+    db.connect().set_trace_callback(statements.append)
+
+    assert db.get_user(1) == {"fid": 1, "username": "alice"}
+    assert db.get_user(1) == {"fid": 1, "username": "alice"}
+    assert statements == []
+    assert db.cache_stats()["users"]["hits"] == 2
+
+
+def test_get_post_read_through_and_bulk_invalidation(database_factory):
+    """Test that posts are cached on read and refreshed after a bulk likes update."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    db.create_posts_bulk([_post("0x1", likes=1)])
+
+    assert db.get_post("0x1")["likes"] == 1
+    db.create_posts_bulk([_post("0x1", likes=7)])
+
+    assert db.get_post("0x1")["likes"] == 7
+    assert db.cache_stats()["posts"] == {"hits": 0, "misses": 2, "hit_rate": 0.0, "size": 1}
+
+
+def test_bulk_invalidation_waits_for_outer_commit(database_factory):
+    """Test that a row re-cached by a reader while a batch is still open is dropped on commit."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    db.create_posts_bulk([_post("0x1", likes=1)])
+    stale = db.get_post("0x1")
+
+    with db.transaction():
+        db.create_posts_bulk([_post("0x1", likes=7)])
+        db.record_likes_bulk({"0x1": 9})
+        # A reader thread still sees the committed row and caches it again.
+        db.post_cache.set("0x1", stale)
+
+    assert db.get_post("0x1")["likes"] == 9
+
+
+def test_read_through_fill_raced_by_a_commit_is_dropped(database_factory):
+    """Test that a reader caching a row it read before a newer row was committed is turned away."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    db.create_posts_bulk([_post("0x1", likes=1)])
+    fill = db.post_cache.set
+
+    def set_after_commit(key, value, ttl=None, since=None):
+        # The writer commits between the reader's query and its cache fill.
+        db.post_cache.set = fill
+        db.record_likes_bulk({"0x1": 9})
+        fill(key, value, ttl, since)
+
+    db.post_cache.set = set_after_commit
+    assert db.get_post("0x1")["likes"] == 1
+
+    assert db.get_post("0x1")["likes"] == 9
+
+
+def test_cached_rows_are_copies(database_factory):
+    """Test that mutating a returned row does not corrupt the cache."""
+    db = database_factory()
+    db.create_user(1, "alice")
+
+    db.get_user(1)["username"] = "mallory"
+
+    assert db.get_user(1) == {"fid": 1, "username": "alice"}
+
+
+def test_to_epoch_ms_formats():
+    """Test that every timestamp format seen from Farcaster converts to epoch milliseconds."""
+    expected = 1_735_689_600_000  # 2025-01-01T00:00:00Z
+
+    assert to_epoch_ms("2025-01-01T00:00:00.000Z") == expected
+    assert to_epoch_ms("2025-01-01T01:00:00+01:00") == expected
+    assert to_epoch_ms(datetime(2025, 1, 1, tzinfo=timezone.utc)) == expected
+    assert to_epoch_ms(expected) == expected
+    assert to_epoch_ms(expected // 1000) == expected
+    assert to_epoch_ms(expected // 1000 - FARCASTER_EPOCH_SECONDS) == expected
+    assert to_epoch_ms("not a timestamp") is None
+    assert day_bucket(expected) == day_bucket(expected + MS_PER_DAY - 1) == 20089
+
+
+def test_epoch_columns_backfilled_by_migration(database_factory):
+    """Test that upgrading an existing database fills the epoch and day columns."""
+    db = database_factory(create_tables=False)
+    db.migrate(target=2)
+    with db.transaction() as conn:
+        for statement in _VERSION_2_ROWS:
+            conn.execute(statement)
+
+    db.migrate()
+
+    with db.connection() as conn:
+        post = conn.execute("SELECT timestamp_ms, day FROM posts").fetchone()
+        nomination = conn.execute("SELECT timestamp_ms, day FROM nominations").fetchone()
+    assert post == (1_735_689_600_000, 20089)
+    assert nomination == (1_735_779_600_000, 20090)
+
+
+def test_most_liked_posts_uses_exact_window(database_factory):
+    """Test that the most liked posts are selected by epoch range, whatever the text format."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    db.create_posts_bulk(
+        [
+            _post("0x1", likes=9, timestamp="2024-12-31T23:59:59.999Z"),
+            _post("0x2", likes=5, timestamp="2025-01-01T00:00:00.000Z"),
+            _post("0x3", likes=7, timestamp="2025-01-01T12:00:00+00:00"),
+            _post("0x4", likes=8, timestamp="2025-01-02T00:00:00Z"),
+        ]
+    )
+
+    posts = db.get_most_liked_posts(
+        datetime(2025, 1, 1, tzinfo=timezone.utc), end_time="2025-01-02T00:00:00Z"
+    )
+
+    assert [post["hash"] for post in posts] == ["0x3", "0x2"]
+
+
+def test_daily_leader_only_considers_that_day(database_factory):
+    """Test that the daily leader is the creator's most liked post from that day."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    today = current_day()
+    today_ms = today * MS_PER_DAY
+    db.create_posts_bulk(
+        [
+            _post("0xold", likes=100, timestamp=today_ms - MS_PER_DAY),
+            _post("0xnew", likes=3, timestamp=today_ms + 1),
+        ]
+    )
+    db.mark_based_creator_of_the_day(1)
+
+    assert db.get_daily_leader()["hash"] == "0xnew"
+    assert db.get_daily_leader(day=today - 1) is None
+
+
+def test_past_winner_can_win_again(database_factory):
+    """Test that yesterday's Based Creator of the Day can be marked again today."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    today = current_day()
+    db.create_posts_bulk(
+        [
+            _post("0xold", timestamp=(today - 1) * MS_PER_DAY),
+            _post("0xnew", timestamp=today * MS_PER_DAY),
+        ]
+    )
+    with db.transaction() as conn:
+        conn.execute(
+            "INSERT INTO based_creator_of_day (fid, date) VALUES (1, ?)", (day_to_date(today - 1),)
+        )
+
+    assert db.mark_based_creator_of_the_day(1) is True
+    assert db.get_daily_leader()["hash"] == "0xnew"
+    assert db.get_daily_leader(day=today - 1)["hash"] == "0xold"
+
+
+def _search_fixture(db):
+    db.upsert_users_bulk([{"fid": 1, "username": "alice"}, {"fid": 2, "username": "bob"}])
+    day_ms = 20089 * MS_PER_DAY
+    db.create_posts_bulk(
+        [
+            {**_post("0x1", timestamp=day_ms), "text": "Today on Base I created a pixel art NFT"},
+            {
+                **_post("0x2", fid=2, username="bob", timestamp=day_ms + 1),
+                "text": "Today on Base I built a pixel game",
+            },
+            {
+                **_post("0x3", timestamp=day_ms + MS_PER_DAY),
+                "text": "Art created today, pixel perfect",
+            },
+        ]
+    )
+
+
+def test_search_posts_by_words_and_phrase(database_factory):
+    """Test that word search matches in any order and phrase search matches in order."""
+    db = database_factory()
+    _search_fixture(db)
+
+    assert {post["hash"] for post in db.search_posts(query="pixel art")} == {"0x1", "0x3"}
+    assert [post["hash"] for post in db.search_posts(phrase="pixel art")] == ["0x1"]
+
+
+def test_search_posts_filters_by_creator_and_day(database_factory):
+    """Test that text search can be narrowed to one creator or one day."""
+    db = database_factory()
+    _search_fixture(db)
+
+    assert {post["hash"] for post in db.search_posts(query="pixel", fid=1)} == {"0x1", "0x3"}
+    assert {post["hash"] for post in db.search_posts(query="pixel", day=20089)} == {"0x1", "0x2"}
+    assert [post["hash"] for post in db.search_posts(day=20089)] == ["0x2", "0x1"]
+
+
+def test_search_posts_treats_input_as_text(database_factory):
+    """Test that FTS5 operators in user input are searched literally rather than parsed."""
+    db = database_factory()
+    _search_fixture(db)
+
+    assert db.search_posts(query='pixel" OR "game') == []
+    assert db.search_posts(query="NEAR(") == []
+
+
+def test_search_index_follows_post_changes(database_factory):
+    """Test that the index is kept in sync with updated and deleted posts."""
+    db = database_factory()
+    _search_fixture(db)
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE posts SET text = 'Today on Base I painted' WHERE hash = '0x2'")
+        conn.execute("DELETE FROM posts WHERE hash = '0x3'")
+
+    assert [post["hash"] for post in db.search_posts(query="pixel")] == ["0x1"]
+    assert [post["hash"] for post in db.search_posts(query="painted")] == ["0x2"]
+
+
+def _nominate_on_days(db, nominations):
+    """Record (nominator_fid, nominee_fid, day) nominations, one post per nominee and day."""
+    fids = {fid for nomination in nominations for fid in nomination[:2]}
+    db.upsert_users_bulk({"fid": fid, "username": f"user{fid}"} for fid in fids)
+    db.create_posts_bulk(
+        _post(
+            f"0x{nominee}-{day}", fid=nominee, username=f"user{nominee}", timestamp=day * MS_PER_DAY
+        )
+        for _, nominee, day in nominations
+    )
+    db.record_nominations_bulk(
+        {
+            "nominator_fid": nominator,
+            "nominee_fid": nominee,
+            "post_hash": f"0x{nominee}-{day}",
+            "timestamp": day * MS_PER_DAY + 1,
+        }
+        for nominator, nominee, day in nominations
+    )
+
+
+# 2025-01-06 is a Monday.
+MONDAY = 20094
+
+
+def test_windowed_leaderboards(database_factory):
+    """Test that day and week boards only count nominations inside their window."""
+    db = database_factory()
+    _nominate_on_days(
+        db,
+        [
+            (2, 1, MONDAY - 1),  # previous week
+            (3, 1, MONDAY - 1),
+            (3, 2, MONDAY),
+            (4, 2, MONDAY + 2),
+            (5, 3, MONDAY + 2),
+        ],
+    )
+
+    assert db.get_leaderboard(window="day", day=MONDAY + 2) == [
+        {"username": "user2", "points": 1},
+        {"username": "user3", "points": 1},
+    ]
+    assert db.get_leaderboard(window="week", day=MONDAY + 6) == [
+        {"username": "user2", "points": 2},
+        {"username": "user3", "points": 1},
+    ]
+    assert db.get_leaderboard(window="week", day=MONDAY - 1) == [{"username": "user1", "points": 2}]
+    assert db.get_leaderboard()[0] == {"username": "user1", "points": 2}
+
+
+def test_leaderboard_paging(database_factory):
+    """Test that limit and offset page through the board in rank order."""
+    db = database_factory()
+    _nominate_on_days(
+        db, [(10 + nominee, nominee, MONDAY) for nominee in range(1, 6)] + [(20, 5, MONDAY)]
+    )
+
+    page = db.get_leaderboard(window="day", day=MONDAY, limit=2, offset=1)
+
+    assert page == [{"username": "user1", "points": 1}, {"username": "user2", "points": 1}]
+    assert (
+        db.format_leaderboard(page, window="day", offset=1).splitlines()[2]
+        == "2. @user1 - 1 points"
+    )
+
+
+def test_season_leaderboard(database_factory):
+    """Test that seasons roll up past nominations on definition and new ones as they arrive."""
+    db = database_factory()
+    _nominate_on_days(db, [(2, 1, MONDAY), (3, 1, MONDAY + 10)])
+
+    db.define_season("s1", MONDAY, MONDAY + 6)
+    assert db.get_leaderboard(window="season", day=MONDAY + 1) == [
+        {"username": "user1", "points": 1}
+    ]
+
+    _nominate_on_days(db, [(4, 1, MONDAY + 3)])
+    assert db.get_leaderboard(window="season", day=MONDAY + 1) == [
+        {"username": "user1", "points": 2}
+    ]
+    assert db.get_leaderboard(window="season", day=MONDAY + 10) == []
+
+
+def test_leaderboard_rejects_unknown_window(database_factory):
+    """Test that an unknown window is reported rather than silently ignored."""
+    db = database_factory()
+
+    with pytest.raises(ValueError):
+        db.get_leaderboard(window="month")
+
+
+def test_score_listeners_see_committed_changes(database_factory):
+    """Test that listeners get new scores after commit and nothing for rolled-back ones."""
+    db = database_factory()
+    changes = []
+    db.add_score_listener(changes.extend)
+
+    _nominate_on_days(db, [(2, 1, MONDAY), (3, 1, MONDAY)])
+    assert changes == [(1, "user1", 2)]
+    assert sorted(db.get_scores()) == [(1, "user1", 2)]
+
+    changes.clear()
+    with pytest.raises(RuntimeError), db.transaction():
+        db.create_user(4, "user4")
+        db.record_nomination(4, 1, f"0x1-{MONDAY}", "2025-01-06T00:00:00Z")
+        assert db.get_scores() == [(1, "user1", 3)]
+        raise RuntimeError("abort")
+    assert changes == []
+
+
+def test_nomination_quota_is_enforced_per_day(database_factory):
+    """Test that a user can make at most the daily limit of nominations per day."""
+    db = database_factory()
+    _nominate_on_days(
+        db, [(10, nominee, MONDAY) for nominee in range(1, 6)] + [(10, 6, MONDAY + 1)]
+    )
+
+    assert db.get_leaderboard(limit=10) == [
+        {"username": f"user{fid}", "points": 1} for fid in (1, 2, 3, 6)
+    ]
+    assert db.remaining_nominations([10, 11], day=MONDAY) == {10: 0, 11: 3}
+
+    db.create_user(7, "user7")
+    db.create_posts_bulk([_post("0xlate", fid=7, username="user7", timestamp=MONDAY * MS_PER_DAY)])
+    assert db.record_nomination(10, 7, "0xlate", MONDAY * MS_PER_DAY + 5) is False
+    assert db.record_nomination(10, 7, "0xlate", (MONDAY + 1) * MS_PER_DAY + 5) is True
+
+
+def test_check_nomination_quotas_consumes_quota_in_order(database_factory):
+    """Test that batch validation counts earlier nominations in the batch against the quota."""
+    db = database_factory()
+    _nominate_on_days(db, [(10, 1, MONDAY), (10, 2, MONDAY)])
+    timestamp = MONDAY * MS_PER_DAY + 10
+
+    allowed = db.check_nomination_quotas(
+        [
+            {"nominator_fid": 10, "timestamp": timestamp},
+            {"nominator_fid": 11, "timestamp": timestamp},
+            {"nominator_fid": 10, "timestamp": timestamp},
+            {"nominator_fid": 10, "timestamp": timestamp + MS_PER_DAY},
+        ]
+    )
+
+    assert allowed == [True, True, False, True]
+
+
+def test_record_likes_bulk_stores_only_changes(database_factory):
+    """Test that refreshed counts update posts and write a history sample only on change."""
+    db = database_factory()
+    start = MONDAY * MS_PER_DAY
+    db.upsert_users_bulk([{"fid": 1, "username": "alice"}])
+    db.create_posts_bulk([_post("0x1", likes=2, timestamp=start), _post("0x2", timestamp=start)])
+    assert db.get_post("0x1")["likes"] == 2
+
+    assert db.record_likes_bulk({"0x1": 2, "0x2": 0, "0xmissing": 9}, sampled_at=start + 1000) == {
+        "inserted": 0,
+        "updated": 0,
+        "skipped": 3,
+    }
+    db.record_likes_bulk({"0x1": 2}, sampled_at=start + 2000)
+    db.record_likes_bulk({"0x1": 7}, sampled_at=start + 3000)
+
+    assert db.get_post("0x1")["likes"] == 7
+    with db.connection() as conn:
+        rows = conn.execute(
+            "SELECT post_hash, sampled_ms, likes FROM post_likes_history ORDER BY 1, 2"
+        ).fetchall()
+    assert rows == [("0x1", start + 1000, 2), ("0x1", start + 3000, 7), ("0x2", start + 1000, 0)]
+
+
+def test_like_velocity(database_factory):
+    """Test that velocity counts likes gained inside the window from the history."""
+    db = database_factory()
+    start = MONDAY * MS_PER_DAY
+    hour = 3_600_000
+    db.upsert_users_bulk([{"fid": 1, "username": "alice"}, {"fid": 2, "username": "bob"}])
+    db.create_posts_bulk(
+        [
+            _post("0xold", timestamp=start),
+            _post("0xnew", fid=2, username="bob", timestamp=start + 2 * hour),
+        ]
+    )
+    db.record_likes_bulk({"0xold": 50}, sampled_at=start + hour)
+    db.record_likes_bulk({"0xold": 55, "0xnew": 12}, sampled_at=start + 2 * hour + 30 * 60_000)
+
+    velocity = db.get_like_velocity(day=MONDAY, window_ms=hour, now=start + 3 * hour)
+
+    assert [(post["hash"], post["likes"], post["gained"]) for post in velocity] == [
+        ("0xnew", 12, 12),
+        ("0xold", 55, 5),
+    ]
+    # A window reaching back to a post's creation counts all of its likes.
+    velocity = db.get_like_velocity(day=MONDAY, window_ms=3 * hour, now=start + 3 * hour)
+    assert [(post["hash"], post["gained"], post["likes_per_hour"]) for post in velocity] == [
+        ("0xold", 55, 55 / 3),
+        ("0xnew", 12, 4.0),
+    ]
+
+
+def test_archive_closed_days(database_factory):
+    """Test that closed days move to monthly files and historical reads still find them."""
+    db = database_factory()
+    # 2025-01-31, 2025-02-01 and 2025-02-10.
+    january, february, today = 20119, 20120, 20129
+    _nominate_on_days(db, [(2, 1, january), (3, 1, february), (3, 2, today)])
+    db.create_posts_bulk(
+        [_post("0xold", fid=2, username="user2", likes=99, timestamp=january * MS_PER_DAY + 5)]
+    )
+    leaderboard = db.get_leaderboard()
+
+    moved = db.archive_closed_days(keep_days=0, today=today)
+
+    assert moved == {"nominations": 2, "posts": 3, "post_likes_history": 0}
+    assert os.path.exists(db.archive_path("2025-01")) and os.path.exists(db.archive_path("2025-02"))
+    assert db.archived_before_day() == today
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 1
+    assert db.get_post("0xold") is None
+    assert db.get_leaderboard() == leaderboard
+
+    january_posts = db.get_most_liked_posts(january * MS_PER_DAY, end_time=february * MS_PER_DAY)
+    assert [post["hash"] for post in january_posts] == ["0xold", f"0x1-{january}"]
+    window = db.get_most_liked_posts(january * MS_PER_DAY, limit=10)
+    assert sorted(post["hash"] for post in window) == sorted(
+        ["0xold", f"0x1-{january}", f"0x1-{february}", f"0x2-{today}"]
+    )
+    assert db.get_most_liked_posts(today * MS_PER_DAY) == [db.get_post(f"0x2-{today}")]
+
+
+def test_windows_over_many_archives(database_factory):
+    """Test that windows spanning more archives than can be attached at once still read them all."""
+    db = database_factory()
+    db.create_user(1, "alice")
+    # One post a month for 14 months from 2025-01-01; more likes each month.
+    days = [20089 + 31 * month for month in range(14)]
+    db.create_posts_bulk(
+        [_post(f"0x{day}", likes=day, timestamp=day * MS_PER_DAY + 1) for day in days]
+    )
+    db.archive_closed_days(keep_days=0, today=days[-1] + 40)
+    assert len(db.archive_paths()) == 14
+    # An archived post stored again, e.g. when nominated again, is only read once.
+    db.create_post(
+        1, "alice", "Today on Base I created...", days[0], days[0] * MS_PER_DAY + 1, f"0x{days[0]}"
+    )
+
+    newest_first = [f"0x{day}" for day in reversed(days)]
+    posts = db.get_most_liked_posts(days[0] * MS_PER_DAY, limit=20)
+    assert [post["hash"] for post in posts] == newest_first
+    assert [
+        post["hash"] for post in db.get_most_liked_posts(days[0] * MS_PER_DAY, limit=3)
+    ] == newest_first[:3]
+    recent = db.get_most_liked_posts(days[-3] * MS_PER_DAY, limit=20)
+    assert [post["hash"] for post in recent] == newest_first[:3]
+    first_month = db.get_most_liked_posts(days[0] * MS_PER_DAY, end_time=days[1] * MS_PER_DAY)
+    assert [post["hash"] for post in first_month] == [f"0x{days[0]}"]
+
+
+def test_archive_keeps_posts_with_hot_nominations(database_factory):
+    """Test that a closed post nominated on a day still in the main file is not archived yet."""
+    db = database_factory()
+    db.upsert_users_bulk([{"fid": 1, "username": "user1"}, {"fid": 2, "username": "user2"}])
+    db.create_posts_bulk([_post("0xa", timestamp=MONDAY * MS_PER_DAY)])
+    db.record_nominations_bulk(
+        [
+            {
+                "nominator_fid": 2,
+                "nominee_fid": 1,
+                "post_hash": "0xa",
+                "timestamp": (MONDAY + 3) * MS_PER_DAY,
+            }
+        ]
+    )
+
+    assert db.archive_closed_days(keep_days=0, today=MONDAY + 3)["posts"] == 0
+    assert db.get_post("0xa") is not None
+
+    assert db.archive_closed_days(keep_days=0, today=MONDAY + 4) == {
+        "nominations": 1,
+        "posts": 1,
+        "post_likes_history": 0,
+    }
+
+
+def _replay_archived_nomination(db, january, today):
+    """Archive a nomination, then replay its mention the way MonitorFarcaster handles one."""
+    db.archive_closed_days(keep_days=0, today=today)
+    assert db.get_post(f"0x1-{january}") is None
+    db.create_post(
+        1, "user1", "Today on Base I created...", 0, january * MS_PER_DAY, f"0x1-{january}"
+    )
+    return db.record_nomination(2, 1, f"0x1-{january}", january * MS_PER_DAY + 1)
+
+
+def test_archived_nomination_is_not_recorded_again(database_factory):
+    """Test that replaying an archived nomination changes neither the score nor the points."""
+    db = database_factory()
+    january, today = 20119, 20129
+    _nominate_on_days(db, [(2, 1, january)])
+    scores, points = db.get_scores(), (db.get_points(1), db.get_points(2))
+
+    assert _replay_archived_nomination(db, january, today) is False
+    assert db.get_scores() == scores
+    assert (db.get_points(1), db.get_points(2)) == points
+
+
+def test_nomination_keys_backfilled_from_archives(database_factory):
+    """Test that upgrading a database whose nominations were already archived keeps them unique."""
+    db = database_factory()
+    january, today = 20119, 20129
+    _nominate_on_days(db, [(2, 1, january)])
+    db.archive_closed_days(keep_days=0, today=today)
+    # Roll back to before migration 12, when archiving dropped the only record of the pair.
+    with db.transaction() as conn:
+        conn.execute("DROP TRIGGER trg_nominations_keys")
+        conn.execute("DROP TABLE nomination_keys")
+        conn.execute("PRAGMA user_version = 11")
+
+    assert db.migrate(target=12) == [12]
+
+    assert _replay_archived_nomination(db, january, today) is False
+    assert db.get_scores() == [(1, "user1", 1)]
@@ -0,0 +1,129 @@
+import csv
+import json
+import os
+
+import pytest
+
+from cdp_agentkit_core.utils.database import MS_PER_DAY
+from cdp_agentkit_core.utils.export import export_all, export_table, main
+
+MONDAY = 20094
+
+
+def _fill(db):
+    db.upsert_users_bulk([{"fid": 1, "username": "alice"}, {"fid": 2, "username": "bob"}])
+    db.create_posts_bulk(
+        [
+            {
+                "hash": f"0x{day}",
+                "fid": 1,
+                "username": "alice",
+                "text": 'Today on Base I created, "quoted"',
+                "likes": day - MONDAY,
+                "timestamp": day * MS_PER_DAY + 1,
+            }
+            for day in (MONDAY - 60, MONDAY)
+        ]
+    )
+    db.record_nomination(2, 1, f"0x{MONDAY - 60}", (MONDAY - 60) * MS_PER_DAY + 2)
+    db.record_nomination(2, 1, f"0x{MONDAY}", MONDAY * MS_PER_DAY + 2)
+
+
+def test_export_csv_and_jsonl_include_archived_rows(database_factory, tmp_path):
+    """Test that exports stream every table, archived posts and nominations included."""
+    db = database_factory()
+    _fill(db)
+    assert db.archive_closed_days(keep_days=0, today=MONDAY)["posts"] == 1
+    chunks = []
+
+    counts = export_all(
+        db,
+        str(tmp_path / "csv"),
+        "csv",
+        chunk_size=1,
+        progress=lambda table, n: chunks.append((table, n)),
+    )
+
+    assert counts == {"users": 2, "posts": 2, "nominations": 2, "scores": 1}
+    assert ("posts", 1) in chunks and ("posts", 2) in chunks
+    with open(tmp_path / "csv" / "posts.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert sorted(row["hash"] for row in rows) == [f"0x{MONDAY - 60}", f"0x{MONDAY}"]
+    assert rows[0]["text"] == 'Today on Base I created, "quoted"'
+    with open(tmp_path / "csv" / "scores.csv", newline="") as file:
+        assert list(csv.reader(file)) == [["fid", "username", "points"], ["1", "alice", "2"]]
+
+    assert export_table(db, "users", str(tmp_path / "users.jsonl"), "jsonl") == 2
+    with open(tmp_path / "users.jsonl") as file:
+        assert [json.loads(line) for line in file] == [
+            {"fid": 1, "username": "alice"},
+            {"fid": 2, "username": "bob"},
+        ]
+
+
+def test_export_rejects_unknown_table_and_format(database_factory, tmp_path):
+    """Test that unknown tables and formats are refused."""
+    db = database_factory()
+    with pytest.raises(ValueError):
+        export_table(db, "secrets", str(tmp_path / "x.csv"))
+    with pytest.raises(ValueError):
+        export_table(db, "users", str(tmp_path / "x.xml"), "xml")
+
+
+def test_failed_export_leaves_no_partial_file(database_factory, tmp_path):
+    """Test that an export failing partway keeps the previous file and cleans up after itself."""
+    db = database_factory()
+    _fill(db)
+    out_dir = tmp_path / "export"
+    out_dir.mkdir()
+    path = out_dir / "posts.csv"
+    path.write_text("previous export")
+
+    def fail(table, written):
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        export_table(db, "posts", str(path), chunk_size=1, progress=fail)
+    assert path.read_text() == "previous export"
+    assert os.listdir(out_dir) == ["posts.csv"]
+
+
+def test_export_parquet(database_factory, tmp_path):
+    """Test that Parquet exports write typed columns."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    db = database_factory()
+    _fill(db)
+
+    export_table(db, "posts", str(tmp_path / "posts.parquet"), "parquet", chunk_size=1)
+
+    table = pq.read_table(tmp_path / "posts.parquet")
+    assert table.num_rows == 2
+    assert str(table.schema.field("likes").type) == "int64"
+    assert sorted(table.column("timestamp").to_pylist()) == [
+        str((MONDAY - 60) * MS_PER_DAY + 1),
+        str(MONDAY * MS_PER_DAY + 1),
+    ]
+
+
+def test_export_command(database_factory, tmp_path):
+    """Test the command line entry point."""
+    db = database_factory()
+    _fill(db)
+    out_dir = tmp_path / "out"
+
+    assert (
+        main(
+            [
+                "--db",
+                db.db_name,
+                "--out-dir",
+                str(out_dir),
+                "--format",
+                "jsonl",
+                "--tables",
+                "users",
+            ]
+        )
+        == 0
+    )
+    assert os.listdir(out_dir) == ["users.jsonl"]
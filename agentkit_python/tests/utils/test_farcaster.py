@@ -0,0 +1,249 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cdp_agentkit_core.utils import farcaster
+from cdp_agentkit_core.utils.http_client import HttpError
+from cdp_agentkit_core.utils.profile_cache import ProfileCache
+
+NOTIFICATIONS_URL = "https://api.neynar.com/v2/farcaster/notifications"
+CASTS_URL = "https://api.neynar.com/v2/farcaster/casts"
+USERS_URL = "https://api.neynar.com/v2/farcaster/user/bulk"
+FEED_URL = "https://api.neynar.com/v2/farcaster/feed"
+USER_BY_USERNAME_URL = "https://api.neynar.com/v1/farcaster/user-by-username?username="
+
+
+@pytest.fixture(autouse=True)
+def profile_cache(monkeypatch):
+    """Give each test a fresh profile cache."""
+    cache = ProfileCache()
+    monkeypatch.setattr(farcaster, "_profile_cache", cache)
+    return cache
+
+
+def _cast(hash, likes=0):
+    return {
+        "hash": hash,
+        "text": f"cast {hash}",
+        "timestamp": "2025-01-06T00:00:00Z",
+        "author": {"fid": 1, "username": "alice"},
+        "reactions": {"likes_count": likes},
+    }
+
+
+class FakeNeynar:
+    """Answers the Neynar endpoints from canned data instead of the network."""
+
+    def __init__(self, mentions=(), missing=(), failing=(), feed=()):
+        self.mentions = list(mentions)
+        self.feed = list(feed)  # Newest first
+        self.missing = set(missing)
+        self.failing = set(failing)
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get_json(self, url, headers=None, params=None):
+        """Answer a request from the fake feed, mentions, casts and profiles, recording it."""
+        self.calls.append((url, params))
+        if url.startswith(USER_BY_USERNAME_URL):
+            username = url[len(USER_BY_USERNAME_URL) :]
+            if username == "ghost":
+                raise HttpError(url, 404, "not found")
+            return {"users": [{"fid": 7, "username": username}]}
+        if url == FEED_URL:
+            start = int(params.get("cursor") or 0)
+            end = start + params["limit"]
+            next_page = {"cursor": str(end)} if end < len(self.feed) else {}
+            return {"casts": self.feed[start:end], "next": next_page}
+        if url == NOTIFICATIONS_URL:
+            notifications = [
+                {"type": "cast-mention", "cast": {"hash": hash}} for hash in self.mentions
+            ]
+            return {"result": {"notifications": notifications}}
+
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        keys = params[next(iter(params))].split(",")
+        if self.failing & set(keys):
+            raise HttpError(url, 500, "unavailable")
+        if url == CASTS_URL:
+            return {
+                "result": {
+                    "casts": [
+                        _cast(hash, likes=len(hash)) for hash in keys if hash not in self.missing
+                    ]
+                }
+            }
+        if url == USERS_URL:
+            return {
+                "users": [
+                    {"fid": int(fid), "username": f"user{fid}"}
+                    for fid in keys
+                    if fid not in self.missing
+                ]
+            }
+        raise AssertionError(f"Unexpected URL {url}")
+
+
+def test_get_casts_bulk_chunks_requests_concurrently(monkeypatch):
+    """Test that bulk cast lookups are chunked, deduplicated and run with bounded concurrency."""
+    neynar = FakeNeynar()
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+    hashes = [f"0x{i}" for i in range(450)]
+
+    casts = asyncio.run(farcaster.get_casts_bulk("key", hashes + hashes[:10], concurrency=2))
+
+    assert list(casts) == hashes
+    assert casts["0x7"]["author"] == {"fid": 1, "username": "alice"}
+    assert [len(params["casts"].split(",")) for _, params in neynar.calls] == [
+        100,
+        100,
+        100,
+        100,
+        50,
+    ]
+    assert neynar.peak == 2
+
+
+def test_fetch_users_bulk_and_reaction_counts(monkeypatch):
+    """Test bulk user lookups keyed by fid, and like counts built on bulk cast lookups."""
+    neynar = FakeNeynar(missing={"0xgone"})
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+
+    users = asyncio.run(farcaster.fetch_users_bulk("key", [3, 1, 3]))
+    counts = asyncio.run(farcaster.fetch_reaction_counts("key", ["0xab", "0xgone"]))
+
+    assert users == {3: {"fid": 3, "username": "user3"}, 1: {"fid": 1, "username": "user1"}}
+    assert counts == {"0xab": 4}
+
+
+def test_mentions_are_hydrated_in_bulk_and_in_order(monkeypatch):
+    """Test that mentioned casts are fetched with bulk lookups and keep notification order."""
+    hashes = [f"0x{i}" for i in range(150)]
+    neynar = FakeNeynar(mentions=hashes)
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+
+    casts = asyncio.run(farcaster.fetch_mentions_for_fid("key", 1, limit=250))
+
+    assert [cast["hash"] for cast in casts] == hashes
+    assert [url for url, _ in neynar.calls] == [NOTIFICATIONS_URL, CASTS_URL, CASTS_URL]
+
+
+def test_mention_hydration_reports_partial_failures(monkeypatch, capsys):
+    """Test that casts that fail to load are reported and the rest are still returned."""
+    hashes = [f"0x{i}" for i in range(101)]
+    neynar = FakeNeynar(mentions=hashes, missing={"0x1"}, failing={"0x100"})
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+
+    casts = asyncio.run(farcaster.fetch_mentions_for_fid("key", 1, limit=250))
+
+    assert [cast["hash"] for cast in casts] == [hash for hash in hashes[:100] if hash != "0x1"]
+    output = capsys.readouterr().out
+    assert "HTTP error fetching casts in bulk: 500 - unavailable" in output
+    assert "Could not fetch 2 of 101 mentioned casts: 0x1, 0x100" in output
+
+
+def test_user_lookups_use_the_profile_cache(monkeypatch, profile_cache):
+    """Test that profiles and unknown users are fetched once and then served from the cache."""
+    neynar = FakeNeynar()
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+
+    async def lookups():
+        for _ in range(2):
+            assert await farcaster.fetch_user_data("key", "carol", by_fid=False) == {
+                "fid": 7,
+                "username": "carol",
+            }
+            assert await farcaster.fetch_user_data("key", "ghost", by_fid=False) is None
+        return await farcaster.fetch_users_bulk("key", [7, 8])
+
+    users = asyncio.run(lookups())
+
+    assert users == {7: {"fid": 7, "username": "carol"}, 8: {"fid": 8, "username": "user8"}}
+    assert len(neynar.calls) == 3
+    assert neynar.calls[-1] == (USERS_URL, {"fids": "8"})
+    assert profile_cache.stats()["by_username"]["hit_rate"] == 0.5
+
+
+def test_users_missing_from_bulk_lookups_are_cached_as_unknown(monkeypatch, profile_cache):
+    """Test that fids a bulk lookup did not return are not requested again, unlike failed ones."""
+    neynar = FakeNeynar(missing={"8"}, failing={"199"})
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+    fids = [7, 8, *range(101, 200)]
+
+    async def lookups():
+        first = await farcaster.fetch_users_bulk("key", fids)
+        neynar.calls.clear()
+        return first, await farcaster.fetch_users_bulk("key", fids)
+
+    first, second = asyncio.run(lookups())
+
+    assert sorted(first) == sorted(second) == [7, *range(101, 199)]
+    assert profile_cache.get(8) is None
+    assert neynar.calls == [(USERS_URL, {"fids": "199"})]
+
+
+def _feed(count, newest_second=10_000):
+    """Build a channel feed of `count` casts a second apart, newest first; every third is a daily post."""
+    start = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    return [
+        {
+            **_cast(f"0x{second}"),
+            "text": "Today on Base I created..." if second % 3 == 0 else "gm",
+            "timestamp": (start + timedelta(seconds=second)).isoformat().replace("+00:00", "Z"),
+        }
+        for second in range(newest_second, newest_second - count, -1)
+    ]
+
+
+def test_fetch_casts_since_stops_at_the_high_water_mark(monkeypatch):
+    """Test that polls with a mark only page through casts newer than it."""
+    neynar = FakeNeynar(feed=_feed(500))
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+
+    casts, mark = asyncio.run(farcaster.fetch_casts_since("key", "base", limit=100))
+    assert len(casts) == 100 and mark["hash"] == "0x10000"
+
+    neynar.feed = _feed(6, newest_second=10_006) + neynar.feed
+    neynar.calls.clear()
+    casts, new_mark = asyncio.run(
+        farcaster.fetch_casts_since(
+            "key", "base", mark, keyword_filter="Today on Base I created..."
+        )
+    )
+
+    assert [cast["hash"] for cast in casts] == ["0x10005", "0x10002"]
+    assert new_mark == {"hash": "0x10006", "timestamp": neynar.feed[0]["timestamp"]}
+    assert len(neynar.calls) == 1
+
+
+def test_fetch_casts_since_bounds_catch_up(monkeypatch, capsys):
+    """Test that a poll far behind its mark walks back through at most catch_up_limit casts."""
+    neynar = FakeNeynar(feed=_feed(500))
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+    stale = {"hash": neynar.feed[-1]["hash"], "timestamp": neynar.feed[-1]["timestamp"]}
+
+    casts, mark = asyncio.run(farcaster.fetch_casts_since("key", "base", stale, catch_up_limit=250))
+
+    assert len(casts) == 250
+    assert mark["hash"] == "0x10000"
+    assert [params["limit"] for _, params in neynar.calls] == [100, 100, 100]
+    assert "Stopped catching up after 250 casts" in capsys.readouterr().out
+
+
+def test_fetch_casts_since_keeps_the_mark_on_errors(monkeypatch):
+    """Test that a failed poll returns no casts and leaves the mark where it was."""
+    neynar = FakeNeynar()
+
+    async def failing_get_json(url, headers=None, params=None):
+        raise HttpError(url, 503, "busy")
+
+    neynar.get_json = failing_get_json
+    monkeypatch.setattr(farcaster, "get_http_client", lambda: neynar)
+    mark = {"hash": "0x1", "timestamp": "2025-01-06T00:00:00Z"}
+
+    assert asyncio.run(farcaster.fetch_casts_since("key", "base", mark)) == ([], mark)
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from cdp_agentkit_core.utils.http_client import HttpClient, HttpError
+
+
+def _app():
+    async def echo(request):
+        return web.json_response(
+            {"query": dict(request.query), "peer": request.transport.get_extra_info("peername")[1]}
+        )
+
+    async def post(request):
+        return web.json_response({"body": await request.json()})
+
+    async def missing(request):
+        return web.Response(status=404, text="not here")
+
+    app = web.Application()
+    app.router.add_get("/echo", echo)
+    app.router.add_post("/post", post)
+    app.router.add_get("/missing", missing)
+    return app
+
+
+def _serve(scenario):
+    async def run():
+        server = TestServer(_app())
+        await server.start_server()
+        client = HttpClient(timeout=5, max_connections_per_host=2)
+        try:
+            return await scenario(client, server)
+        finally:
+            await client.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_requests_reuse_pooled_connections():
+    """Test that sequential requests share one keep-alive connection."""
+
+    async def scenario(client, server):
+        first = await client.get_json(
+            str(server.make_url("/echo")), params={"a": 1, "cursor": None}
+        )
+        second = await client.get_json(str(server.make_url("/echo")))
+        return first, second
+
+    first, second = _serve(scenario)
+    assert first["query"] == {"a": "1"}
+    assert first["peer"] == second["peer"]
+
+
+def test_per_host_limit_bounds_open_connections():
+    """Test that concurrent requests never open more connections than the per-host limit."""
+
+    async def scenario(client, server):
+        url = str(server.make_url("/echo"))
+        return await asyncio.gather(*(client.get_json(url) for _ in range(10)))
+
+    responses = _serve(scenario)
+    assert len({response["peer"] for response in responses}) <= 2
+
+
+def test_post_json_and_http_errors():
+    """Test JSON bodies and that 4xx responses raise HttpError with the body text."""
+
+    async def scenario(client, server):
+        posted = await client.post_json(str(server.make_url("/post")), {"text": "gm"})
+        with pytest.raises(HttpError) as error:
+            await client.get_json(str(server.make_url("/missing")))
+        return posted, error.value
+
+    posted, error = _serve(scenario)
+    assert posted == {"body": {"text": "gm"}}
+    assert (error.status, error.text) == (404, "not here")
+
+
+def test_settings_come_from_the_environment(monkeypatch):
+    """Test that unset settings fall back to the environment and then to the defaults."""
+    monkeypatch.setenv("THEO_HTTP_MAX_CONNECTIONS_PER_HOST", "4")
+
+    client = HttpClient(timeout=3)
+
+    assert (client.timeout, client.max_connections_per_host) == (3, 4)
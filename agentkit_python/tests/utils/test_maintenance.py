@@ -0,0 +1,151 @@
+import asyncio
+import os
+import sqlite3
+
+from cdp_agentkit_core.utils import maintenance as maintenance_module
+from cdp_agentkit_core.utils.database import MS_PER_DAY
+from cdp_agentkit_core.utils.maintenance import Maintenance
+
+DAY = 20089
+
+
+def _fill(db, count=500):
+    db.upsert_users_bulk([{"fid": 1, "username": "alice"}])
+    db.create_posts_bulk(
+        {
+            "hash": f"0x{index}",
+            "fid": 1,
+            "username": "alice",
+            "text": "Today on Base I created " + "x" * 500,
+            "likes": index,
+            "timestamp": DAY * MS_PER_DAY + index,
+        }
+        for index in range(count)
+    )
+
+
+def test_backup_copies_database_and_archives(database_factory, tmp_path):
+    """Test that a backup holds the main file and every archive file, and reports progress."""
+    db = database_factory()
+    _fill(db)
+    db.archive_closed_days(keep_days=0, today=DAY + 1)
+    progress = []
+    maintenance = Maintenance(
+        db, backup_dir=str(tmp_path / "backups"), progress=lambda *args: progress.append(args)
+    )
+
+    report = maintenance.backup()
+
+    assert report["completed"] and report["done"] == report["total"] == 2
+    (backup,) = os.listdir(tmp_path / "backups")
+    assert sorted(os.listdir(tmp_path / "backups" / backup)) == [
+        "theo_test.archive-2025-01.db",
+        "theo_test.db",
+    ]
+    assert progress[-1][1] == progress[-1][2]
+
+
+def test_steps_stop_when_out_of_time(database_factory, tmp_path):
+    """Test that a step over its budget stops early."""
+    db = database_factory()
+    _fill(db)
+    ticks = iter(range(0, 10_000, 10))
+    maintenance = Maintenance(
+        db,
+        backup_dir=str(tmp_path / "backups"),
+        step_seconds=5,
+        progress=lambda *args: None,
+        clock=lambda: next(ticks),
+    )
+
+    assert not maintenance.backup()["completed"]
+    assert not maintenance.analyze()["completed"]
+
+
+def test_backup_resumes_where_it_ran_out_of_time(database_factory, tmp_path, monkeypatch):
+    """Test that a backup over its budget is kept and finished by the next run."""
+    monkeypatch.setattr(maintenance_module, "BACKUP_PAGES_PER_STEP", 8)
+    db = database_factory()
+    _fill(db)
+    now = [0]
+
+    def tick(*args):
+        now[0] += 1
+
+    maintenance = Maintenance(
+        db,
+        backup_dir=str(tmp_path / "backups"),
+        step_seconds=3,
+        progress=tick,
+        clock=lambda: now[0],
+    )
+
+    first = maintenance.backup()
+    (partial,) = os.listdir(tmp_path / "backups")
+    second = maintenance.backup()
+
+    assert not first["completed"] and partial.endswith(".partial")
+    assert second["completed"] and second["done"] == 1
+    (backup,) = os.listdir(tmp_path / "backups")
+    assert backup == partial[: -len(".partial")]
+    copy = sqlite3.connect(tmp_path / "backups" / backup / "theo_test.db")
+    assert copy.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 500
+    copy.close()
+
+
+def test_incremental_vacuum_needs_explicit_conversion(database_factory, tmp_path):
+    """Test that a database created without incremental auto-vacuum is only converted on request."""
+    conn = sqlite3.connect(tmp_path / "old.db")
+    conn.execute("CREATE TABLE legacy (x)")
+    conn.close()
+    db = database_factory("old.db")
+    maintenance = Maintenance(db, backup_dir=str(tmp_path / "backups"), progress=lambda *args: None)
+
+    report = maintenance.incremental_vacuum()
+    assert not report["completed"] and report["total"] == 0
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    assert maintenance.enable_incremental_vacuum()["completed"]
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert maintenance.incremental_vacuum()["completed"]
+
+
+def test_run_async_releases_the_writer_between_units(database_factory, tmp_path):
+    """Test that vacuum and ANALYZE units are handed to the writer one at a time."""
+    db = database_factory()
+    _fill(db)
+    maintenance = Maintenance(db, backup_dir=str(tmp_path / "backups"), progress=lambda *args: None)
+    calls = []
+
+    async def run_exclusive(func, *args):
+        calls.append(func)
+        return func(*args)
+
+    reports = asyncio.run(maintenance.run_async(run_exclusive))
+
+    assert [report["step"] for report in reports] == ["backup", "vacuum", "analyze"]
+    assert all(report["completed"] for report in reports)
+    assert len(calls) > reports[2]["total"]
+
+
+def test_incremental_vacuum_and_analyze(database_factory, tmp_path):
+    """Test that freed pages are returned and statistics are gathered for every table."""
+    db = database_factory()
+    _fill(db)
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM posts")
+    maintenance = Maintenance(db, backup_dir=str(tmp_path / "backups"), progress=lambda *args: None)
+
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] > 0
+    assert maintenance.incremental_vacuum()["completed"]
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+    report = maintenance.analyze()
+    assert report["completed"] and report["done"] == report["total"] > 0
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
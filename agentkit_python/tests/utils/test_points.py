@@ -0,0 +1,208 @@
+import sqlite3
+
+from cdp_agentkit_core.utils import points
+from cdp_agentkit_core.utils.database import MS_PER_DAY, current_day, day_to_date
+from cdp_agentkit_core.utils.points import PointsEngine, ScoringRules
+
+DAY = 20089
+
+
+def _post(hash, fid, day, likes=0):
+    return {
+        "hash": hash,
+        "fid": fid,
+        "username": f"user{fid}",
+        "text": "Today on Base I created...",
+        "likes": likes,
+        "timestamp": day * MS_PER_DAY + 1,
+    }
+
+
+def _campaign(db):
+    """Two creators posting over two days, with nominations between them."""
+    db.upsert_users_bulk({"fid": fid, "username": f"user{fid}"} for fid in (1, 2, 3))
+    db.create_posts_bulk(
+        [_post("0xa", 1, DAY), _post("0xb", 1, DAY), _post("0xc", 1, DAY + 1), _post("0xd", 2, DAY)]
+    )
+    db.record_nominations_bulk(
+        [
+            {
+                "nominator_fid": 2,
+                "nominee_fid": 1,
+                "post_hash": "0xa",
+                "timestamp": DAY * MS_PER_DAY,
+            },
+            {
+                "nominator_fid": 3,
+                "nominee_fid": 1,
+                "post_hash": "0xa",
+                "timestamp": DAY * MS_PER_DAY,
+            },
+            {
+                "nominator_fid": 3,
+                "nominee_fid": 2,
+                "post_hash": "0xd",
+                "timestamp": DAY * MS_PER_DAY,
+            },
+        ]
+    )
+
+
+def test_points_follow_campaign_rules(database_factory):
+    """Test that posts score once per day and both sides of a nomination score."""
+    db = database_factory()
+    _campaign(db)
+
+    # user1: 2 post days * 10 + 2 nominations received * 5
+    # user2: 1 post day * 10 + 1 nomination received * 5 + 1 nomination made * 1
+    # user3: 2 nominations made * 1
+    assert db.get_points(1) == 30
+    assert db.get_points(2) == 16
+    assert db.get_points(3) == 2
+    assert db.get_points_leaderboard(limit=2) == [
+        {"username": "user1", "points": 30},
+        {"username": "user2", "points": 16},
+    ]
+
+
+def test_creator_of_the_day_bonus(database_factory):
+    """Test that being marked Based Creator of the Day adds the bonus once."""
+    db = database_factory()
+    db.create_user(1, "user1")
+    db.create_post(1, "user1", "Today on Base I created...", 3, current_day() * MS_PER_DAY, "0xa")
+
+    db.mark_based_creator_of_the_day(1)
+
+    assert db.get_points(1) == 10 + 25
+
+
+def test_creator_of_the_day_bonus_moves_to_new_leader(database_factory):
+    """Test that the bonus follows the day's leader and survives a snapshot restore and replay."""
+    db = database_factory()
+    engine = PointsEngine(db)
+    db.upsert_users_bulk([{"fid": 1, "username": "user1"}, {"fid": 2, "username": "user2"}])
+    db.create_post(1, "user1", "Today on Base I created...", 3, current_day() * MS_PER_DAY, "0xa")
+    db.create_post(
+        2, "user2", "Today on Base I created...", 9, current_day() * MS_PER_DAY + 1, "0xb"
+    )
+
+    db.mark_based_creator_of_the_day(1)
+    engine.snapshot()
+    db.mark_based_creator_of_the_day(2)
+    db.mark_based_creator_of_the_day(1)
+    db.mark_based_creator_of_the_day(2)
+
+    assert (db.get_points(1), db.get_points(2)) == (10, 10 + 25)
+    engine.restore_totals()
+    assert (db.get_points(1), db.get_points(2)) == (10, 10 + 25)
+    engine.recompute()
+    assert (db.get_points(1), db.get_points(2)) == (10, 10 + 25)
+
+
+def test_rules_change_rescores_history(database_factory):
+    """Test that changing the rules re-scores every past event in bulk."""
+    db = database_factory()
+    _campaign(db)
+    engine = PointsEngine(db)
+
+    engine.set_rules(ScoringRules(post_points=1, nomination_points=100, participation_points=0))
+
+    assert engine.get_rules() == ScoringRules(1, 100, 0, 25)
+    assert db.get_points(1) == 2 + 200
+    assert db.get_points(3) == 0
+
+    db.create_post(3, "user3", "Today on Base I created...", 0, DAY * MS_PER_DAY, "0xe")
+    assert db.get_points(3) == 1
+
+
+def test_restore_totals_from_snapshot(database_factory):
+    """Test that totals rebuild from the latest snapshot plus the newer ledger rows."""
+    db = database_factory()
+    _campaign(db)
+    engine = PointsEngine(db)
+    assert engine.snapshot() is not None
+    db.create_post(2, "user2", "Today on Base I created...", 0, (DAY + 1) * MS_PER_DAY, "0xe")
+    with db.transaction() as conn:
+        conn.execute("UPDATE point_totals SET points = 0")
+
+    engine.restore_totals()
+
+    assert db.get_points(1) == 30
+    assert db.get_points(2) == 26
+    assert db.get_points(3) == 2
+
+
+def test_recompute_matches_incremental_totals(database_factory):
+    """Test that a full bulk replay reproduces the incrementally maintained totals."""
+    db = database_factory()
+    _campaign(db)
+    before = db.get_points_leaderboard()
+
+    PointsEngine(db).recompute()
+
+    assert db.get_points_leaderboard() == before
+
+
+def _ledger(db):
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT fid, event, ref, day, points, event_ms FROM points_ledger ORDER BY fid, event, ref"
+        ).fetchall()
+
+
+def test_only_campaign_posts_earn_post_points(database_factory):
+    """Test that a cast stored only because it was nominated earns no post points."""
+    db = database_factory()
+    db.upsert_users_bulk([{"fid": 1, "username": "user1"}, {"fid": 2, "username": "user2"}])
+    db.create_post(1, "user1", "gm, just a regular cast", 0, DAY * MS_PER_DAY, "0xa")
+    db.record_nomination(2, 1, "0xa", DAY * MS_PER_DAY + 1)
+
+    assert db.get_points(1) == 5
+    db.create_post(1, "user1", "today on base i created... a song", 0, DAY * MS_PER_DAY + 2, "0xb")
+    assert db.get_points(1) == 15
+    PointsEngine(db).recompute()
+    assert db.get_points(1) == 15
+
+
+def test_recompute_reproduces_the_ledger(database_factory):
+    """Test that a replay writes the same ledger rows, event times included, as the triggers."""
+    db = database_factory()
+    _campaign(db)
+    today = current_day()
+    db.create_post(2, "user2", "Today on Base I created...", 5, today * MS_PER_DAY + 9, "0xlate")
+    db.create_post(2, "user2", "Today on Base I created...", 1, today * MS_PER_DAY + 3, "0xearly")
+    db.mark_based_creator_of_the_day(2)
+    before = _ledger(db)
+
+    PointsEngine(db).recompute()
+
+    assert _ledger(db) == before
+    # The bonus is timed at the leader's first post of the day.
+    assert (2, "creator_of_day", day_to_date(today), today, 25, today * MS_PER_DAY + 3) in before
+
+
+def test_failed_recompute_keeps_the_old_rules(database_factory, monkeypatch):
+    """Test that a rules change is rolled back when re-scoring history fails."""
+    db = database_factory()
+    _campaign(db)
+    engine = PointsEngine(db)
+
+    def fail(conn, archived_before_day=0):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(points, "replay_points_ledger", fail)
+    engine.set_rules(ScoringRules(post_points=1))
+
+    assert engine.get_rules() == ScoringRules()
+
+
+def test_recompute_keeps_archived_days(database_factory):
+    """Test that a replay after archiving keeps the points of days no longer in the main file."""
+    db = database_factory()
+    _campaign(db)
+    before = db.get_points_leaderboard()
+
+    db.archive_closed_days(keep_days=0, today=DAY + 1)
+    PointsEngine(db).recompute()
+
+    assert db.get_points_leaderboard() == before
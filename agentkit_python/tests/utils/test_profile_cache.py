@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+from cdp_agentkit_core.utils.profile_cache import MISS, ProfileCache
+
+
+class FakeClock:
+    """Manually advanced clock for expiry tests."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        """Return the current fake time."""
+        return self.now
+
+
+def test_profiles_are_cached_by_fid_and_username():
+    """Test that a fetched profile answers lookups by fid and by username, ignoring case."""
+    cache = ProfileCache(maxsize=10)
+    assert cache.get(1) is MISS
+
+    cache.set("alice", {"fid": 1, "username": "alice"}, by_fid=False)
+
+    assert cache.get("1") == {"fid": 1, "username": "alice"}
+    assert cache.get("Alice", by_fid=False) == {"fid": 1, "username": "alice"}
+    cache.get(1)["username"] = "changed"
+    assert cache.get(1)["username"] == "alice"
+    assert cache.stats()["by_fid"]["hits"] == 3
+
+
+def test_unknown_users_expire_sooner():
+    """Test that negative entries are kept for the shorter negative TTL."""
+    clock = FakeClock()
+    cache = ProfileCache(maxsize=10, ttl=60, negative_ttl=5, clock=clock)
+    cache.set("ghost", None, by_fid=False)
+    cache.set(2, {"fid": 2, "username": "bob"})
+
+    assert cache.get("ghost", by_fid=False) is None
+    clock.now = 6
+    assert cache.get("ghost", by_fid=False) is MISS
+    assert cache.get(2) == {"fid": 2, "username": "bob"}
+
+
+def test_size_is_bounded():
+    """Test that the least recently used profiles are evicted beyond maxsize."""
+    cache = ProfileCache(maxsize=2)
+    for fid in range(3):
+        cache.set(fid, {"fid": fid, "username": f"user{fid}"})
+
+    assert cache.get(0) is MISS
+    assert cache.stats()["by_fid"]["size"] == 2
+
+
+def test_disk_tier_survives_restarts(tmp_path):
+    """Test that profiles and unknown users are reloaded from disk until they expire."""
+    path = str(tmp_path / "profiles.db")
+    wall = FakeClock(1000.0)
+    cache = ProfileCache(maxsize=10, ttl=60, negative_ttl=5, path=path, wall_clock=wall)
+    cache.set(1, {"fid": 1, "username": "alice"})
+    cache.set(9, None)
+    cache.close()
+
+    restarted = ProfileCache(maxsize=10, ttl=60, negative_ttl=5, path=path, wall_clock=wall)
+    assert restarted.get("alice", by_fid=False) == {"fid": 1, "username": "alice"}
+    assert restarted.get(9) is None
+    assert restarted.get(9) is None  # Now served from memory
+    assert restarted.stats()["disk"] == {"hits": 2, "misses": 0, "hit_rate": 1.0}
+    restarted.close()
+
+    wall.now = 1010.0
+    later = ProfileCache(maxsize=10, ttl=60, negative_ttl=5, path=path, wall_clock=wall)
+    assert later.get(9) is MISS
+    assert later.get(1) == {"fid": 1, "username": "alice"}
+    later.close()
+
+
+def test_disk_writes_are_batched_off_the_event_loop(tmp_path):
+    """Test that set_many_async writes a batch in one disk transaction on an executor thread."""
+    cache = ProfileCache(maxsize=10, path=str(tmp_path / "profiles.db"))
+    threads = []
+    statements = []
+    write = cache.disk.set_many
+    cache.disk.set_many = lambda entries: (threads.append(threading.get_ident()), write(entries))
+    cache.disk._conn.set_trace_callback(statements.append)
+
+    asyncio.run(cache.set_many_async([(1, {"fid": 1, "username": "alice"}, True), (9, None, True)]))
+
+    assert cache.get(9) is None
+    assert threads and threads[0] != threading.get_ident()
+    assert [sql for sql in statements if sql in ("BEGIN", "COMMIT")] == ["BEGIN", "COMMIT"]
+    cache.close()
+
+    restarted = ProfileCache(maxsize=10, path=str(tmp_path / "profiles.db"))
+    assert restarted.get("alice", by_fid=False) == {"fid": 1, "username": "alice"}
+    assert restarted.get(9) is None
+    restarted.close()
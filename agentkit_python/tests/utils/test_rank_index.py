@@ -0,0 +1,55 @@
+import random
+
+from cdp_agentkit_core.utils.rank_index import LeaderboardIndex
+
+
+def _expected_order(scores):
+    """Return fids in leaderboard order: highest points first, ties by fid."""
+    return sorted(scores, key=lambda fid: (-scores[fid], fid))
+
+
+def test_top_rank_and_around():
+    """Test the basic queries on a small board with a tie."""
+    index = LeaderboardIndex(random.Random(0))
+    index.load([(1, "alice", 5), (2, "bob", 9), (3, "carol", 5), (4, "dave", 1)])
+
+    assert index.top(2) == [(2, "bob", 9), (1, "alice", 5)]
+    assert index.top(2, offset=2) == [(3, "carol", 5), (4, "dave", 1)]
+    assert index.rank(2) == 1
+    assert index.rank(1) == index.rank(3) == 2
+    assert index.rank(4) == 4
+    assert index.rank(99) is None
+    assert [fid for fid, _, _ in index.around(3, radius=1)] == [1, 3, 4]
+    assert [fid for fid, _, _ in index.around(2, radius=1)] == [2, 1]
+    assert index.find("Carol") == 3
+
+
+def test_updates_move_entries_and_track_renames():
+    """Test that score changes reorder the board and renames replace the old name."""
+    index = LeaderboardIndex(random.Random(0))
+    index.load([(1, "alice", 5), (2, "bob", 9)])
+
+    index.update_many([(1, "alice2", 10), (3, None, 2)])
+
+    assert index.top(3) == [(1, "alice2", 10), (2, "bob", 9), (3, None, 2)]
+    assert index.find("alice") is None
+    assert index.find("alice2") == 1
+    assert len(index) == 3
+
+
+def test_matches_sorted_order_under_random_updates():
+    """Test the skiplist against a plain sort across many random updates."""
+    rng = random.Random(42)
+    index = LeaderboardIndex(random.Random(1))
+    scores = {}
+    for _ in range(2000):
+        fid = rng.randrange(200)
+        scores[fid] = rng.randrange(50)
+        index.update(fid, scores[fid])
+
+    order = _expected_order(scores)
+    assert [fid for fid, _, _ in index.top(len(order))] == order
+    assert [fid for fid, _, _ in index.top(10, offset=95)] == order[95:105]
+    for fid in rng.sample(order, 20):
+        assert index.position(fid) == order.index(fid)
+        assert index.rank(fid) == 1 + sum(points > scores[fid] for points in scores.values())
@@ -0,0 +1,296 @@
+import pytest
+
+from cdp_agentkit_core.utils.async_database import AsyncDatabase
+from cdp_agentkit_core.utils.database import MS_PER_DAY, Database, current_day
+from cdp_agentkit_core.utils.memory_storage import MemoryStorage
+from cdp_agentkit_core.utils.rank_index import LeaderboardIndex
+from cdp_agentkit_core.utils.storage import PostRow, ScoreRow, StorageBackend, open_storage
+
+MONDAY = 20094
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def storage(request, database_factory):
+    """Each storage backend, so the same behaviour is checked on all of them."""
+    if request.param == "sqlite":
+        return database_factory()
+    return MemoryStorage()
+
+
+def _post(hash, fid, day, likes=0):
+    return {
+        "hash": hash,
+        "fid": fid,
+        "username": f"user{fid}",
+        "text": "Today on Base I created...",
+        "likes": likes,
+        "timestamp": day * MS_PER_DAY + 1,
+    }
+
+
+def _nomination(nominator, nominee, hash, day):
+    return {
+        "nominator_fid": nominator,
+        "nominee_fid": nominee,
+        "post_hash": hash,
+        "timestamp": day * MS_PER_DAY + 2,
+    }
+
+
+def test_users_and_posts(storage):
+    """Test user and post writes, including the bulk result counts."""
+    assert storage.upsert_users_bulk(
+        [
+            {"fid": 1, "username": "alice"},
+            {"fid": 2, "username": "bob"},
+            {"fid": 3, "username": "Bad Name"},
+        ]
+    ) == {"inserted": 2, "updated": 0, "skipped": 1}
+    assert storage.upsert_users_bulk(
+        [
+            {"fid": 1, "username": "alice2"},
+            {"fid": 2, "username": "alice2"},
+            {"fid": 2, "username": "bob"},
+        ]
+    ) == {"inserted": 0, "updated": 1, "skipped": 2}
+    storage.create_user(4, "alice2")
+    assert storage.get_user(4) is None
+
+    assert storage.create_posts_bulk([_post("0xa", 1, MONDAY, 3), _post("0xb", 9, MONDAY)]) == {
+        "inserted": 1,
+        "updated": 0,
+        "skipped": 1,
+    }
+    assert storage.create_posts_bulk([_post("0xa", 1, MONDAY, 5)])["updated"] == 1
+    storage.create_post(2, "bob", "hi", 1, MONDAY * MS_PER_DAY + 9, "0xc")
+
+    assert storage.get_user(1) == {"fid": 1, "username": "alice2"}
+    assert storage.get_post("0xa")["likes"] == 5
+    assert sorted(storage.get_post_hashes_for_day(MONDAY)) == ["0xa", "0xc"]
+    assert [
+        post["hash"] for post in storage.get_most_liked_posts(MONDAY * MS_PER_DAY, limit=1)
+    ] == ["0xa"]
+
+    assert storage.record_likes_bulk(
+        {"0xc": 8, "0xmissing": 1}, sampled_at=MONDAY * MS_PER_DAY
+    ) == {
+        "inserted": 0,
+        "updated": 1,
+        "skipped": 1,
+    }
+    assert [post["hash"] for post in storage.get_most_liked_posts(MONDAY * MS_PER_DAY)] == [
+        "0xc",
+        "0xa",
+    ]
+
+
+def test_rows_and_iterators(storage):
+    """Test the typed rows and the streaming variants of the list queries."""
+    storage.upsert_users_bulk([{"fid": 1, "username": "user1"}, {"fid": 2, "username": "user2"}])
+    storage.create_posts_bulk(
+        [_post("0xa", 1, MONDAY, 3), _post("0xb", 2, MONDAY, 7), _post("0xc", 2, MONDAY + 1)]
+    )
+    storage.record_nomination(1, 2, "0xb", MONDAY * MS_PER_DAY + 5)
+
+    post = storage.get_post("0xa")
+    assert isinstance(post, PostRow)
+    assert (post.likes, post["username"]) == (3, "user1")
+    with pytest.raises(KeyError):
+        post["timestamp_ms"]
+
+    posts = storage.iter_most_liked_posts(MONDAY * MS_PER_DAY, end_time=(MONDAY + 1) * MS_PER_DAY)
+    assert not isinstance(posts, list)
+    assert [post.hash for post in posts] == ["0xb", "0xa"]
+    assert [post.hash for post in storage.iter_most_liked_posts(MONDAY * MS_PER_DAY, limit=1)] == [
+        "0xb"
+    ]
+
+    scores = list(storage.iter_scores())
+    assert scores == [ScoreRow(fid=2, username="user2", points=1)]
+    assert scores[0].points == 1
+
+
+def test_nominations_quotas_and_leaderboards(storage):
+    """Test nominations, the daily quota and every leaderboard window."""
+    changes = []
+    storage.add_score_listener(changes.extend)
+    storage.upsert_users_bulk({"fid": fid, "username": f"user{fid}"} for fid in range(1, 6))
+    storage.create_posts_bulk(
+        [
+            _post("0x1", 1, MONDAY),
+            _post("0x2", 2, MONDAY),
+            _post("0x3", 3, MONDAY),
+            _post("0x4", 4, MONDAY),
+        ]
+    )
+
+    result = storage.record_nominations_bulk(
+        [
+            _nomination(5, 1, "0x1", MONDAY),
+            _nomination(5, 1, "0x1", MONDAY),  # duplicate
+            _nomination(5, 2, "0x2", MONDAY),
+            _nomination(5, 3, "0x3", MONDAY),
+            _nomination(5, 4, "0x4", MONDAY),  # over quota
+            _nomination(4, 1, "0xmissing", MONDAY),
+        ]
+    )
+    assert result == {"inserted": 3, "updated": 0, "skipped": 3}
+    assert storage.record_nomination(4, 1, "0x1", MONDAY * MS_PER_DAY + 5) is True
+    assert storage.record_nomination(5, 4, "0x4", (MONDAY + 1) * MS_PER_DAY) is True
+    assert storage.record_nomination(4, 1, "0x1", MONDAY * MS_PER_DAY + 5) is False
+
+    assert storage.remaining_nominations([5, 4], day=MONDAY) == {5: 0, 4: 2}
+    assert storage.check_nomination_quotas(
+        [{"nominator_fid": 4, "timestamp": MONDAY * MS_PER_DAY}] * 3
+    ) == [True, True, False]
+
+    assert storage.get_leaderboard(limit=2) == [
+        {"username": "user1", "points": 2},
+        {"username": "user2", "points": 1},
+    ]
+    assert storage.get_leaderboard(limit=2, offset=2) == [
+        {"username": "user3", "points": 1},
+        {"username": "user4", "points": 1},
+    ]
+    assert storage.get_leaderboard(window="day", day=MONDAY + 1) == [
+        {"username": "user4", "points": 1}
+    ]
+    assert len(storage.get_leaderboard(window="week", day=MONDAY + 6)) == 4
+    assert storage.get_leaderboard(window="season", day=MONDAY) == []
+    storage.define_season("s1", MONDAY + 1, MONDAY + 2)
+    assert storage.get_leaderboard(window="season", day=MONDAY + 1) == [
+        {"username": "user4", "points": 1}
+    ]
+    with pytest.raises(ValueError):
+        storage.get_leaderboard(window="month")
+
+    assert sorted(storage.get_scores()) == [
+        (1, "user1", 2),
+        (2, "user2", 1),
+        (3, "user3", 1),
+        (4, "user4", 1),
+    ]
+    assert changes[-1] == (4, "user4", 1)
+
+
+def test_quota_check_ignores_nominations_that_cannot_count(storage):
+    """Test that recorded, repeated and self-nominations neither pass nor use up quota."""
+    storage.upsert_users_bulk({"fid": fid, "username": f"user{fid}"} for fid in range(1, 6))
+    storage.create_posts_bulk([_post("0x1", 1, MONDAY), _post("0x2", 2, MONDAY)])
+    storage.record_nomination(5, 1, "0x1", MONDAY * MS_PER_DAY + 1)
+    timestamp = MONDAY * MS_PER_DAY + 2
+
+    allowed = storage.check_nomination_quotas(
+        [
+            {
+                "nominator_fid": 5,
+                "nominee_fid": 1,
+                "post_hash": "0x1",
+                "timestamp": timestamp,
+            },  # recorded
+            {
+                "nominator_fid": 5,
+                "nominee_fid": 5,
+                "post_hash": "0x5",
+                "timestamp": timestamp,
+            },  # self
+            {"nominator_fid": 5, "nominee_fid": 2, "post_hash": "0x2", "timestamp": timestamp},
+            {
+                "nominator_fid": 5,
+                "nominee_fid": 2,
+                "post_hash": "0x2",
+                "timestamp": timestamp,
+            },  # repeat
+            {"nominator_fid": 5, "nominee_fid": 3, "post_hash": "0x3", "timestamp": timestamp},
+            {
+                "nominator_fid": 5,
+                "nominee_fid": 4,
+                "post_hash": "0x4",
+                "timestamp": timestamp,
+            },  # over quota
+        ]
+    )
+
+    assert allowed == [False, False, True, False, True, False]
+
+
+def test_unparseable_nomination_time_still_counts_against_quota(storage):
+    """Test that a nomination whose timestamp cannot be parsed uses up today's quota."""
+    storage.upsert_users_bulk({"fid": fid, "username": f"user{fid}"} for fid in range(1, 6))
+    storage.create_posts_bulk([_post(f"0x{fid}", fid, current_day()) for fid in range(1, 5)])
+
+    recorded = [storage.record_nomination(5, fid, f"0x{fid}", "not a time") for fid in range(1, 5)]
+
+    assert recorded == [True, True, True, False]
+    assert storage.remaining_nominations([5]) == {5: 0}
+
+
+def test_renames_reach_score_listeners(storage):
+    """Test that renaming a scored creator updates an index fed by the score listener."""
+    index = LeaderboardIndex()
+    storage.add_score_listener(index.update_many)
+    storage.upsert_users_bulk([{"fid": 1, "username": "alice"}, {"fid": 2, "username": "bob"}])
+    storage.create_posts_bulk([_post("0xa", 1, MONDAY)])
+    storage.record_nomination(2, 1, "0xa", MONDAY * MS_PER_DAY + 5)
+
+    storage.upsert_users_bulk([{"fid": 1, "username": "alice2"}, {"fid": 2, "username": "bob2"}])
+
+    assert index.find("alice") is None
+    assert index.find("alice2") == 1
+    assert index.top(10) == [(1, "alice2", 1)]
+
+
+def test_daily_leader(storage):
+    """Test that the creator of the day's most liked post that day is the daily leader."""
+    today = current_day()
+    storage.upsert_users_bulk([{"fid": 1, "username": "alice"}, {"fid": 2, "username": "bob"}])
+    storage.create_posts_bulk(
+        [_post("0xa", 1, today, 4), _post("0xb", 1, today, 9), _post("0xc", 2, today, 20)]
+    )
+
+    assert storage.get_daily_leader() is None
+    assert storage.mark_based_creator_of_the_day(1) is True
+    assert storage.get_daily_leader()["hash"] == "0xb"
+    assert storage.mark_based_creator_of_the_day(1) is False  # already the leader
+
+    # A later post overtakes the day's leader
+    assert storage.mark_based_creator_of_the_day(2) is True
+    assert storage.get_daily_leader()["hash"] == "0xc"
+    assert storage.mark_based_creator_of_the_day(99) is False  # unknown user
+
+
+def test_backends_implement_the_interface():
+    """Test that both backends are storage backends and can be opened by name."""
+    assert issubclass(Database, StorageBackend)
+    assert isinstance(open_storage("memory"), MemoryStorage)
+    with pytest.raises(ValueError):
+        open_storage("postgres")
+
+
+def test_async_facade_over_memory_storage():
+    """Test that the async facade and its batch writer work on the memory backend."""
+    import asyncio
+
+    adb = AsyncDatabase(backend="memory")
+
+    async def scenario():
+        await asyncio.gather(*(adb.create_user(fid, f"user{fid}") for fid in range(1, 4)))
+        return await adb.get_user(2)
+
+    assert asyncio.run(scenario()) == {"fid": 2, "username": "user2"}
+    asyncio.run(adb.close())
+
+
+def test_high_water_marks_only_move_forward(storage):
+    """Test that feed high-water marks are stored per feed and never move back in time."""
+    assert storage.get_high_water_mark("base") is None
+
+    storage.set_high_water_mark("base", "0x2", "2025-01-06T00:00:02Z")
+    storage.set_high_water_mark("base", "0x1", "2025-01-06T00:00:01Z")
+    storage.set_high_water_mark("other", "0x9", "2025-01-06T00:00:09Z")
+
+    assert storage.get_high_water_mark("base") == {
+        "hash": "0x2",
+        "timestamp": "2025-01-06T00:00:02Z",
+    }
+    assert storage.get_high_water_mark("other")["hash"] == "0x9"